@@ -33,14 +33,15 @@ from .io.meas_info import create_info
 from .io.kit import read_epochs_kit
 from .cov import (read_cov, write_cov, Covariance,
                   compute_covariance, compute_raw_data_covariance,
-                  whiten_evoked, make_ad_hoc_cov)
+                  whiten_evoked, make_ad_hoc_cov, IncrementalCovariance)
 from .event import (read_events, write_events, find_events, merge_events,
                     pick_events, make_fixed_length_events, concatenate_events,
-                    find_stim_steps)
+                    find_stim_steps, Events)
 from .forward import (read_forward_solution, apply_forward, apply_forward_raw,
                       do_forward_solution, average_forward_solutions,
                       write_forward_solution, make_forward_solution,
-                      convert_forward_solution, make_field_map)
+                      convert_forward_solution, make_field_map,
+                      ForwardEngine)
 from .source_estimate import (read_source_estimate, MixedSourceEstimate,
                               SourceEstimate, VolSourceEstimate, morph_data,
                               morph_data_precomputed, compute_morph_matrix,
@@ -78,7 +79,7 @@ from .selection import read_selection
 from .dipole import read_dipole, Dipole, fit_dipole
 from . import channels
 from .channels import equalize_channels, rename_channels, find_layout
-from .bem import make_sphere_model
+from .bem import make_sphere_model, make_bem_solution
 
 from . import beamformer
 from . import commands
@@ -8,14 +8,19 @@ import sys
 import os
 import os.path as op
 import shutil
+from copy import deepcopy
+
 import numpy as np
-from scipy import linalg
+from scipy import linalg, sparse
 
 from .fixes import partial
-from .utils import (verbose, logger, run_subprocess, get_subjects_dir)
+from .utils import (verbose, logger, run_subprocess, get_subjects_dir,
+                    get_config, object_hash, _write_atomic)
 from .io.constants import FIFF
 from .externals.six import string_types
-from .surface import read_surface, write_bem_surface
+from .surface import (read_surface, write_bem_surface, read_bem_surfaces,
+                      _complete_surface_info, _order_surfaces,
+                      _add_gamma_multipliers, _bem_explain_surface)
 
 
 # ############################################################################
@@ -247,6 +252,327 @@ def make_sphere_model(r0=(0., 0., 0.04), head_radius=0.09, info=None,
     return sphere
 
 
+# ############################################################################
+# Compute BEM solution
+
+# The following approach is based on:
+#
+# de Munck JC: "A linear discretization of the volume conductor boundary
+# integral equation using analytically integrated elements",
+# IEEE Trans Biomed Eng. 1992 39(9) : 986 - 990
+#
+
+# Number of (vertex, triangle) pairs whose potential coefficients are
+# computed at once in _fwd_bem_lin_pot_coeff
+_lin_pot_block_size = 100000
+
+# The solutions only depend on the surface geometry and conductivities, so
+# they are cached in memory and, if MNE_CACHE_DIR is set, on disk. They are
+# large, so only a few are kept in memory.
+_bem_solution_cache = dict()
+_bem_solution_cache_keys = list()
+_bem_solution_cache_size = 2
+
+
+def _dot(a, b):
+    """Dot products along the first axis of length 3"""
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _cross_dot(a, b, c):
+    """(a x b) . c along the first axis of length 3"""
+    return ((a[1] * b[2] - a[2] * b[1]) * c[0] +
+            (a[2] * b[0] - a[0] * b[2]) * c[1] +
+            (a[0] * b[1] - a[1] * b[0]) * c[2])
+
+
+def _calc_beta(rk, rk_norm, rk1, rk1_norm):
+    """These coefficients are used to calculate the magic vector omega"""
+    rkk1 = rk1 - rk
+    size = np.sqrt(_dot(rkk1, rkk1))
+    rkk1 /= size
+    num = rk_norm + _dot(rk, rkk1)
+    den = rk1_norm + _dot(rk1, rkk1)
+    return np.log(num / den) / size
+
+
+def _lin_pot_coeff(fros, tri_rr, tri_nn, tri_area):
+    """The linear potential matrix element computations
+
+    Parameters
+    ----------
+    fros : ndarray, shape (n_points, 3)
+        The field points.
+    tri_rr : ndarray, shape (n_tris, 3, 3)
+        The vertex positions of a block of triangles.
+    tri_nn : ndarray, shape (n_tris, 3)
+        The triangle normals.
+    tri_area : ndarray, shape (n_tris,)
+        The triangle areas.
+
+    Returns
+    -------
+    omega : ndarray, shape (3, n_points, n_tris)
+        The coefficients for each triangle vertex.
+    """
+    # This is the solid angle computation of _get_solids, but keeping the
+    # individual (point, triangle) terms. The vectors are stored as
+    # (3, n_points, n_tris) so that each component is contiguous.
+    fros = fros.T[:, :, np.newaxis]
+    v1 = tri_rr[:, 0].T[:, np.newaxis] - fros
+    v2 = tri_rr[:, 1].T[:, np.newaxis] - fros
+    v3 = tri_rr[:, 2].T[:, np.newaxis] - fros
+    triples = _cross_dot(v1, v2, v3)
+    l1 = np.sqrt(_dot(v1, v1))
+    l2 = np.sqrt(_dot(v2, v2))
+    l3 = np.sqrt(_dot(v3, v3))
+    ss = (l1 * l2 * l3 + _dot(v1, v2) * l3 + _dot(v1, v3) * l2 +
+          _dot(v2, v3) * l1)
+    solids = np.arctan2(triples, ss)
+
+    # There are very few points in the plane of a triangle, so rather than
+    # subselecting we compute everything and zero them out at the end. This
+    # avoids invalid values in _calc_beta.
+    bad_mask = np.abs(solids) < np.pi / 1e6
+    l1[bad_mask] = 1.
+    l2[bad_mask] = 1.
+    l3[bad_mask] = 1.
+
+    # Calculate the magic vector vec_omega
+    beta = [_calc_beta(v1, l1, v2, l2), _calc_beta(v2, l2, v3, l3),
+            _calc_beta(v3, l3, v1, l1)]
+    vec_omega = (beta[2] - beta[0]) * v1
+    vec_omega += (beta[0] - beta[1]) * v2
+    vec_omega += (beta[1] - beta[2]) * v3
+
+    area2 = 2.0 * tri_area
+    n2 = 1.0 / (area2 * area2)
+    tri_nn = tri_nn.T[:, np.newaxis]
+    # Put it all together...
+    omega = np.empty((3,) + solids.shape)
+    yys = [v1, v2, v3]
+    idx = [0, 1, 2, 0, 2]
+    for k in range(3):
+        diff = yys[idx[k - 1]] - yys[idx[k + 1]]
+        zdots = _cross_dot(yys[idx[k + 1]], yys[idx[k - 1]], tri_nn)
+        omega[k] = -n2 * (area2 * zdots * 2. * solids -
+                          triples * _dot(diff, vec_omega))
+    # omit the bad points from the solution
+    omega[:, bad_mask] = 0.
+    return omega
+
+
+def _correct_auto_elements(surf, mat):
+    """Improve auto-element approximation"""
+    # The coefficients of a vertex with respect to the triangles it belongs
+    # to were left out, so fill in what is missing from the full solid angle:
+    # the vertex itself receives one half, and the rest is divided evenly
+    # among its neighbors in each of its triangles
+    tris = surf['tris']
+    n_memb = np.bincount(tris.ravel(), minlength=len(mat))
+    misses = 2.0 * np.pi - mat.sum(axis=1)
+    mat[np.arange(len(mat)), np.arange(len(mat))] = misses / 2.0
+    misses /= 4.0 * n_memb
+    for k in range(3):
+        for offset in (1, 2):
+            np.add.at(mat, (tris[:, k], tris[:, (k + offset) % 3]),
+                      misses[tris[:, k]])
+
+
+def _fwd_bem_lin_pot_coeff(surfs):
+    """Calculate the coefficients for linear collocation approach"""
+    # taken from fwd_bem_linear_collocation.c
+    nps = [surf['np'] for surf in surfs]
+    offsets = np.cumsum(np.r_[0, nps])
+    coeff = np.zeros((offsets[-1], offsets[-1]))
+    for si_1, surf1 in enumerate(surfs):
+        # Vectorize over as many triangles as fit in a block
+        n_block = max(_lin_pot_block_size // nps[si_1], 1)
+        for si_2, surf2 in enumerate(surfs):
+            logger.info('        %s (%d) -> %s (%d) ...'
+                        % (_bem_explain_surface(surf1['id']), nps[si_1],
+                           _bem_explain_surface(surf2['id']), nps[si_2]))
+            submat = coeff[offsets[si_1]:offsets[si_1 + 1],
+                           offsets[si_2]:offsets[si_2 + 1]]  # view
+            for start in range(0, len(surf2['tris']), n_block):
+                sl = slice(start, start + n_block)
+                tris = surf2['tris'][sl]
+                omega = _lin_pot_coeff(surf1['rr'], surf2['rr'][tris],
+                                       surf2['tri_nn'][sl],
+                                       surf2['tri_area'][sl])
+                if si_1 == si_2:
+                    # No contribution from a triangle that this vertex
+                    # belongs to
+                    omega[:, tris.ravel(),
+                          np.repeat(np.arange(len(tris)), 3)] = 0.
+                # Accumulate the contributions into the triangle vertices
+                omega.shape = (3 * nps[si_1], len(tris))
+                vert_tri = sparse.csr_matrix(
+                    (np.ones(3 * len(tris)),
+                     (tris.T.ravel(), np.arange(3 * len(tris)))),
+                    shape=(nps[si_2], 3 * len(tris)))
+                omega = np.concatenate(np.split(omega, 3), axis=1)
+                submat -= vert_tri.dot(omega.T).T
+            if si_1 == si_2:
+                _correct_auto_elements(surf1, submat)
+    return coeff
+
+
+def _fwd_bem_multi_solution(solids, gamma, nps):
+    """Do multi surface solution
+
+    * Invert I - solids/(2*M_PI)
+    * Take deflation into account
+    * The matrix is destroyed after inversion
+    * This is the general multilayer case
+    """
+    pi2 = 1.0 / (2 * np.pi)
+    n_tot = np.sum(nps)
+    assert solids.shape == (n_tot, n_tot)
+    nsurf = len(nps)
+    defl = 1.0 / n_tot
+    # Modify the matrix
+    offsets = np.cumsum(np.r_[0, nps])
+    for si_1 in range(nsurf):
+        for si_2 in range(nsurf):
+            mult = pi2 if gamma is None else pi2 * gamma[si_1, si_2]
+            slice_j = slice(offsets[si_1], offsets[si_1 + 1])
+            slice_k = slice(offsets[si_2], offsets[si_2 + 1])
+            solids[slice_j, slice_k] = defl - solids[slice_j, slice_k] * mult
+    solids.flat[::n_tot + 1] += 1.
+    # LAPACK works on blocks of the matrix in place, so no copy is needed
+    return linalg.inv(solids, overwrite_a=True)
+
+
+def _fwd_bem_homog_solution(solids, nps):
+    """Helper to make a homogeneous solution"""
+    return _fwd_bem_multi_solution(solids, None, nps)
+
+
+def _fwd_bem_ip_modify_solution(solution, ip_solution, ip_mult, nps):
+    """Modify the solution according to the IP approach"""
+    n_last = nps[-1]
+    mult = (1.0 + ip_mult) / ip_mult
+
+    logger.info('        Combining...')
+    # Pick the correct submatrix (right column) and multiply
+    sub = solution[:, -n_last:]
+    sub -= 2 * np.dot(sub, ip_solution)
+
+    # The lower right corner is a special case
+    sub[-n_last:] += mult * ip_solution
+
+    # Final scaling
+    logger.info('        Scaling...')
+    solution *= ip_mult
+
+
+def _fwd_bem_linear_collocation_solution(bem):
+    """Compute the linear collocation potential solution"""
+    logger.info('Computing the linear collocation solution...')
+    logger.info('    Matrix coefficients...')
+    coeff = _fwd_bem_lin_pot_coeff(bem['surfs'])
+    logger.info('    Inverting the coefficient matrix...')
+    nps = [surf['np'] for surf in bem['surfs']]
+    solution = _fwd_bem_multi_solution(coeff, bem['gamma'], nps)
+    del coeff
+    if len(bem['surfs']) == 3:
+        ip_mult = bem['sigma'][1] / bem['sigma'][2]
+        if ip_mult <= FIFF.FWD_BEM_IP_APPROACH_LIMIT:
+            logger.info('IP approach required...')
+            logger.info('    Matrix coefficients (homog)...')
+            coeff = _fwd_bem_lin_pot_coeff([bem['surfs'][-1]])
+            logger.info('    Inverting the coefficient matrix (homog)...')
+            ip_solution = _fwd_bem_homog_solution(coeff, [nps[-1]])
+            logger.info('    Modify the original solution to incorporate '
+                        'IP approach...')
+            _fwd_bem_ip_modify_solution(solution, ip_solution, ip_mult, nps)
+    return solution
+
+
+def _get_bem_solution(bem):
+    """Get the BEM solution matrix from the cache or compute it"""
+    key = [dict(id=surf['id'], sigma=surf['sigma'], rr=surf['rr'],
+                tris=surf['tris']) for surf in bem['surfs']]
+    key = '%032x' % object_hash(key)
+    if key in _bem_solution_cache:
+        logger.info('Using cached BEM solution')
+        return _bem_solution_cache[key]
+    cache_dir = get_config('MNE_CACHE_DIR', None)
+    fname = None
+    if cache_dir is not None and op.isdir(cache_dir):
+        fname = op.join(cache_dir, 'mne-bem-sol-%s.npy' % key)
+    if fname is not None and op.isfile(fname):
+        logger.info('Reading cached BEM solution from %s' % fname)
+        solution = np.load(fname)
+    else:
+        solution = _fwd_bem_linear_collocation_solution(bem)
+        if fname is not None:
+            _write_atomic(fname, np.save, solution)
+    solution.flags.writeable = False  # shared between calls
+    _bem_solution_cache[key] = solution
+    _bem_solution_cache_keys.append(key)
+    if len(_bem_solution_cache_keys) > _bem_solution_cache_size:
+        _bem_solution_cache.pop(_bem_solution_cache_keys.pop(0), None)
+    return solution
+
+
+@verbose
+def make_bem_solution(surfs, verbose=None):
+    """Create a BEM solution using the linear collocation approach
+
+    This is equivalent to the mne_prepare_bem_model command line utility
+    with the linear collocation method and the isolated skull approach.
+
+    Parameters
+    ----------
+    surfs : list of dict | str
+        The BEM surfaces to use, as returned by
+        :func:`mne.read_bem_surfaces`, or the name of the file containing
+        them (e.g., "sample-5120-5120-5120-bem.fif"). Either three surfaces
+        (head, outer skull and inner skull) or the inner skull surface only
+        are needed, each with its conductivity ``'sigma'``.
+    verbose : bool, str, int, or None
+        If not None, override default verbose level (see mne.verbose).
+
+    Returns
+    -------
+    bem : dict
+        The BEM solution, which can be used in place of a BEM solution file
+        in :func:`mne.make_forward_solution`.
+
+    Notes
+    -----
+    The solution matrix only depends on the surfaces and conductivities, and
+    is cached in memory. If the ``MNE_CACHE_DIR`` configuration variable is
+    set, it is also stored there and reused across sessions.
+
+    .. versionadded:: 0.10.0
+    """
+    logger.info('Approximation method : Linear collocation\n')
+    if isinstance(surfs, string_types):
+        logger.info('Loading surfaces from %s...' % surfs)
+        surfs = read_bem_surfaces(surfs, verbose=False)
+    surfs = [deepcopy(surf) for surf in surfs]
+    if len(surfs) not in (1, 3):
+        raise RuntimeError('BEM models must have one or three surfaces, '
+                           'got %d' % len(surfs))
+    surfs = _order_surfaces(surfs)
+    for surf in surfs:
+        coord_frame = surf.get('coord_frame', FIFF.FIFFV_COORD_MRI)
+        if coord_frame != FIFF.FIFFV_COORD_MRI:
+            raise RuntimeError('BEM surfaces must be in MRI coordinates')
+        _complete_surface_info(surf)
+    bem = dict(surfs=surfs)
+    _add_gamma_multipliers(bem)
+    bem['solution'] = _get_bem_solution(bem)
+    bem['nsol'] = len(bem['solution'])
+    bem['bem_method'] = 'linear collocation'
+    bem['is_sphere'] = False
+    logger.info('Solution ready.')
+    return bem
+
+
 # #############################################################################
 # Helpers
 
@@ -115,6 +115,7 @@ def _do_interp_dots(inst, interpolation, goods_idx, bads_idx):
     if isinstance(inst, _BaseRaw):
         inst._data[bads_idx] = interpolation.dot(inst._data[goods_idx])
     elif isinstance(inst, _BaseEpochs):
+        inst._own_data()
         inst._data[:, bads_idx, :] = np.einsum('ij,xjy->xiy', interpolation,
                                                inst._data[:, goods_idx, :])
     elif isinstance(inst, Evoked):
@@ -29,8 +29,10 @@ from .io.write import (start_block, end_block, write_int, write_name_list,
                        write_double, write_float_matrix, write_string)
 from .defaults import _handle_default
 from .epochs import _is_good
+from .parallel import parallel_func
 from .utils import (check_fname, logger, verbose, estimate_rank,
-                    _compute_row_norms, check_sklearn_version, _time_mask)
+                    _compute_row_norms, check_sklearn_version, _time_mask,
+                    object_hash)
 
 from .externals.six.moves import zip
 
@@ -302,6 +304,9 @@ def _check_n_samples(n_samples, n_chan):
 @verbose
 def compute_raw_data_covariance(raw, tmin=None, tmax=None, tstep=0.2,
                                 reject=None, flat=None, picks=None,
+                                method='empirical', method_params=None,
+                                cv=3, scalings=None, n_jobs=1,
+                                return_estimators=False, dtype=np.float64,
                                 verbose=None):
     """Estimate noise covariance matrix from a continuous segment of raw data
 
@@ -309,6 +314,11 @@ def compute_raw_data_covariance(raw, tmin=None, tmax=None, tstep=0.2,
     from empty room data or time intervals before starting
     the stimulation.
 
+    The data are read in blocks of ``tstep`` seconds. Each block only
+    contributes its number of samples, its mean and its centered
+    cross-product matrix, so the data never have to be held in memory at
+    once and the blocks can be reduced by several jobs in parallel.
+
     Note: To speed up the computation you should consider preloading raw data
     by setting preload=True when reading the Raw data.
 
@@ -341,13 +351,64 @@ def compute_raw_data_covariance(raw, tmin=None, tmax=None, tstep=0.2,
     picks : array-like of int
         Indices of channels to include (if None, all channels
         except bad channels are used).
+    method : str | list | None
+        The method used for covariance estimation. Only the estimators that
+        can be computed from the streamed sufficient statistics are
+        available: 'empirical', 'diagonal_fixed' and 'shrunk' (see
+        :func:`mne.compute_covariance`). If 'auto', expands to::
+
+             ['shrunk', 'diagonal_fixed', 'empirical']
+
+        If more than one method is given, the best one is selected by
+        cross-validated log-likelihood, the folds being made of interleaved
+        blocks of ``tstep`` seconds.
+
+        .. versionadded:: 0.10
+
+    method_params : dict | None
+        Additional parameters to the estimation procedure, see
+        :func:`mne.compute_covariance`.
+
+        .. versionadded:: 0.10
+
+    cv : int
+        The number of cross-validation folds. Defaults to 3.
+
+        .. versionadded:: 0.10
+
+    scalings : dict | None
+        Defaults to ``dict(mag=1e15, grad=1e13, eeg=1e6)``.
+        Only used for model selection.
+
+        .. versionadded:: 0.10
+
+    n_jobs : int
+        Number of jobs used to read and reduce the data blocks.
+
+        .. versionadded:: 0.10
+
+    return_estimators : bool
+        Whether to return all estimators or the best. Only considered if
+        method equals 'auto' or is a list of str. Defaults to False.
+
+        .. versionadded:: 0.10
+
+    dtype : numpy dtype
+        The dtype used to compute the cross-products of each block. Using
+        ``np.float32`` is faster and the results are still accumulated in
+        double precision. Defaults to ``np.float64``.
+
+        .. versionadded:: 0.10
+
     verbose : bool, str, int, or None
         If not None, override default verbose level (see mne.verbose).
 
     Returns
     -------
-    cov : instance of Covariance
-        Noise covariance matrix.
+    cov : instance of Covariance | list
+        Noise covariance matrix. If method equals 'auto' or is a list of str
+        and return_estimators equals True, a list of covariance estimators is
+        returned (sorted by log-likelihood, from high to low).
     """
     sfreq = raw.info['sfreq']
 
@@ -359,57 +420,352 @@ def compute_raw_data_covariance(raw, tmin=None, tmax=None, tstep=0.2,
         stop = int(ceil(tmax * sfreq))
     step = int(ceil(tstep * raw.info['sfreq']))
 
+    if method == 'auto':
+        method = ['shrunk', 'diagonal_fixed', 'empirical']
+    if not isinstance(method, (list, tuple)):
+        method = [method]
+    accepted_methods = ('empirical', 'diagonal_fixed', 'shrunk')
+    for this_method in method:
+        if this_method not in accepted_methods:
+            raise ValueError('Invalid method (%s). Accepted values for raw '
+                             'data (individually or in a list) are "auto" '
+                             'or "%s"' % (this_method,
+                                          '" or "'.join(accepted_methods)))
+    do_cv = method != ['empirical']
+    n_folds = cv if do_cv else 1
+    if not isinstance(n_folds, int) or n_folds < 1 or (do_cv and
+                                                       n_folds < 2):
+        raise ValueError('cv must be an int larger than 1, got %s' % (cv,))
+
     # don't exclude any bad channels, inverses expect all channels present
     if picks is None:
         picks = pick_types(raw.info, meg=True, eeg=True, eog=False,
                            ref_meg=False, exclude=[])
 
-    data = 0
-    n_samples = 0
-    mu = 0
-
     info = cp.copy(raw.info)
     info['chs'] = [info['chs'][k] for k in picks]
     info['ch_names'] = [info['ch_names'][k] for k in picks]
     info['nchan'] = len(picks)
     idx_by_type = channel_indices_by_type(info)
 
-    # Read data in chuncks
-    for first in range(start, stop, step):
-        last = first + step
-        if last >= stop:
-            last = stop
-        raw_segment, times = raw[picks, first:last]
-        if _is_good(raw_segment, info['ch_names'], idx_by_type, reject, flat,
-                    ignore_chs=info['bads']):
-            mu += raw_segment.sum(axis=1)
-            data += np.dot(raw_segment, raw_segment.T)
-            n_samples += raw_segment.shape[1]
-        else:
-            logger.info("Artefact detected in [%d, %d]" % (first, last))
-
+    # Read data in chunks, the chunks are reduced in parallel and each
+    # chunk goes to the fold given by its position
+    windows = [(first, min(first + step, stop))
+               for first in range(start, stop, step)]
+    parallel, p_fun, n_jobs = parallel_func(_raw_cov_stats, n_jobs)
+    n_jobs = max(min(n_jobs, len(windows)), 1)
+    fold_stats = [None] * n_folds
+    for this_stats in parallel(
+            p_fun(raw, picks, windows, idx, n_folds, info, idx_by_type,
+                  reject, flat, dtype)
+            for idx in np.array_split(np.arange(len(windows)), n_jobs)):
+        for fi, stats in enumerate(this_stats):
+            fold_stats[fi] = _merge_cov_stats(fold_stats[fi], stats)
+
+    stats = None
+    for fold in fold_stats:
+        stats = _merge_cov_stats(stats, _copy_cov_stats(fold))
+    n_samples = 0 if stats is None else stats[0]
     _check_n_samples(n_samples, len(picks))
-    mu /= n_samples
-    data -= n_samples * mu[:, None] * mu[None, :]
-    data /= (n_samples - 1.0)
+    data = stats[2] / (n_samples - 1.0)
     logger.info("Number of samples used : %d" % n_samples)
     logger.info('[done]')
 
-    cov = Covariance(None)
-
     ch_names = [raw.info['ch_names'][k] for k in picks]
     # XXX : do not compute eig and eigvec now (think it's better...)
     eig = None
     eigvec = None
 
-    #   Store structure for fif
-    cov.update(kind=FIFF.FIFFV_MNE_NOISE_COV, diag=False, dim=len(data),
-               names=ch_names, data=data,
-               projs=cp.deepcopy(raw.info['projs']),
-               bads=raw.info['bads'], nfree=n_samples, eig=eig,
-               eigvec=eigvec)
+    if not do_cv:
+        cov = Covariance(None)
+        #   Store structure for fif
+        cov.update(kind=FIFF.FIFFV_MNE_NOISE_COV, diag=False, dim=len(data),
+                   names=ch_names, data=data,
+                   projs=cp.deepcopy(raw.info['projs']),
+                   bads=raw.info['bads'], nfree=n_samples, eig=eig,
+                   eigvec=eigvec)
+        return cov
 
-    return cov
+    # model selection on the streamed statistics
+    if any(stats is None or stats[0] < 2 for stats in fold_stats):
+        raise ValueError('Not enough clean data blocks for %d-fold '
+                         'cross-validation' % n_folds)
+    picks_list = [(ch_type, np.array(idx_by_type[ch_type]))
+                  for ch_type in ('mag', 'grad', 'eeg')
+                  if len(idx_by_type[ch_type]) > 0]
+    if sum(len(p) for _, p in picks_list) != len(picks):
+        raise ValueError('Model selection of the covariance is only '
+                         'supported for MEG and EEG channels')
+    scalings = _handle_default('scalings', scalings)
+    _method_params = _get_method_params(method_params)
+
+    train_covs, test_covs = list(), list()
+    for fi in range(n_folds):
+        train = None
+        for fj, fold in enumerate(fold_stats):
+            if fj != fi:
+                train = _merge_cov_stats(train, _copy_cov_stats(fold))
+        train_covs.append(train[2] / train[0])
+        test_covs.append(fold_stats[fi][2] / fold_stats[fi][0])
+    for this_data in [data] + train_covs + test_covs:
+        _apply_scaling_cov(this_data, picks_list, scalings)
+
+    covs = list()
+    for this_method in method:
+        logger.info('Estimating covariance using %s' % this_method.upper())
+        params = _method_params[this_method]
+        if this_method == 'empirical':
+            reg_fun = np.array
+        elif this_method == 'diagonal_fixed':
+            def reg_fun(this_data):
+                return _regularize_cov_data(this_data, info, params)
+        else:  # shrunk
+            shrinkages = list()
+            for ch_type, this_picks in picks_list:
+                ix = np.ix_(this_picks, this_picks)
+                scores = _shrinkage_cv_scores([c[ix] for c in train_covs],
+                                              [c[ix] for c in test_covs],
+                                              params['shrinkage'])
+                shrinkages.append((ch_type,
+                                   params['shrinkage'][np.argmax(scores)],
+                                   this_picks))
+
+            def reg_fun(this_data):
+                return _apply_shrinkage(this_data.copy(), shrinkages)[0]
+        loglik = np.mean([_gaussian_loglik_cov(test, reg_fun(train))
+                          for train, test in zip(train_covs, test_covs)])
+        this_data = reg_fun(data)
+        _undo_scaling_cov(this_data, picks_list, scalings)
+        cov = Covariance(None)
+        cov.update(kind=FIFF.FIFFV_MNE_NOISE_COV, diag=False,
+                   dim=len(this_data), names=ch_names, data=this_data,
+                   projs=cp.deepcopy(raw.info['projs']),
+                   bads=raw.info['bads'], nfree=n_samples, eig=eig,
+                   eigvec=eigvec, method=this_method, loglik=loglik)
+        covs.append(cov)
+        logger.info('Done.')
+
+    return _select_covs(covs, return_estimators)
+
+
+def _raw_cov_stats(raw, picks, windows, idx, n_folds, info, idx_by_type,
+                   reject, flat, dtype):
+    """Aux function to reduce raw data windows to covariance statistics"""
+    fold_stats = [None] * n_folds
+    for ii in idx:
+        first, last = windows[ii]
+        raw_segment, times = raw[picks, first:last]
+        if _is_good(raw_segment, info['ch_names'], idx_by_type, reject, flat,
+                    ignore_chs=info['bads']):
+            fold_stats[ii % n_folds] = _merge_cov_stats(
+                fold_stats[ii % n_folds], _cov_stats(raw_segment, dtype))
+        else:
+            logger.info("Artefact detected in [%d, %d]" % (first, last))
+    return fold_stats
+
+
+def _cov_stats(data, dtype=np.float64):
+    """Number of samples, mean and centered cross-products of data"""
+    mean = data.mean(axis=1)
+    data = (data - mean[:, np.newaxis]).astype(dtype)
+    scatter = np.dot(data, data.T).astype(np.float64)
+    return [data.shape[1], mean, scatter]
+
+
+def _copy_cov_stats(stats):
+    """Copy covariance statistics"""
+    return None if stats is None else [stats[0], stats[1].copy(),
+                                       stats[2].copy()]
+
+
+def _merge_cov_stats(stats_a, stats_b):
+    """Merge two sets of covariance statistics (stats_a is modified)
+
+    This uses the pairwise update of Chan et al. so that the
+    cross-products remain centered on the pooled mean.
+    """
+    if stats_a is None:
+        return stats_b
+    if stats_b is None:
+        return stats_a
+    n_a, mean_a, scatter_a = stats_a
+    n_b, mean_b, scatter_b = stats_b
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    scatter_a += scatter_b
+    scatter_a += (float(n_a) * n_b / n) * np.outer(delta, delta)
+    mean_a += delta * (float(n_b) / n)
+    stats_a[0] = n
+    return stats_a
+
+
+class IncrementalCovariance(object):
+    """Incremental estimation of a covariance from blocks of data
+
+    Blocks of data, e.g. chunks of raw data, epochs or the epochs of
+    :class:`mne.realtime.RtEpochs`, are reduced to their number of samples,
+    mean and centered cross-products as they arrive. Past data can be
+    exponentially forgotten and the covariance can be obtained at any
+    time.
+
+    Parameters
+    ----------
+    info : dict
+        The measurement info.
+    picks : array-like of int | None
+        Indices of channels to include (if None, MEG and EEG channels
+        including bad channels are used).
+    forgetting : float
+        The factor in (0, 1] by which the weight of past samples is
+        multiplied for each new sample, i.e. the weights are multiplied by
+        ``forgetting ** n_times`` when a block of ``n_times`` samples is
+        added. The samples of a block all have the same weight. 1.
+        (default) does not forget.
+    dtype : numpy dtype
+        The dtype used to compute the cross-products of each block. The
+        results are accumulated in double precision.
+    verbose : bool, str, int, or None
+        If not None, override default verbose level (see mne.verbose).
+
+    Attributes
+    ----------
+    ch_names : list
+        The names of the channels included.
+    n_samples_ : float
+        The number of samples seen, weighted by the forgetting factor.
+    mean_ : array, shape (n_channels,) | None
+        The (weighted) mean of the data.
+
+    Notes
+    -----
+    .. versionadded:: 0.10
+    """
+    @verbose
+    def __init__(self, info, picks=None, forgetting=1., dtype=np.float64,
+                 verbose=None):
+        if not 0. < forgetting <= 1.:
+            raise ValueError('forgetting must be in (0, 1], got %s'
+                             % forgetting)
+        if picks is None:
+            picks = pick_types(info, meg=True, eeg=True, eog=False,
+                               ref_meg=False, exclude=[])
+        self.info = info
+        self.picks = np.asarray(picks, dtype=int)
+        self.ch_names = [info['ch_names'][k] for k in self.picks]
+        self.forgetting = float(forgetting)
+        self.dtype = dtype
+        self.verbose = verbose
+        self._stats = None
+        self._sum_sq_weights = 0.
+
+    @property
+    def n_samples_(self):
+        return 0 if self._stats is None else self._stats[0]
+
+    @property
+    def mean_(self):
+        return None if self._stats is None else self._stats[1].copy()
+
+    def __repr__(self):
+        s = '%d channels, n_samples : %0.1f' % (len(self.ch_names),
+                                                self.n_samples_)
+        return '<IncrementalCovariance  |  %s>' % s
+
+    def update(self, data):
+        """Add a block of data
+
+        Parameters
+        ----------
+        data : array, shape (n_channels, n_times) | (n_epochs, n_channels,
+               n_times)
+            The data, with as many channels as ``info``. A 3D array
+            is treated as a sequence of blocks, e.g. epochs.
+
+        Returns
+        -------
+        self : instance of IncrementalCovariance
+            The object, modified in place.
+        """
+        data = np.asarray(data)
+        if data.ndim == 2:
+            data = data[np.newaxis]
+        if data.ndim != 3 or data.shape[1] != self.info['nchan']:
+            raise ValueError('data must have %d channels, got an array of '
+                             'shape %s' % (self.info['nchan'], data.shape))
+        for block in data:
+            stats = _cov_stats(block[self.picks], self.dtype)
+            if self._stats is not None and self.forgetting < 1.:
+                decay = self.forgetting ** stats[0]
+                self._stats[0] *= decay
+                self._stats[2] *= decay
+                self._sum_sq_weights *= decay ** 2
+            self._stats = _merge_cov_stats(self._stats, stats)
+            self._sum_sq_weights += stats[0]
+        return self
+
+    def get_covariance(self, method='empirical', method_params=None):
+        """Get the covariance of the data seen so far
+
+        Parameters
+        ----------
+        method : str
+            The regularization, can be 'empirical', 'diagonal_fixed' or
+            'shrunk' (see :func:`mne.compute_covariance`). For 'shrunk',
+            the shrinkage must be given as a float in ``method_params``
+            (defaults to 0.1).
+        method_params : dict | None
+            Additional parameters of the regularization, see
+            :func:`mne.compute_covariance`.
+
+        Returns
+        -------
+        cov : instance of Covariance
+            The covariance.
+        """
+        if method not in ('empirical', 'diagonal_fixed', 'shrunk'):
+            raise ValueError('method must be "empirical", "diagonal_fixed" '
+                             'or "shrunk", got %s' % method)
+        if self._stats is None:
+            raise RuntimeError('No data has been seen yet')
+        method_params = cp.deepcopy(method_params)
+        if method == 'shrunk':
+            if not isinstance(method_params, dict):
+                method_params = dict()
+            shrunk_params = dict(shrinkage=0.1)
+            shrunk_params.update(method_params.get('shrunk', dict()))
+            method_params['shrunk'] = shrunk_params
+            if not np.isscalar(method_params['shrunk']['shrinkage']):
+                raise ValueError('shrinkage must be a float')
+        params = _get_method_params(method_params)[method]
+
+        # unbiased normalization for weighted samples, which reduces to
+        # n_samples - 1 without forgetting
+        n_samples = self._stats[0]
+        n_eff = n_samples ** 2 / self._sum_sq_weights
+        _check_n_samples(n_eff, len(self.picks))
+        if n_eff <= 1.:
+            raise ValueError('At least two (effective) samples are needed '
+                             'to compute the covariance')
+        data = self._stats[2] / (n_samples - self._sum_sq_weights / n_samples)
+        info = pick_info(self.info, self.picks)
+        if method == 'diagonal_fixed':
+            data = _regularize_cov_data(data, info, params)
+        elif method == 'shrunk':
+            idx_by_type = channel_indices_by_type(info)
+            shrinkages = [(ch_type, params['shrinkage'],
+                           np.array(idx_by_type[ch_type]))
+                          for ch_type in ('mag', 'grad', 'eeg')
+                          if len(idx_by_type[ch_type]) > 0]
+            data = _apply_shrinkage(data, shrinkages)[0]
+
+        cov = Covariance(None)
+        cov.update(kind=FIFF.FIFFV_MNE_NOISE_COV, diag=False, dim=len(data),
+                   names=list(self.ch_names), data=data,
+                   projs=cp.deepcopy(self.info['projs']),
+                   bads=list(self.info['bads']),
+                   nfree=int(round(n_eff)), eig=None, eigvec=None,
+                   method=method)
+        return cov
 
 
 @verbose
@@ -552,23 +908,7 @@ def compute_covariance(epochs, keep_sample_mean=True, tmin=None, tmax=None,
                                  '"grad" or "eeg". You gave me: %s' % k)
     scalings = _handle_default('scalings', scalings)
 
-    _method_params = {
-        'empirical': {'store_precision': False, 'assume_centered': True},
-        'diagonal_fixed': {'grad': 0.01, 'mag': 0.01, 'eeg': 0.0,
-                           'store_precision': False, 'assume_centered': True},
-        'ledoit_wolf': {'store_precision': False, 'assume_centered': True},
-        'shrunk': {'shrinkage': np.logspace(-4, 0, 30),
-                   'store_precision': False, 'assume_centered': True},
-        'pca': {'iter_n_components': None},
-        'factor_analysis': {'iter_n_components': None}
-    }
-    if isinstance(method_params, dict):
-        for key, values in method_params.items():
-            if key not in _method_params:
-                raise ValueError('key (%s) must be "%s"' %
-                                 (key, '" or "'.join(_method_params)))
-
-            _method_params[key].update(method_params[key])
+    _method_params = _get_method_params(method_params)
 
     # for multi condition support epochs is required to refer to a list of
     # epochs objects
@@ -718,23 +1058,51 @@ def compute_covariance(epochs, keep_sample_mean=True, tmin=None, tmax=None,
         covs.append(cov)
 
     if ok_sklearn:
-        msg = ['log-likelihood on unseen data (descending order):']
-        logliks = [(c['method'], c['loglik']) for c in covs]
-        logliks.sort(reverse=True, key=lambda c: c[1])
-        for k, v in logliks:
-            msg.append('%s: %0.3f' % (k, v))
-        logger.info('\n   '.join(msg))
-
-    if ok_sklearn and not return_estimators:
+        out = _select_covs(covs, return_estimators)
+    else:
+        out = covs[0]
+
+    return out
+
+
+def _get_method_params(method_params):
+    """Aux function to update the default estimation parameters"""
+    _method_params = {
+        'empirical': {'store_precision': False, 'assume_centered': True},
+        'diagonal_fixed': {'grad': 0.01, 'mag': 0.01, 'eeg': 0.0,
+                           'store_precision': False, 'assume_centered': True},
+        'ledoit_wolf': {'store_precision': False, 'assume_centered': True},
+        'shrunk': {'shrinkage': np.logspace(-4, 0, 30),
+                   'store_precision': False, 'assume_centered': True},
+        'pca': {'iter_n_components': None},
+        'factor_analysis': {'iter_n_components': None}
+    }
+    if isinstance(method_params, dict):
+        for key, values in method_params.items():
+            if key not in _method_params:
+                raise ValueError('key (%s) must be "%s"' %
+                                 (key, '" or "'.join(_method_params)))
+
+            _method_params[key].update(method_params[key])
+    return _method_params
+
+
+def _select_covs(covs, return_estimators):
+    """Aux function to log and select covariances by log-likelihood"""
+    msg = ['log-likelihood on unseen data (descending order):']
+    logliks = [(c['method'], c['loglik']) for c in covs]
+    logliks.sort(reverse=True, key=lambda c: c[1])
+    for k, v in logliks:
+        msg.append('%s: %0.3f' % (k, v))
+    logger.info('\n   '.join(msg))
+
+    if not return_estimators:
         keys, scores = zip(*[(c['method'], c['loglik']) for c in covs])
         out = covs[np.argmax(scores)]
         logger.info('selecting best estimator: {0}'.format(out['method']))
-    elif ok_sklearn:
+    else:
         out = covs
         out.sort(key=lambda c: c['loglik'], reverse=True)
-    else:
-        out = covs[0]
-
     return out
 
 
@@ -742,15 +1110,18 @@ def _compute_covariance_auto(data, method, info, method_params, cv,
                              scalings, n_jobs, stop_early, picks_list,
                              verbose):
     """docstring for _compute_covariance_auto"""
-    from sklearn.grid_search import GridSearchCV
-    from sklearn.covariance import (LedoitWolf, ShrunkCovariance,
-                                    EmpiricalCovariance)
+    from sklearn.covariance import LedoitWolf, EmpiricalCovariance
 
     # rescale to improve numerical stability
     _apply_scaling_array(data.T, picks_list=picks_list, scalings=scalings)
     estimator_cov_info = list()
     msg = 'Estimating covariance using %s'
     _RegCovariance, _ShrunkCovariance = _get_covariance_classes()
+    # the second moments of the CV splits are computed once and shared by
+    # the estimators that are fully determined by them
+    moment_methods = ('empirical', 'diagonal_fixed', 'shrunk')
+    if any(this_method in moment_methods for this_method in method):
+        folds = _cv_fold_moments(data, cv)
     for this_method in method:
         data_ = data.copy()
         name = this_method.__name__ if callable(this_method) else this_method
@@ -786,21 +1157,22 @@ def _compute_covariance_auto(data, method, info, method_params, cv,
             estimator_cov_info.append((sc, sc.covariance_, _info))
 
         elif this_method == 'shrunk':
-            shrinkage = method_params[this_method].pop('shrinkage')
-            tuned_parameters = [{'shrinkage': shrinkage}]
+            mp = dict(method_params[this_method])
+            shrinkage = np.asarray(mp.pop('shrinkage'))
+            train_covs, test_covs = _cv_fold_covs(
+                folds, mp['assume_centered'], center_test=True)
             shrinkages = []
-            gs = GridSearchCV(ShrunkCovariance(**method_params[this_method]),
-                              tuned_parameters, cv=cv)
             for ch_type, picks in picks_list:
-                gs.fit(data_[:, picks])
+                ix = np.ix_(picks, picks)
+                scores = _shrinkage_cv_scores([c[ix] for c in train_covs],
+                                              [c[ix] for c in test_covs],
+                                              shrinkage)
                 shrinkages.append((
                     ch_type,
-                    gs.best_estimator_.shrinkage,
+                    shrinkage[np.argmax(scores)],
                     picks
                 ))
-            shrinkages = [c[0] for c in zip(shrinkages)]
-            sc = _ShrunkCovariance(shrinkage=shrinkages,
-                                   **method_params[this_method])
+            sc = _ShrunkCovariance(shrinkage=shrinkages, **mp)
             sc.fit(data_)
             _info = None
             estimator_cov_info.append((sc, sc.covariance_, _info))
@@ -827,8 +1199,16 @@ def _compute_covariance_auto(data, method, info, method_params, cv,
         logger.info('Done.')
 
     logger.info('Using cross-validation to select the best estimator.')
-    estimators, _, _ = zip(*estimator_cov_info)
-    logliks = np.array([_cross_val(data, e, cv, n_jobs) for e in estimators])
+    logliks = list()
+    for this_method, (est, _, _) in zip(method, estimator_cov_info):
+        if this_method in moment_methods:
+            train_covs, test_covs = _cv_fold_covs(folds, est.assume_centered)
+            logliks.append(np.mean([
+                _gaussian_loglik_cov(test, _refit_cov(this_method, est, train))
+                for train, test in zip(train_covs, test_covs)]))
+        else:
+            logliks.append(_cross_val(data, est, cv, n_jobs))
+    logliks = np.array(logliks)
 
     # undo scaling
     for c in estimator_cov_info:
@@ -847,6 +1227,47 @@ def _compute_covariance_auto(data, method, info, method_params, cv,
     return out
 
 
+def _cv_fold_moments(data, cv):
+    """Compute the second moments and means of the CV splits of data"""
+    from sklearn.cross_validation import check_cv
+    folds = list()
+    for train, test in check_cv(cv, data):
+        folds.append([(np.dot(X.T, X) / len(X), X.mean(axis=0))
+                      for X in (data[train], data[test])])
+    return folds
+
+
+def _cv_fold_covs(folds, assume_centered, center_test=False):
+    """Get the train and test covariances from the moments of CV splits
+
+    Unless center_test is True, the test covariances are not centered,
+    as in _gaussian_loglik_scorer. Otherwise they are centered on the
+    train mean, as done by the sklearn covariance estimators.
+    """
+    train_covs, test_covs = list(), list()
+    for (train_cov, train_mean), (test_cov, test_mean) in folds:
+        if not assume_centered:
+            train_cov = train_cov - np.outer(train_mean, train_mean)
+            if center_test:
+                test_cov = (test_cov - np.outer(test_mean, train_mean) -
+                            np.outer(train_mean, test_mean) +
+                            np.outer(train_mean, train_mean))
+        train_covs.append(train_cov)
+        test_covs.append(test_cov)
+    return train_covs, test_covs
+
+
+def _refit_cov(method, est, train_cov):
+    """Apply the regularization of a fitted estimator to a covariance"""
+    if method == 'diagonal_fixed':
+        return _regularize_cov_data(
+            train_cov, est.info, dict(grad=est.grad, mag=est.mag,
+                                      eeg=est.eeg))
+    elif method == 'shrunk':
+        return _apply_shrinkage(train_cov.copy(), est.shrinkage)[0]
+    return train_cov
+
+
 def _logdet(A):
     """Compute the log det of a symmetric matrix"""
     vals = linalg.eigh(A)[0]
@@ -866,6 +1287,96 @@ def _gaussian_loglik_scorer(est, X, y=None):
     return out
 
 
+def _gaussian_loglik_cov(test_cov, cov):
+    """Compute the Gaussian log likelihood of data given their covariance
+
+    This is the mean of what :func:`_gaussian_loglik_scorer` computes for
+    each sample, using only the (uncentered) covariance of the test data.
+    """
+    precision = linalg.pinvh(cov)
+    n_features = len(cov)
+    log_like = -.5 * np.sum(test_cov * precision)
+    log_like -= .5 * (n_features * log(2. * np.pi) - _logdet(precision))
+    return log_like
+
+
+def _shrinkage_cv_scores(train_covs, test_covs, shrinkages):
+    """Score shrinkage values from the covariances of the CV splits
+
+    Shrunk covariances share the eigenvectors of the training covariance,
+    so a single eigendecomposition per split is enough to score all
+    shrinkage values with the Gaussian log-likelihood of the test split.
+    """
+    shrinkages = np.asarray(shrinkages, dtype=np.float64)
+    scores = np.zeros(len(shrinkages))
+    for train_cov, test_cov in zip(train_covs, test_covs):
+        n_features = len(train_cov)
+        mu = np.trace(train_cov) / n_features
+        eig, eigvec = linalg.eigh(train_cov)
+        test_eig = np.sum(eigvec * np.dot(test_cov, eigvec), axis=0)
+        eig = ((1. - shrinkages)[:, np.newaxis] * eig[np.newaxis, :] +
+               (shrinkages * mu)[:, np.newaxis])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            this_scores = -.5 * (np.sum(test_eig / eig, axis=1) +
+                                 np.sum(np.log(eig), axis=1) +
+                                 n_features * log(2. * np.pi))
+        this_scores[np.any(eig <= 0, axis=1)] = -np.inf
+        scores += this_scores
+    return scores / len(train_covs)
+
+
+def _apply_shrinkage(cov, shrinkage):
+    """Shrink the channel type blocks of a covariance in place
+
+    Returns the covariance and the mask of the cross-covariances that
+    were set to zero.
+    """
+    zero_cross_cov = np.zeros_like(cov, dtype=bool)
+    for a, b in itt.combinations(shrinkage, 2):
+        picks_i, picks_j = a[2], b[2]
+        ch_ = a[0], b[0]
+        if 'eeg' in ch_:
+            zero_cross_cov[np.ix_(picks_i, picks_j)] = True
+            zero_cross_cov[np.ix_(picks_j, picks_i)] = True
+
+    # Apply shrinkage to blocks
+    for ch_type, c, picks in shrinkage:
+        sub_cov = cov[np.ix_(picks, picks)]
+        mu = np.trace(sub_cov) / len(sub_cov)
+        sub_cov *= (1. - c)
+        sub_cov.flat[::len(sub_cov) + 1] += c * mu
+        cov[np.ix_(picks, picks)] = sub_cov
+
+    # Apply shrinkage to cross-cov
+    for a, b in itt.combinations(shrinkage, 2):
+        shrinkage_i, shrinkage_j = a[1], b[1]
+        picks_i, picks_j = a[2], b[2]
+        c_ij = np.sqrt((1. - shrinkage_i) * (1. - shrinkage_j))
+        cov[np.ix_(picks_i, picks_j)] *= c_ij
+        cov[np.ix_(picks_j, picks_i)] *= c_ij
+
+    # Set to zero the necessary cross-cov
+    if np.any(zero_cross_cov):
+        cov[zero_cross_cov] = 0.0
+    return cov, zero_cross_cov
+
+
+def _regularize_cov_data(data, info, params):
+    """Regularize covariance data as done by 'diagonal_fixed'"""
+    data = 0.5 * (data + data.T)
+    cov_ = Covariance(None)
+    cov_['data'] = data
+    cov_['names'] = info['ch_names']
+    cov_['nfree'] = len(data)
+    cov_['bads'] = info['bads']
+    cov_['projs'] = info['projs']
+    cov_['diag'] = False
+    cov_ = regularize(cov_, info, grad=params['grad'], mag=params['mag'],
+                      eeg=params['eeg'], proj=False,
+                      exclude='bads')  # ~proj == important!!
+    return cov_.data
+
+
 def _cross_val(data, est, cv, n_jobs):
     """Helper to compute cross validation"""
     from sklearn.cross_validation import cross_val_score
@@ -890,32 +1401,40 @@ def _auto_low_rank_model(data, mode, n_jobs, method_params, cv,
                          mode)
     est = est(**method_params)
     est.n_components = 1
+    # make sure we don't empty the thing if it's a generator
+    iter_n_components = list(iter_n_components)
     scores = np.empty_like(iter_n_components, dtype=np.float64)
     scores.fill(np.nan)
 
-    # make sure we don't empty the thing if it's a generator
-    max_n = max(list(cp.deepcopy(iter_n_components)))
+    max_n = max(iter_n_components)
     if max_n > data.shape[1]:
         warnings.warn('You are trying to estimate %i components on matrix '
                       'with %i features.' % (max_n, data.shape[1]))
 
-    for ii, n in enumerate(iter_n_components):
-        est.n_components = n
-        try:  # this may fail depending on rank and split
-            score = _cross_val(data=data, est=est, cv=cv, n_jobs=n_jobs)
-        except ValueError:
-            score = np.inf
-        if np.isinf(score) or score > 0:
-            logger.info('... infinite values encountered. stopping estimation')
-            break
-        logger.info('... rank: %i - loglik: %0.3f' % (n, score))
-        if score != -np.inf:
-            scores[ii] = score
-
-        if (ii >= 3 and np.all(np.diff(scores[ii - 3:ii]) < 0.) and
-           stop_early is True):
-            # early stop search when loglik has been going down 3 times
-            logger.info('early stopping parameter search.')
+    # the candidates are scored by batches of n_jobs so that the search
+    # can still stop early
+    parallel, p_fun, n_jobs = parallel_func(_cross_val_n_components, n_jobs)
+    stop = False
+    for start in range(0, len(iter_n_components), n_jobs):
+        batch = iter_n_components[start:start + n_jobs]
+        batch_scores = parallel(p_fun(data, est, n, cv) for n in batch)
+        for ii, n, score in zip(itt.count(start), batch, batch_scores):
+            if np.isinf(score) or score > 0:
+                logger.info('... infinite values encountered. stopping '
+                            'estimation')
+                stop = True
+                break
+            logger.info('... rank: %i - loglik: %0.3f' % (n, score))
+            if score != -np.inf:
+                scores[ii] = score
+
+            if (ii >= 3 and np.all(np.diff(scores[ii - 3:ii]) < 0.) and
+               stop_early is True):
+                # early stop search when loglik has been going down 3 times
+                logger.info('early stopping parameter search.')
+                stop = True
+                break
+        if stop:
             break
 
     # happens if rank is too low right form the beginning
@@ -934,10 +1453,19 @@ def _auto_low_rank_model(data, mode, n_jobs, method_params, cv,
     return est, runtime_info
 
 
+def _cross_val_n_components(data, est, n_components, cv):
+    """Aux function to score a low rank model with n_components"""
+    est = cp.deepcopy(est)
+    est.n_components = n_components
+    try:  # this may fail depending on rank and split
+        return _cross_val(data=data, est=est, cv=cv, n_jobs=1)
+    except ValueError:
+        return np.inf
+
+
 def _get_covariance_classes():
     """Prepare special cov estimators"""
-    from sklearn.covariance import (EmpiricalCovariance, shrunk_covariance,
-                                    ShrunkCovariance)
+    from sklearn.covariance import EmpiricalCovariance, ShrunkCovariance
 
     class _RegCovariance(EmpiricalCovariance):
         """Aux class"""
@@ -953,18 +1481,9 @@ def _get_covariance_classes():
 
         def fit(self, X):
             EmpiricalCovariance.fit(self, X)
-            self.covariance_ = 0.5 * (self.covariance_ + self.covariance_.T)
-            cov_ = Covariance(None)
-            cov_['data'] = self.covariance_
-            cov_['names'] = self.info['ch_names']
-            cov_['nfree'] = len(self.covariance_)
-            cov_['bads'] = self.info['bads']
-            cov_['projs'] = self.info['projs']
-            cov_['diag'] = False
-            cov_ = regularize(cov_, self.info, grad=self.grad, mag=self.mag,
-                              eeg=self.eeg, proj=False,
-                              exclude='bads')  # ~proj == important!!
-            self.covariance_ = cov_.data
+            self.covariance_ = _regularize_cov_data(
+                self.covariance_, self.info,
+                dict(grad=self.grad, mag=self.mag, eeg=self.eeg))
             return self
 
     class _ShrunkCovariance(ShrunkCovariance):
@@ -984,33 +1503,7 @@ def _get_covariance_classes():
             else:
                 shrinkage = self.shrinkage
 
-            zero_cross_cov = np.zeros_like(cov, dtype=bool)
-            for a, b in itt.combinations(shrinkage, 2):
-                picks_i, picks_j = a[2], b[2]
-                ch_ = a[0], b[0]
-                if 'eeg' in ch_:
-                    zero_cross_cov[np.ix_(picks_i, picks_j)] = True
-                    zero_cross_cov[np.ix_(picks_j, picks_i)] = True
-
-            self.zero_cross_cov_ = zero_cross_cov
-
-            # Apply shrinkage to blocks
-            for ch_type, c, picks in shrinkage:
-                sub_cov = cov[np.ix_(picks, picks)]
-                cov[np.ix_(picks, picks)] = shrunk_covariance(sub_cov,
-                                                              shrinkage=c)
-
-            # Apply shrinkage to cross-cov
-            for a, b in itt.combinations(shrinkage, 2):
-                shrinkage_i, shrinkage_j = a[1], b[1]
-                picks_i, picks_j = a[2], b[2]
-                c_ij = np.sqrt((1. - shrinkage_i) * (1. - shrinkage_j))
-                cov[np.ix_(picks_i, picks_j)] *= c_ij
-                cov[np.ix_(picks_j, picks_i)] *= c_ij
-
-            # Set to zero the necessary cross-cov
-            if np.any(zero_cross_cov):
-                cov[zero_cross_cov] = 0.0
+            cov, self.zero_cross_cov_ = _apply_shrinkage(cov, shrinkage)
 
             self.covariance_ = cov
             return self
@@ -1076,6 +1569,13 @@ def _unpack_epochs(epochs):
     return epochs
 
 
+# Decompositions of noise covariances are cached by content, since the
+# same covariance is typically prepared many times for the same channels
+_noise_cov_cache = dict()
+_noise_cov_cache_keys = list()
+_noise_cov_cache_size = 8
+
+
 def _get_ch_whitener(A, pca, ch_type, rank):
     """"Get whitener params for a set of channels"""
     # whitening operator
@@ -1121,14 +1621,62 @@ def prepare_noise_cov(noise_cov, info, ch_names, rank=None,
     verbose : bool, str, int, or None
         If not None, override default verbose level (see mne.verbose).
     """
+    scalings = _handle_default('scalings_cov_rank', scalings)
+    key = _noise_cov_key(noise_cov, info, ch_names, rank, scalings)
+    if key in _noise_cov_cache:
+        logger.info('    Using cached noise covariance decomposition')
+        C, eig, eigvec, has_eeg = _noise_cov_cache[key]
+        C, eig, eigvec = C.copy(), eig.copy(), eigvec.copy()
+    else:
+        C, eig, eigvec, has_eeg = _decompose_noise_cov(noise_cov, info,
+                                                       ch_names, rank,
+                                                       scalings)
+        _noise_cov_cache[key] = (C.copy(), eig.copy(), eigvec.copy(),
+                                 has_eeg)
+        _noise_cov_cache_keys.append(key)
+        if len(_noise_cov_cache_keys) > _noise_cov_cache_size:
+            del _noise_cov_cache[_noise_cov_cache_keys.pop(0)]
+    if has_eeg and not _has_eeg_average_ref_proj(info['projs']):
+        warnings.warn('No average EEG reference present in info["projs"], '
+                      'covariance may be adversely affected. Consider '
+                      'recomputing covariance using a raw file with an '
+                      'average eeg reference projector added.')
+
+    noise_cov = cp.deepcopy(noise_cov)
+    noise_cov.update(data=C, eig=eig, eigvec=eigvec, dim=len(ch_names),
+                     diag=False, names=ch_names)
+
+    return noise_cov
+
+
+def _noise_cov_key(noise_cov, info, ch_names, rank, scalings):
+    """Key of the decomposition of a noise covariance for some channels"""
+    if isinstance(rank, dict):
+        rank = sorted((k, None if v is None else int(v))
+                      for k, v in rank.items())
+    elif rank is not None:
+        rank = int(rank)
+    chs = [[ch['ch_name'], int(ch['kind']), int(ch['coil_type'])]
+           for ch in info['chs']]
+    projs = [[bool(p['active']), list(p['data']['col_names']),
+              np.asarray(p['data']['data'], dtype=np.float64)]
+             for p in info['projs']]
+    return object_hash(dict(
+        data=np.asarray(noise_cov['data'], dtype=np.float64),
+        diag=bool(noise_cov['diag']), names=list(noise_cov.ch_names),
+        ch_names=list(ch_names), chs=chs, bads=list(info['bads']),
+        projs=projs, rank=rank,
+        scalings=sorted((k, float(v)) for k, v in scalings.items())))
+
+
+def _decompose_noise_cov(noise_cov, info, ch_names, rank, scalings):
+    """Eigendecompose a noise covariance per channel type"""
     C_ch_idx = [noise_cov.ch_names.index(c) for c in ch_names]
     if noise_cov['diag'] is False:
         C = noise_cov.data[np.ix_(C_ch_idx, C_ch_idx)]
     else:
         C = np.diag(noise_cov.data[C_ch_idx])
 
-    scalings = _handle_default('scalings_cov_rank', scalings)
-
     # Create the projection operator
     proj, ncomp, _ = make_projector(info['projs'], ch_names)
     if ncomp > 0:
@@ -1177,11 +1725,6 @@ def prepare_noise_cov(noise_cov, info, ch_names, rank=None,
             rank_eeg = _estimate_rank_meeg_cov(C_eeg, this_info, scalings)
         C_eeg_eig, C_eeg_eigvec = _get_ch_whitener(C_eeg, False, 'EEG',
                                                    rank_eeg)
-        if not _has_eeg_average_ref_proj(info['projs']):
-            warnings.warn('No average EEG reference present in info["projs"], '
-                          'covariance may be adversely affected. Consider '
-                          'recomputing covariance using a raw file with an '
-                          'average eeg reference projector added.')
 
     n_chan = len(ch_names)
     eigvec = np.zeros((n_chan, n_chan), dtype=np.float)
@@ -1196,11 +1739,7 @@ def prepare_noise_cov(noise_cov, info, ch_names, rank=None,
 
     assert(len(C_meg_idx) + len(C_eeg_idx) == n_chan)
 
-    noise_cov = cp.deepcopy(noise_cov)
-    noise_cov.update(data=C, eig=eig, eigvec=eigvec, dim=len(ch_names),
-                     diag=False, names=ch_names)
-
-    return noise_cov
+    return C, eig, eigvec, has_eeg
 
 
 def regularize(cov, info, mag=0.1, grad=0.1, eeg=0.1, exclude='bads',
@@ -1319,6 +1858,95 @@ def regularize(cov, info, mag=0.1, grad=0.1, eeg=0.1, exclude='bads',
     return cov
 
 
+class Whitener(object):
+    """Whitening operator of a noise covariance
+
+    The per channel type eigendecompositions of the noise covariance are
+    cached, so creating a whitener for a covariance, channel set, rank and
+    projectors that were already used does not decompose the covariance
+    again.
+
+    Parameters
+    ----------
+    noise_cov : Covariance
+        The noise covariance.
+    info : dict
+        The measurement info.
+    picks : array-like of int | None
+        The channels indices to include. If None the data
+        channels in info, except bad channels, are used.
+    rank : None | int | dict
+        Specified rank of the noise covariance matrix. If None, the rank is
+        detected automatically. If int, the rank is specified for the MEG
+        channels. A dictionary with entries 'eeg' and/or 'meg' can be used
+        to specify the rank for each modality.
+    scalings : dict | None
+        The rescaling method to be applied. See documentation of
+        ``prepare_noise_cov`` for details.
+    verbose : bool, str, int, or None
+        If not None, override default verbose level (see mne.verbose).
+
+    Attributes
+    ----------
+    ch_names : list
+        The channel names.
+    noise_cov : Covariance
+        The prepared noise covariance, restricted to ch_names.
+    W : 2d array
+        The whitening matrix.
+    rank : int
+        The rank of the whitening matrix.
+
+    Notes
+    -----
+    .. versionadded:: 0.10
+    """
+    @verbose
+    def __init__(self, noise_cov, info, picks=None, rank=None,
+                 scalings=None, verbose=None):
+        if picks is None:
+            picks = pick_types(info, meg=True, eeg=True, ref_meg=False,
+                               exclude='bads')
+        self.ch_names = [info['chs'][k]['ch_name'] for k in picks]
+        self.noise_cov = prepare_noise_cov(noise_cov, info, self.ch_names,
+                                           rank=rank, scalings=scalings)
+        #
+        #   Omit the zeroes due to projection
+        #
+        eig = self.noise_cov['eig']
+        nzero = (eig > 0)
+        #
+        #   Rows of eigvec are the eigenvectors
+        #
+        eigvec = self.noise_cov['eigvec'][nzero]
+        self.W = np.dot(eigvec.T / np.sqrt(eig[nzero]), eigvec)
+        self.rank = int(np.sum(nzero))
+
+    def __repr__(self):
+        s = '%d channels, rank %d' % (len(self.ch_names), self.rank)
+        return '<Whitener  |  %s>' % s
+
+    def apply(self, data):
+        """Whiten data
+
+        Parameters
+        ----------
+        data : array, shape (n_channels, ...) | iterable of arrays
+            The data, with channels ordered as in ``ch_names``. If an
+            iterable of arrays is given, e.g. a generator of data chunks
+            or epochs, the arrays are whitened one at a time.
+
+        Returns
+        -------
+        data_white : array | generator
+            The whitened data, or a generator of whitened arrays if an
+            iterable was given.
+        """
+        if isinstance(data, np.ndarray):
+            return np.dot(self.W, data)
+        return (np.dot(self.W, this_data) for this_data in data)
+
+
 def compute_whitener(noise_cov, info, picks=None, rank=None,
                      scalings=None, verbose=None):
     """Compute whitening matrix
@@ -1349,31 +1977,14 @@ def compute_whitener(noise_cov, info, picks=None, rank=None,
         The whitening matrix.
     ch_names : list
         The channel names.
-    """
-    if picks is None:
-        picks = pick_types(info, meg=True, eeg=True, ref_meg=False,
-                           exclude='bads')
-
-    ch_names = [info['chs'][k]['ch_name'] for k in picks]
 
-    noise_cov = cp.deepcopy(noise_cov)
-    noise_cov = prepare_noise_cov(noise_cov, info, ch_names,
-                                  rank=rank, scalings=scalings)
-    n_chan = len(ch_names)
-
-    W = np.zeros((n_chan, n_chan), dtype=np.float)
-    #
-    #   Omit the zeroes due to projection
-    #
-    eig = noise_cov['eig']
-    nzero = (eig > 0)
-    W[nzero, nzero] = 1.0 / np.sqrt(eig[nzero])
-    #
-    #   Rows of eigvec are the eigenvectors
-    #
-    W = np.dot(W, noise_cov['eigvec'])
-    W = np.dot(noise_cov['eigvec'].T, W)
-    return W, ch_names
+    See Also
+    --------
+    Whitener
+    """
+    whitener = Whitener(noise_cov, info, picks=picks, rank=rank,
+                        scalings=scalings, verbose=verbose)
+    return whitener.W, whitener.ch_names
 
 
 @verbose
@@ -1679,7 +2290,8 @@ def _check_scaling_inputs(data, picks_list, scalings):
 
 
 def _estimate_rank_meeg_signals(data, info, scalings, tol=1e-4,
-                                return_singular=False, copy=True):
+                                return_singular=False, copy=True,
+                                method='svd'):
     """Estimate rank for M/EEG data.
 
     Parameters
@@ -1702,6 +2314,9 @@ def _estimate_rank_meeg_signals(data, info, scalings, tol=1e-4,
     copy : bool
         If False, values in data will be modified in-place during
         rank estimation (saves memory).
+    method : 'svd' | 'gram'
+        The decomposition used to obtain the singular values. See
+        :func:`mne.utils.estimate_rank` for details.
 
     Returns
     -------
@@ -1717,7 +2332,8 @@ def _estimate_rank_meeg_signals(data, info, scalings, tol=1e-4,
         ValueError("You've got fewer samples than channels, your "
                    "rank estimate might be inaccurate.")
     out = estimate_rank(data, tol=tol, norm=False,
-                        return_singular=return_singular, copy=copy)
+                        return_singular=return_singular, copy=copy,
+                        method=method)
     rank = out[0] if isinstance(out, tuple) else out
     ch_type = ' + '.join(list(zip(*picks_list))[0])
     logger.info('estimated rank (%s): %d' % (ch_type, rank))
@@ -1726,7 +2342,8 @@ def _estimate_rank_meeg_signals(data, info, scalings, tol=1e-4,
 
 
 def _estimate_rank_meeg_cov(data, info, scalings, tol=1e-4,
-                            return_singular=False, copy=True):
+                            return_singular=False, copy=True,
+                            method='svd'):
     """Estimate rank for M/EEG data.
 
     Parameters
@@ -1749,6 +2366,9 @@ def _estimate_rank_meeg_cov(data, info, scalings, tol=1e-4,
     copy : bool
         If False, values in data will be modified in-place during
         rank estimation (saves memory).
+    method : 'svd' | 'gram'
+        The decomposition used to obtain the singular values. See
+        :func:`mne.utils.estimate_rank` for details.
 
     Returns
     -------
@@ -1765,7 +2385,8 @@ def _estimate_rank_meeg_cov(data, info, scalings, tol=1e-4,
         ValueError("You've got fewer samples than channels, your "
                    "rank estimate might be inaccurate.")
     out = estimate_rank(data, tol=tol, norm=False,
-                        return_singular=return_singular, copy=copy)
+                        return_singular=return_singular, copy=copy,
+                        method=method, cache=True)
     rank = out[0] if isinstance(out, tuple) else out
     ch_type = ' + '.join(list(zip(*picks_list))[0])
     logger.info('estimated rank (%s): %d' % (ch_type, rank))
@@ -11,6 +11,8 @@
 from .externals.six import string_types
 
 import copy as cp
+import heapq
+import weakref
 import warnings
 import json
 
@@ -33,7 +35,7 @@ from .baseline import rescale
 from .channels.channels import (ContainsMixin, PickDropChannelsMixin,
                                 SetChannelsMixin, InterpolationMixin)
 from .filter import resample, detrend, FilterMixin
-from .event import _read_events_fif
+from .event import _read_events_fif, _match_event_keys
 from .fixes import in1d
 from .viz import (plot_epochs, plot_epochs_trellis, _drop_log_stats,
                   plot_epochs_psd, plot_epochs_psd_topomap)
@@ -334,6 +336,7 @@ class _BaseEpochs(ProjMixin, ContainsMixin, PickDropChannelsMixin,
 
         # do the subtraction
         if self.preload:
+            self._own_data()
             self._data[:, ep_picks, :] -= evoked.data[picks][None, :, :]
         else:
             if self._offset is None:
@@ -344,6 +347,28 @@ class _BaseEpochs(ProjMixin, ContainsMixin, PickDropChannelsMixin,
 
         return self
 
+    def _own_data(self):
+        """Copy _data if it is a view shared with another instance
+
+        Indexing preloaded epochs with a slice returns an instance whose data
+        is a view of the original array. While they share memory, the data of
+        both instances are read-only. Methods that modify the data in place
+        must call this first so that changes do not propagate.
+        """
+        sharers = getattr(self, '_data_sharers', None)
+        if sharers is None:
+            return
+        sharers.remove(self)
+        self._data_sharers = None
+        if not sharers.alive():
+            # all other instances are gone, the memory is ours again
+            try:
+                self._data.flags.writeable = True
+                return
+            except ValueError:
+                pass
+        self._data = self._data.copy()
+
     def _get_data_from_disk(self, out=True, verbose=None):
         raise NotImplementedError('_get_data_from_disk() must be implemented '
                                   'in derived class.')
@@ -435,16 +460,104 @@ class _BaseEpochs(ProjMixin, ContainsMixin, PickDropChannelsMixin,
                     data += (e - data_mean) ** 2
                 data = np.sqrt(data / n_events)
 
+        if _do_std:
+            data /= np.sqrt(n_events)
+        return self._evoked_from_epoch_data(data, n_events, _do_std, picks,
+                                            self.name)
+
+    def average_by_condition(self, picks=None, return_stderr=False):
+        """Compute the average of the epochs of each condition in one pass
+
+        This is equivalent to calling ``epochs[cond].average()`` (and
+        ``epochs[cond].standard_error()``) for each condition ``cond`` in
+        ``epochs.event_id``, but when the data are not preloaded each
+        epoch is read only once. Running means and sums of squared
+        deviations are accumulated using Welford's algorithm.
+
+        Parameters
+        ----------
+        picks : array-like of int | None
+            If None only MEG and EEG channels are kept
+            otherwise the channels indices in picks are kept.
+        return_stderr : bool
+            If True, also return the standard error over the epochs of each
+            condition.
+
+        Returns
+        -------
+        evokeds : dict of Evoked
+            The averaged epochs of each condition, keyed by condition name.
+        stderrs : dict of Evoked
+            The standard errors of each condition, keyed by condition name.
+            Only returned if ``return_stderr`` is True.
+        """
+        conditions = sorted(self.event_id.keys())
+        n_conditions = len(conditions)
+        # several conditions may share an event id
+        cond_idx = dict()
+        for ci, c in enumerate(conditions):
+            cond_idx.setdefault(self.event_id[c], list()).append(ci)
+        n_channels = len(self.ch_names)
+        n_times = len(self.times)
+        n_events = np.zeros(n_conditions, int)
+        means = np.zeros((n_conditions, n_channels, n_times))
+        if return_stderr:
+            stds = np.zeros((n_conditions, n_channels, n_times))
+        if self.preload:
+            for ci, c in enumerate(conditions):
+                mask = self.events[:, 2] == self.event_id[c]
+                n_events[ci] = mask.sum()
+                if n_events[ci] > 0:
+                    means[ci] = np.mean(self._data[mask], axis=0)
+                    if return_stderr:
+                        stds[ci] = np.std(self._data[mask], axis=0)
+        else:
+            iter(self)
+            while True:
+                try:
+                    e, event_id = self.next(return_event_id=True)
+                except StopIteration:
+                    break
+                for ci in cond_idx.get(event_id, []):
+                    n_events[ci] += 1
+                    delta = e - means[ci]
+                    means[ci] += delta / n_events[ci]
+                    if return_stderr:  # sum of squared deviations for now
+                        stds[ci] += delta * (e - means[ci])
+            if return_stderr:
+                for ci in np.where(n_events > 0)[0]:
+                    stds[ci] = np.sqrt(stds[ci] / n_events[ci])
+
+        evokeds = dict()
+        for ci, c in enumerate(conditions):
+            if n_events[ci] == 0:
+                means[ci].fill(np.nan)
+            evokeds[c] = self._evoked_from_epoch_data(
+                means[ci], n_events[ci], False, picks, c)
+        if return_stderr:
+            stderrs = dict()
+            for ci, c in enumerate(conditions):
+                if n_events[ci] == 0:
+                    stds[ci].fill(np.nan)
+                else:
+                    stds[ci] /= np.sqrt(n_events[ci])
+                stderrs[c] = self._evoked_from_epoch_data(
+                    stds[ci], n_events[ci], True, picks, c)
+            return evokeds, stderrs
+        return evokeds
+
+    def _evoked_from_epoch_data(self, data, n_events, _do_std, picks,
+                                comment):
+        """Create an Evoked from averaged (or stderr) data"""
         if not _do_std:
             _aspect_kind = FIFF.FIFFV_ASPECT_AVERAGE
         else:
             _aspect_kind = FIFF.FIFFV_ASPECT_STD_ERR
-            data /= np.sqrt(n_events)
         kind = aspect_rev.get(str(_aspect_kind), 'Unknown')
 
         info = cp.deepcopy(self.info)
         evoked = EvokedArray(data, info, tmin=self.times[0],
-                             comment=self.name, nave=n_events, kind=kind,
+                             comment=comment, nave=n_events, kind=kind,
                              verbose=self.verbose)
         # XXX: above constructor doesn't recreate the times object precisely
         evoked.times = self.times.copy()
@@ -1099,7 +1212,7 @@ class Epochs(_BaseEpochs, ToDataFrameMixin):
         epochs = []
         # whenever requested, the first epoch is being projected.
         if self._projector is not None and proj is True:
-            epochs += [np.dot(self._projector, epoch_raw)]
+            epochs += [self._project(epoch_raw)]
         else:
             epochs += [epoch_raw]
 
@@ -1284,9 +1397,12 @@ class Epochs(_BaseEpochs, ToDataFrameMixin):
 
     def _key_match(self, key):
         """Helper function for event dict use"""
-        if key not in self.event_id:
-            raise KeyError('Event "%s" is not in Epochs.' % key)
-        return self.events[:, 2] == self.event_id[key]
+        if isinstance(key, string_types):
+            key = [key]
+        for k in key:
+            if k not in self.event_id:
+                raise KeyError('Event "%s" is not in Epochs.' % k)
+        return np.in1d(self.events[:, 2], [self.event_id[k] for k in key])
 
     def __getitem__(self, key):
         """Return an Epochs object with a subset of epochs
@@ -1300,22 +1416,13 @@ class Epochs(_BaseEpochs, ToDataFrameMixin):
             key = [key]
 
         if isinstance(key, (list, tuple)) and isinstance(key[0], string_types):
-            if any('/' in k_i for k_i in epochs.event_id.keys()):
-                if any(k_e not in epochs.event_id for k_e in key):
-                    # Select a given key if the requested set of
-                    # '/'-separated types are a subset of the types in that key
-                    key = [k for k in epochs.event_id.keys()
-                           if all(set(k_i.split('/')).issubset(k.split('/'))
-                                  for k_i in key)]
-                    if len(key) == 0:
-                        raise KeyError('Attempting selection of events via '
-                                       'multiple/partial matching, but no '
-                                       'event matches all criteria.')
-            select = np.any(np.atleast_2d([epochs._key_match(k)
-                                           for k in key]), axis=0)
+            key = _match_event_keys(epochs.event_id, key)
+            select = epochs._key_match(key)
             epochs.name = '+'.join(key)
         else:
             select = key if isinstance(key, slice) else np.atleast_1d(key)
+        # regular selections become slices so that _data is a view
+        select = _index_as_slice(select, len(epochs.events))
 
         key_selection = epochs.selection[select]
         for k in np.setdiff1d(epochs.selection, key_selection):
@@ -1324,6 +1431,21 @@ class Epochs(_BaseEpochs, ToDataFrameMixin):
         epochs.events = np.atleast_2d(epochs.events[select])
         if epochs.preload:
             epochs._data = epochs._data[select]
+            if isinstance(select, slice):
+                # both instances now share memory, copy before writing (see
+                # _own_data); the arrays are read-only to enforce this. The
+                # parent gets a new view so that arrays passed in by the user
+                # (e.g. to EpochsArray) stay writeable.
+                if self._data.flags.writeable:
+                    self._data = self._data.view()
+                    self._data.flags.writeable = False
+                epochs._data.flags.writeable = False
+                sharers = getattr(self, '_data_sharers', None)
+                if sharers is None:
+                    sharers = self._data_sharers = _DataSharers()
+                    sharers.add(self)
+                sharers.add(epochs)
+                epochs._data_sharers = sharers
 
         # update event id to reflect new content of epochs
         epochs.event_id = dict((k, v) for k, v in epochs.event_id.items()
@@ -1424,6 +1546,7 @@ class Epochs(_BaseEpochs, ToDataFrameMixin):
         new = cp.deepcopy(self)
         self.raw = raw
         new.raw = raw
+        new._data_sharers = None
 
         return new
 
@@ -1560,10 +1683,7 @@ class Epochs(_BaseEpochs, ToDataFrameMixin):
         for eq in event_ids:
             eq = np.atleast_1d(eq)
             # eq is now a list of types
-            key_match = np.zeros(epochs.events.shape[0])
-            for key in eq:
-                key_match = np.logical_or(key_match, epochs._key_match(key))
-            eq_inds.append(np.where(key_match)[0])
+            eq_inds.append(np.where(epochs._key_match(eq))[0])
 
         event_times = [epochs.events[e, 0] for e in eq_inds]
         indices = _get_drop_indices(event_times, method)
@@ -1703,6 +1823,55 @@ class EpochsArray(Epochs):
             rescale(self._data, self.times, baseline, mode='mean', copy=False)
 
 
+class _DataSharers(object):
+    """Weak references to the epochs instances sharing a data array"""
+    def __init__(self):
+        self._refs = []
+
+    def add(self, inst):
+        self._refs.append(weakref.ref(inst))
+
+    def remove(self, inst):
+        self._refs = [r for r in self._refs
+                      if r() is not None and r() is not inst]
+
+    def alive(self):
+        return [r() for r in self._refs if r() is not None]
+
+    def __getstate__(self):
+        # weak references cannot be pickled, copies own their data anyway
+        return {'_refs': []}
+
+
+def _index_as_slice(select, n):
+    """Convert an index selection to an equivalent slice if possible
+
+    Integer and boolean selections that are evenly spaced and increasing
+    are returned as a slice, so that indexing an array returns a view
+    instead of a copy. Other selections are returned unchanged.
+    """
+    if isinstance(select, slice):
+        return select
+    idx = np.asarray(select)
+    if idx.ndim != 1 or len(idx) == 0:
+        return select
+    if idx.dtype == np.bool:
+        if len(idx) != n:
+            return select
+        idx = np.where(idx)[0]
+        if len(idx) == 0:
+            return select
+    elif idx.dtype.kind not in 'iu':
+        return select
+    idx = np.where(idx < 0, idx + n, idx)
+    if idx.min() < 0 or idx.max() >= n:
+        return select  # let numpy raise the IndexError
+    step = idx[1] - idx[0] if len(idx) > 1 else 1
+    if step <= 0 or np.any(np.diff(idx) != step):
+        return select
+    return slice(int(idx[0]), int(idx[-1]) + 1, int(step))
+
+
 def combine_event_ids(epochs, old_event_ids, new_event_id, copy=True):
     """Collapse event_ids from an epochs instance into a new event_id
 
@@ -1818,26 +1987,64 @@ def _get_drop_indices(event_times, method):
 
 
 def _minimize_time_diff(t_shorter, t_longer):
-    """Find a boolean mask to minimize timing differences"""
-    keep = np.ones((len(t_longer)), dtype=bool)
-    scores = np.ones((len(t_longer)))
-    for iter in range(len(t_longer) - len(t_shorter)):
-        scores.fill(np.inf)
-        # Check every possible removal to see if it minimizes
-        for idx in np.where(keep)[0]:
-            keep[idx] = False
-            scores[idx] = _area_between_times(t_shorter, t_longer[keep])
-            keep[idx] = True
-        keep[np.argmin(scores)] = False
-    return keep
-
-
-def _area_between_times(t1, t2):
-    """Quantify the difference between two timing sets"""
-    x1 = list(range(len(t1)))
-    x2 = list(range(len(t2)))
-    xs = np.concatenate((x1, x2))
-    return np.sum(np.abs(np.interp(xs, x1, t1) - np.interp(xs, x2, t2)))
+    """Find a boolean mask to minimize timing differences
+
+    Each event of t_shorter is matched to a distinct event of t_longer,
+    the closest pairs first, and the matched events of t_longer are kept.
+    The candidate pairs are kept in a heap and the nearest free events
+    found with path-compressed pointers, so this is O(n log(n)).
+    """
+    keep = np.zeros(len(t_longer), dtype=bool)
+    if len(t_shorter) == len(t_longer):
+        keep.fill(True)
+        return keep
+    order = np.argsort(t_longer, kind='mergesort')
+    times = np.asarray(t_longer, dtype=np.float64)[order]
+    t_shorter = np.asarray(t_shorter, dtype=np.float64)
+    n_times = len(times)
+    # nearest free index at or after (next_free[i]) and at or before
+    # (prev_free[i + 1]) index i, n_times and -1 mean none
+    next_free = np.arange(n_times + 1)
+    prev_free = np.arange(-1, n_times)
+
+    def _find(pointers, idx, offset):
+        root = idx
+        while pointers[root + offset] != root:
+            root = pointers[root + offset]
+        while pointers[idx + offset] != root:  # path compression
+            pointers[idx + offset], idx = root, pointers[idx + offset]
+        return root
+
+    heap = list()
+    right = np.searchsorted(times, t_shorter)
+    for ii, (t, jj) in enumerate(zip(t_shorter, right)):
+        if jj < n_times:
+            heap.append((times[jj] - t, ii, jj, 1))
+        if jj > 0:
+            heap.append((t - times[jj - 1], ii, jj - 1, -1))
+    heapq.heapify(heap)
+    matched = np.zeros(len(t_shorter), dtype=bool)
+    n_matched = 0
+    while n_matched < len(t_shorter):
+        _, ii, jj, direction = heapq.heappop(heap)
+        if matched[ii]:
+            continue
+        if keep[jj]:  # taken, try the next free event in this direction
+            if direction > 0:
+                jj = _find(next_free, jj, 0)
+            else:
+                jj = _find(prev_free, jj, 1)
+            if 0 <= jj < n_times:
+                heapq.heappush(heap, (abs(times[jj] - t_shorter[ii]), ii,
+                                      jj, direction))
+            continue
+        keep[jj] = matched[ii] = True
+        n_matched += 1
+        next_free[jj] = jj + 1
+        prev_free[jj + 1] = jj - 1
+    mask = np.empty(len(t_longer), dtype=bool)
+    mask[order] = keep
+    return mask
 
 
 @verbose
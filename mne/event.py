@@ -12,6 +12,7 @@ import numpy as np
 from os.path import splitext
 
 from .utils import check_fname, logger, verbose, _get_stim_channel
+from .externals.six import string_types
 from .io.constants import FIFF
 from .io.tree import dir_tree_find
 from .io.tag import read_tag
@@ -48,20 +49,16 @@ def pick_events(events, include=None, exclude=None, step=False):
     if include is not None:
         if not isinstance(include, list):
             include = [include]
-        mask = np.zeros(len(events), dtype=np.bool)
-        for e in include:
-            mask = np.logical_or(mask, events[:, 2] == e)
-            if step:
-                mask = np.logical_or(mask, events[:, 1] == e)
+        mask = np.in1d(events[:, 2], include)
+        if step:
+            mask |= np.in1d(events[:, 1], include)
         events = events[mask]
     elif exclude is not None:
         if not isinstance(exclude, list):
             exclude = [exclude]
-        mask = np.ones(len(events), dtype=np.bool)
-        for e in exclude:
-            mask = np.logical_and(mask, events[:, 2] != e)
-            if step:
-                mask = np.logical_and(mask, events[:, 1] != e)
+        mask = ~np.in1d(events[:, 2], exclude)
+        if step:
+            mask &= ~np.in1d(events[:, 1], exclude)
         events = events[mask]
     else:
         events = np.copy(events)
@@ -117,24 +114,29 @@ def define_target_events(events, reference_id, target_id, sfreq, tmin, tmax,
     imin = int(tmin * sfreq)
     imax = int(tmax * sfreq)
 
-    new_events = []
-    lag = []
-    for event in events.copy().astype('f8'):
-        if event[2] == reference_id:
-            lower = event[0] + imin
-            upper = event[0] + imax
-            res = events[(events[:, 0] > lower) &
-                         (events[:, 0] < upper) & (events[:, 2] == target_id)]
-            if res.any():
-                lag += [event[0] - res[0][0]]
-                event[2] = new_id
-                new_events += [event]
-            elif fill_na is not None:
-                event[2] = fill_na
-                new_events += [event]
-                lag += [fill_na]
-
-    new_events = np.array(new_events)
+    # for each reference event, find the first target event strictly
+    # within the window using the targets sorted by sample
+    events_index = Events(events)
+    ref_rows = events_index.select(reference_id)
+    target_rows, target_samples = events_index._get_id_rows(target_id)
+    lower = events[ref_rows, 0] + imin
+    upper = events[ref_rows, 0] + imax
+    lo = np.searchsorted(target_samples, lower, side='right')
+    hi = np.searchsorted(target_samples, upper, side='left')
+    found = hi > lo
+    if len(target_rows) > 0:
+        first = np.minimum.reduceat(np.append(target_rows, len(events)),
+                                    np.c_[lo, hi].ravel())[::2]
+    else:
+        first = np.zeros(len(ref_rows), int)
+    first[~found] = 0
+    keep = found if fill_na is None else np.ones(len(ref_rows), bool)
+
+    new_events = events[ref_rows[keep]].astype('f8')
+    new_events[:, 2] = np.where(found[keep], new_id,
+                                fill_na if fill_na is not None else 0)
+    lag = np.where(found, events[ref_rows, 0] - events[first, 0],
+                   fill_na if fill_na is not None else 0)[keep]
 
     lag = np.abs(lag, dtype='f8')
     if lag.any():
@@ -145,6 +147,142 @@ def define_target_events(events, reference_id, target_id, sfreq, tmin, tmax,
     return new_events if new_events.any() else np.array([]), lag
 
 
+class Events(object):
+    """Index of events for fast queries
+
+    The sample indices of the events, overall and for each event id, are
+    kept sorted so that time range and id queries are answered with
+    binary searches instead of scanning the full events array.
+
+    Parameters
+    ----------
+    events : array, shape (n_events, 3)
+        The events, as returned by mne.find_events.
+    event_id : dict | None
+        The mapping from condition names to event ids, used by ``match``.
+        Names can be hierarchical, e.g. 'auditory/left'.
+
+    Attributes
+    ----------
+    events : array, shape (n_events, 3)
+        The events.
+    event_id : dict
+        The mapping from condition names to event ids.
+
+    Notes
+    -----
+    The indexed events must not be modified in place.
+
+    .. versionadded:: 0.10
+    """
+    def __init__(self, events, event_id=None):
+        events = np.asarray(events)
+        if events.ndim != 2 or events.shape[1] != 3:
+            raise ValueError('events must be an array of shape (n_events, 3)'
+                             ', got %s' % (events.shape,))
+        self.events = events
+        self.event_id = dict() if event_id is None else dict(event_id)
+        # rows sorted by sample, and by id then sample (stable sorts keep
+        # rows with equal keys in their original order)
+        self._rows = np.argsort(events[:, 0], kind='mergesort')
+        self._samples = events[self._rows, 0]
+        id_rows = self._rows[np.argsort(events[self._rows, 2],
+                                        kind='mergesort')]
+        ids, starts = np.unique(events[id_rows, 2], return_index=True)
+        self._id_rows = dict(zip(ids.tolist(), np.split(id_rows, starts[1:])))
+
+    def __len__(self):
+        return len(self.events)
+
+    def __repr__(self):
+        s = 'n_events : %d, ids : %s' % (len(self), sorted(self._id_rows))
+        return '<Events  |  %s>' % s
+
+    def _get_id_rows(self, ids):
+        """Get the rows of some event ids and their samples, by sample"""
+        rows = [self._id_rows.get(int(i), np.zeros(0, int))
+                for i in np.atleast_1d(ids)]
+        if len(rows) == 1:
+            rows = rows[0]
+        else:
+            rows = np.concatenate(rows)
+            rows = rows[np.argsort(self.events[rows, 0], kind='mergesort')]
+        return rows, self.events[rows, 0]
+
+    def select(self, ids=None, start=None, stop=None):
+        """Select events by id and/or sample range
+
+        Parameters
+        ----------
+        ids : int | list of int | None
+            The event ids to select. If None, all ids are selected.
+        start : int | None
+            The first sample of the range. If None, there is no lower bound.
+        stop : int | None
+            The sample ending the range (exclusive). If None, there is no
+            upper bound.
+
+        Returns
+        -------
+        idx : array of int
+            The indices of the selected events (rows of ``events``), in
+            increasing order.
+        """
+        if ids is None:
+            rows, samples = self._rows, self._samples
+        else:
+            rows, samples = self._get_id_rows(ids)
+        lo = 0 if start is None else np.searchsorted(samples, start, 'left')
+        hi = (len(rows) if stop is None else
+              np.searchsorted(samples, stop, 'left'))
+        return np.sort(rows[lo:hi])
+
+    def match(self, keys, start=None, stop=None):
+        """Select events by (hierarchical) condition names
+
+        Parameters
+        ----------
+        keys : str | list of str
+            The condition names. If event_id contains hierarchical names
+            separated by '/', e.g. 'auditory/left', a partial name such as
+            'left' matches all the names that contain its parts.
+        start : int | None
+            The first sample of the range. If None, there is no lower bound.
+        stop : int | None
+            The sample ending the range (exclusive). If None, there is no
+            upper bound.
+
+        Returns
+        -------
+        idx : array of int
+            The indices of the selected events (rows of ``events``), in
+            increasing order.
+        """
+        keys = _match_event_keys(self.event_id, keys)
+        return self.select([self.event_id[k] for k in keys], start, stop)
+
+
+def _match_event_keys(event_id, keys):
+    """Helper to get the names in event_id matched by (partial) keys"""
+    if isinstance(keys, string_types):
+        keys = [keys]
+    if any('/' in k_e for k_e in event_id.keys()):
+        if any(k_e not in event_id for k_e in keys):
+            # Select a given key if the requested set of
+            # '/'-separated types are a subset of the types in that key
+            keys = [k for k in event_id.keys()
+                    if all(set(k_i.split('/')).issubset(k.split('/'))
+                           for k_i in keys)]
+            if len(keys) == 0:
+                raise KeyError('Attempting selection of events via '
+                               'multiple/partial matching, but no '
+                               'event matches all criteria.')
+    for key in keys:
+        if key not in event_id:
+            raise KeyError('Event "%s" is not in Epochs.' % key)
+    return list(keys)
+
+
 def _read_events_fif(fid, tree):
     """Aux function"""
     #   Find the desired block
@@ -297,16 +435,64 @@ def write_events(filename, event_list):
 
 
 def _find_stim_steps(data, first_samp, pad_start=None, pad_stop=None, merge=0):
+    return _finish_stim_steps(_stim_steps(data), data.shape[1], first_samp,
+                              pad_start=pad_start, pad_stop=pad_stop,
+                              merge=merge)
+
+
+def _stim_steps(data):
+    """Aux function to get the steps of stim channel data
+
+    The first column contains the index of the first sample with the new
+    value, relative to the first sample of data.
+    """
     changed = np.diff(data, axis=1) != 0
     idx = np.where(np.all(changed, axis=0))[0]
-    if len(idx) == 0:
-        return np.empty((0, 3), dtype='int32')
+    return np.c_[idx + 1, data[0, idx], data[0, idx + 1]]
+
+
+# Number of samples of the stim channels read at once
+_stim_chunk_size = 1000000
+
 
-    pre_step = data[0, idx]
-    idx += 1
-    post_step = data[0, idx]
-    idx += first_samp
-    steps = np.c_[idx, pre_step, post_step]
+def _read_stim_steps(raw, picks):
+    """Aux function to get the steps of stim channels chunk by chunk
+
+    Only one chunk of the stim channels is in memory at a time, the last
+    sample of the previous chunk is carried over to detect the steps that
+    fall on chunk boundaries.
+    """
+    steps = list()
+    negative = False
+    last = None
+    for start in range(0, raw.n_times, _stim_chunk_size):
+        stop = min(start + _stim_chunk_size, raw.n_times)
+        data = raw[picks, start:stop][0]
+        if np.any(data < 0):
+            negative = True
+            data = np.abs(data)  # make sure trig channel is positive
+        data = data.astype(np.int)
+        if last is None:
+            this_steps = _stim_steps(data)
+        else:
+            this_steps = _stim_steps(np.c_[last, data])
+            this_steps[:, 0] += start - 1
+        steps.append(this_steps)
+        last = data[:, -1:]
+    if negative:
+        logger.warning('Trigger channel contains negative values. '
+                       'Taking absolute value.')
+    steps = (np.concatenate(steps) if len(steps) > 0 else
+             np.empty((0, 3), dtype=np.int))
+    return steps
+
+
+def _finish_stim_steps(steps, n_times, first_samp, pad_start=None,
+                       pad_stop=None, merge=0):
+    """Aux function to offset, pad and merge stim channel steps"""
+    if len(steps) == 0:
+        return np.empty((0, 3), dtype='int32')
+    steps[:, 0] += first_samp
 
     if pad_start is not None:
         v = steps[0, 1]
@@ -316,7 +502,7 @@ def _find_stim_steps(data, first_samp, pad_start=None, pad_stop=None, merge=0):
     if pad_stop is not None:
         v = steps[-1, 2]
         if v != pad_stop:
-            last_idx = len(data[0]) + first_samp
+            last_idx = n_times + first_samp
             steps = np.append(steps, [[last_idx, v, pad_stop]], axis=0)
 
     if merge != 0:
@@ -386,21 +572,30 @@ def find_stim_steps(raw, pad_start=None, pad_stop=None, merge=0,
     picks = pick_channels(raw.info['ch_names'], include=stim_channel)
     if len(picks) == 0:
         raise ValueError('No stim channel found to extract event triggers.')
-    data, _ = raw[picks, :]
+    steps = _read_stim_steps(raw, picks)
+    return _finish_stim_steps(steps, raw.n_times, raw.first_samp,
+                              pad_start=pad_start, pad_stop=pad_stop,
+                              merge=merge)
+
+
+@verbose
+def _find_events(data, first_samp, verbose=None, output='onset',
+                 consecutive='increasing', min_samples=0, mask=0):
+    """Helper function for find events"""
     if np.any(data < 0):
         logger.warning('Trigger channel contains negative values. '
                        'Taking absolute value.')
         data = np.abs(data)  # make sure trig channel is positive
     data = data.astype(np.int)
 
-    return _find_stim_steps(data, raw.first_samp, pad_start=pad_start,
-                            pad_stop=pad_stop, merge=merge)
+    return _events_from_steps(_stim_steps(data), data.shape[1], first_samp,
+                              output=output, consecutive=consecutive,
+                              min_samples=min_samples, mask=mask)
 
 
-@verbose
-def _find_events(data, first_samp, verbose=None, output='onset',
-                 consecutive='increasing', min_samples=0, mask=0):
-    """Helper function for find events"""
+def _events_from_steps(steps, n_times, first_samp, output='onset',
+                       consecutive='increasing', min_samples=0, mask=0):
+    """Helper function to find events from the steps of stim channels"""
     if min_samples > 0:
         merge = int(min_samples // 1)
         if merge == min_samples:
@@ -408,13 +603,8 @@ def _find_events(data, first_samp, verbose=None, output='onset',
     else:
         merge = 0
 
-    if np.any(data < 0):
-        logger.warning('Trigger channel contains negative values. '
-                       'Taking absolute value.')
-        data = np.abs(data)  # make sure trig channel is positive
-    data = data.astype(np.int)
-
-    events = _find_stim_steps(data, first_samp, pad_stop=0, merge=merge)
+    events = _finish_stim_steps(steps, n_times, first_samp, pad_stop=0,
+                                merge=merge)
     events = _mask_trigs(events, mask)
 
     # Determine event onsets and offsets
@@ -584,11 +774,11 @@ def find_events(raw, stim_channel=None, verbose=None, output='onset',
     pick = pick_channels(raw.info['ch_names'], include=stim_channel)
     if len(pick) == 0:
         raise ValueError('No stim channel found to extract event triggers.')
-    data, _ = raw[pick, :]
-
-    events = _find_events(data, raw.first_samp, verbose=verbose, output=output,
-                          consecutive=consecutive, min_samples=min_samples,
-                          mask=mask)
+    # scan the stim channels chunk by chunk
+    steps = _read_stim_steps(raw, pick)
+    events = _events_from_steps(steps, raw.n_times, raw.first_samp,
+                                output=output, consecutive=consecutive,
+                                min_samples=min_samples, mask=mask)
 
     # add safety check for spurious events (for ex. from neuromag syst.) by
     # checking the number of low sample events
@@ -640,12 +830,8 @@ def merge_events(events, ids, new_id, replace_events=True):
         The new events
     """
     events_out = events.copy()
-    where = np.empty(events.shape[0], dtype=bool)
     for col in [1, 2]:
-        where.fill(False)
-        for i in ids:
-            where = (events[:, col] == i)
-            events_out[where, col] = new_id
+        events_out[np.in1d(events[:, col], ids), col] = new_id
     if not replace_events:
         events_out = np.concatenate((events_out, events), axis=0)
         events_out = events_out[np.argsort(events_out[:, 0])]
@@ -673,8 +859,7 @@ def shift_time_events(events, ids, tshift, sfreq):
         The new events.
     """
     events = events.copy()
-    for ii in ids:
-        events[events[:, 2] == ii, 0] += int(tshift * sfreq)
+    events[np.in1d(events[:, 2], ids), 0] += int(tshift * sfreq)
     return events
 
 
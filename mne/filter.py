@@ -1457,6 +1457,7 @@ class FilterMixin(object):
         elif isinstance(self, _BaseEpochs):
             if not self.preload:
                 raise RuntimeError('data must be preloaded to filter')
+            self._own_data()
             data = self._data
             axis = 2
 
@@ -14,6 +14,7 @@
 #        Lewis, 1999. Generalized discussion of forward solutions.
 
 import numpy as np
+from scipy import sparse
 from copy import deepcopy
 
 from ..surface import (fast_cross_3d, _find_nearest_tri_pt, _get_tri_supp_geom,
@@ -29,6 +30,11 @@ from ..io.pick import pick_types
 # #############################################################################
 # COIL SPECIFICATION AND FIELD COMPUTATION MATRIX
 
+# Number of (triangle, integration point) pairs handled at once when computing
+# the linear field coefficients, which bounds the temporary memory use
+_lin_field_block_size = 100000
+
+
 def _dup_coil_set(coils, coord_frame, t):
     """Make a duplicate."""
     if t is not None and coord_frame != t['from']:
@@ -125,31 +131,44 @@ def _do_lin_field_coeff(bem_rr, tris, tn, ta, rmags, cosmags, ws, n_int):
     coeff : ndarray, shape (n_MEG_sensors, n_BEM_vertices)
         Linear coefficients with effect of each BEM vertex on each sensor (?)
     """
-    coeff = np.zeros((len(n_int), len(bem_rr)))
-    bins = np.repeat(np.arange(len(n_int)), n_int)
-    for tri, tri_nn, tri_area in zip(tris, tn, ta):
-        # Accumulate the coefficients for each triangle node and add to the
-        # corresponding coefficient matrix
-        tri_rr = bem_rr[tri]
-
-        # The following is equivalent to:
-        # for j, coil in enumerate(coils['coils']):
-        #     x = func(coil['rmag'], coil['cosmag'],
-        #              tri_rr, tri_nn, tri_area)
-        #     res = np.sum(coil['w'][np.newaxis, :] * x, axis=1)
-        #     coeff[j][tri + off] += mult * res
-
-        # Simple version (bem_lin_field_coeffs_simple)
-        zz = []
-        for trr in tri_rr:
-            diff = rmags - trr
-            dl = np.sum(diff * diff, axis=1)
-            c = fast_cross_3d(diff, tri_nn[np.newaxis, :])
-            x = tri_area * np.sum(c * cosmags, axis=1) / \
-                (3.0 * dl * np.sqrt(dl))
-            zz += [np.bincount(bins, weights=x * ws, minlength=len(n_int))]
-        coeff[:, tri] += np.array(zz).T
-    return coeff
+    coeff = np.zeros((len(bem_rr), len(n_int)))
+    # Integration points are summed per sensor with reduceat, which needs
+    # the start offsets of the sensors that have integration points
+    offsets = np.cumsum(np.r_[0, n_int[:-1]])
+    use = n_int > 0
+    offsets = offsets[use]
+    rx, ry, rz = rmags.T
+    cx, cy, cz = cosmags.T
+    n_block = max(int(_lin_field_block_size // max(len(rmags), 1)), 1)
+    for start in range(0, len(tris), n_block):
+        sl = slice(start, start + n_block)
+        b_tris = tris[sl]
+        # The triple product (diff x tri_nn) . cosmag is equal to
+        # diff . (tri_nn x cosmag), which is shared by all three vertices,
+        # and the area and integration weights can be folded into it
+        w = ta[sl][:, np.newaxis] * ws
+        nx, ny, nz = [n[:, np.newaxis] for n in tn[sl].T]
+        ncx = (ny * cz - nz * cy) * w
+        ncy = (nz * cx - nx * cz) * w
+        ncz = (nx * cy - ny * cx) * w
+        for k in range(3):
+            vx, vy, vz = [v[:, np.newaxis] for v in bem_rr[b_tris[:, k]].T]
+            dx, dy, dz = rx - vx, ry - vy, rz - vz
+            dl = dx * dx + dy * dy + dz * dz
+            x = dx * ncx + dy * ncy + dz * ncz
+            x /= 3.0 * dl * np.sqrt(dl)
+            x = np.add.reduceat(x, offsets, axis=1)
+            # Scatter-add the per-triangle results into the vertex rows
+            _add_rows(coeff, b_tris[:, k], x, use)
+    return coeff.T
+
+
+def _add_rows(out, rows, vals, cols):
+    """Add vals to out[rows][:, cols], accumulating repeated row indices"""
+    order = np.argsort(rows, kind='mergesort')
+    rows, vals = rows[order], vals[order]
+    uniq, first = np.unique(rows, return_index=True)
+    out[uniq[:, np.newaxis], cols] += np.add.reduceat(vals, first, axis=0)
 
 
 def _concatenate_coils(coils):
@@ -208,7 +227,7 @@ def _bem_specify_coils(bem, coils, coord_frame, mults, n_jobs):
     return sol
 
 
-def _bem_specify_els(bem, els, mults):
+def _bem_specify_els(bem, els, mults, n_jobs=1):
     """Set up for computing the solution at a set of EEG electrodes.
 
     Parameters
@@ -219,39 +238,56 @@ def _bem_specify_els(bem, els, mults):
         List of EEG sensor information dicts
     mults: ndarray, shape (1, n_BEM_vertices)
         Multiplier for every vertex in BEM
+    n_jobs : int
+        Number of jobs to run in parallel
 
     Returns
     -------
     sol : ndarray, shape (n_EEG_sensors, n_BEM_vertices)
         EEG solution
     """
-    sol = np.zeros((len(els), bem['solution'].shape[1]))
     scalp = bem['surfs'][0]
     # Get supplementary geometry information for tris and rr
     scalp['geom'] = _get_tri_supp_geom(scalp['tris'], scalp['rr'])
-    inds = np.arange(len(scalp['tris']))  # Inds of every BEM vertex
-
-    # Iterate over all electrodes
-    # In principle this could be parallelized, but pickling overhead is huge
-    # (makes it slower than non-parallel)
-    for k, el in enumerate(els):
-        # Get electrode and reference position in head coords
-        el_r = apply_trans(bem['head_mri_t']['trans'], el['rmag'])
-        # Iterate over all integration points
-        for elw, r in zip(el['w'], el_r):
-            # Get index of closest tri on scalp BEM to electrode position
-            best = _find_nearest_tri_pt(inds, r, scalp['geom'], True)[2]
-            # Calculate a linear interpolation between the vertex values
-            tri = scalp['tris'][best]  # Get 3 vertex indices of closest tri
-            # Get coords of pt projected onto closest triangle
-            x, y, z = _triangle_coords(r, scalp['geom'], best)
-            w = elw * np.array([(1.0 - x - y), x, y])
-            amt = np.dot(w, bem['solution'][tri])
-            sol[k] += amt
+
+    # Get all electrode integration points in MRI coords
+    rrs = np.concatenate([el['rmag'] for el in els])
+    rrs = apply_trans(bem['head_mri_t']['trans'], rrs)
+    ws = np.concatenate([el['w'] for el in els])
+    rows = np.repeat(np.arange(len(els)), [len(el['w']) for el in els])
+
+    # Find the closest scalp triangle for each point. The geometry is only
+    # pickled once per job, rather than once per electrode.
+    parallel, p_fun, n_jobs = parallel_func(_els_tri_weights, n_jobs)
+    out = parallel(p_fun(r, scalp['geom'])
+                   for r in np.array_split(rrs, n_jobs))
+    tris = scalp['tris'][np.concatenate([o[0] for o in out])]
+    w = np.concatenate([o[1] for o in out]) * ws[:, np.newaxis]
+
+    # Linearly interpolate between the vertex values of the solution: a sparse
+    # (n_EEG_sensors, n_scalp_vertices) interpolation matrix times the
+    # solution rows of the scalp surface
+    interp = sparse.coo_matrix((w.ravel(), (np.repeat(rows, 3), tris.ravel())),
+                               shape=(len(els), len(scalp['rr']))).tocsr()
+    sol = interp * bem['solution'][:len(scalp['rr'])]
     sol *= mults
     return sol
 
 
+def _els_tri_weights(rrs, geom):
+    """Get the closest triangles and interpolation weights for points"""
+    inds = np.arange(len(geom['r1']))  # Inds of every BEM triangle
+    best = np.empty(len(rrs), int)
+    w = np.empty((len(rrs), 3))
+    for ri, r in enumerate(rrs):
+        # Get index of closest tri on scalp BEM to electrode position
+        best[ri] = _find_nearest_tri_pt(inds, r, geom, True)[2]
+        # Get coords of pt projected onto closest triangle
+        x, y, z = _triangle_coords(r, geom, best[ri])
+        w[ri] = [1.0 - x - y, x, y]
+    return best, w
+
+
 # #############################################################################
 # COMPENSATION
 
@@ -284,6 +320,14 @@ def _make_ctf_comp_coils(info, coils):
 
 _MAG_FACTOR = 1e-7  # μ_0 / (4π)
 
+# Number of dipoles whose fields are computed at once in
+# _compute_forwards_meeg
+_fwd_block_size = 1000
+
+# Number of (dipole, BEM vertex) pairs whose infinite-medium potentials are
+# held in memory at once in _do_inf_pots
+_inf_pots_block_size = 1000000
+
 # def _bem_inf_pot(rd, Q, rp):
 #     """The infinite medium potential in one direction. See Eq. (8) in
 #     Mosher, 1999"""
@@ -311,16 +355,28 @@ def _bem_inf_pots(mri_rr, bem_rr, mri_Q=None):
     ndarray : shape(n_dipole_vertices, 3, n_BEM_vertices)
     """
     # NOTE: the (μ_0 / (4π) factor has been moved to _prep_field_communication
-    # Get position difference vector between BEM vertex and dipole
-    diff = bem_rr.T[np.newaxis, :, :] - mri_rr[:, :, np.newaxis]
-    diff_norm = np.sum(diff * diff, axis=1)
+    # Get position difference vector between BEM vertex and dipole,
+    # one component at a time to keep the temporaries 2D and contiguous
+    diff = [bem_rr[np.newaxis, :, k] - mri_rr[:, k, np.newaxis]
+            for k in range(3)]
+    diff_norm = diff[0] * diff[0]
+    diff_norm += diff[1] * diff[1]
+    diff_norm += diff[2] * diff[2]
     diff_norm *= np.sqrt(diff_norm)  # Position difference magnitude cubed
     diff_norm[diff_norm == 0] = 1  # avoid nans
+    v0 = np.empty((len(mri_rr), 3, len(bem_rr)))
     if mri_Q is None:  # save time when mri_Q=np.eye(3) (e.g., MEG sensors)
-        return diff / diff_norm[:, np.newaxis, :]
-    else:  # get components in each direction (e.g., EEG sensors)
-        return np.einsum('ijk,mj->imk', diff, mri_Q) / diff_norm[:,
-                                                                 np.newaxis, :]
+        for m in range(3):
+            np.divide(diff[m], diff_norm, out=v0[:, m])
+        return v0
+    # get components in each direction (e.g., EEG sensors)
+    for k in range(3):
+        diff[k] /= diff_norm
+    for m in range(3):
+        np.multiply(mri_Q[m, 0], diff[0], out=v0[:, m])
+        v0[:, m] += mri_Q[m, 1] * diff[1]
+        v0[:, m] += mri_Q[m, 2] * diff[2]
+    return v0
 
 
 # This function has been refactored to process all points simultaneously
@@ -411,11 +467,15 @@ def _bem_pot_or_field(rr, mri_rr, mri_Q, coils, solution, bem_rr, n_jobs,
     # reduce memory by chunking within _do_inf_pots and parallelize, too:
     parallel, p_fun, _ = parallel_func(_do_inf_pots, n_jobs)
     nas = np.array_split
-    B = np.sum(parallel(p_fun(mri_rr, sr.copy(), mri_Q, sol.copy())
-                        for sr, sol in zip(nas(bem_rr, n_jobs),
-                                           nas(solution.T, n_jobs))), axis=0)
-    # The copy()s above should make it so the whole objects don't need to be
+    Bs = parallel(p_fun(mri_rr, sr.copy(), mri_Q, np.ascontiguousarray(sol))
+                  for sr, sol in zip(nas(bem_rr, n_jobs),
+                                     nas(solution.T, n_jobs)))
+    # The copies above should make it so the whole objects don't need to be
     # pickled...
+    B = Bs[0]
+    for this_B in Bs[1:]:
+        B += this_B
+    del Bs
 
     # Only MEG coils are sensitive to the primary current distribution.
     if coil_type == 'meg':
@@ -481,14 +541,16 @@ def _do_inf_pots(mri_rr, bem_rr, mri_Q, sol):
     # v0s.shape = (len(rr) * 3, v0s.shape[2])
     # B = np.dot(v0s, sol)
 
-    # We chunk the source mri_rr's in order to save memory
-    bounds = np.r_[np.arange(0, len(mri_rr), 1000), len(mri_rr)]
+    # We chunk the source mri_rr's in order to save memory, and multiply each
+    # chunk by the solution straight into the output
+    n_block = max(_inf_pots_block_size // max(len(bem_rr), 1), 1)
     B = np.empty((len(mri_rr) * 3, sol.shape[1]))
-    for bi in range(len(bounds) - 1):
+    for start in range(0, len(mri_rr), n_block):
+        stop = min(start + n_block, len(mri_rr))
         # v0 in Hamalainen et al., 1989 == v_inf in Mosher, et al., 1999
-        v0s = _bem_inf_pots(mri_rr[bounds[bi]:bounds[bi + 1]], bem_rr, mri_Q)
+        v0s = _bem_inf_pots(mri_rr[start:stop], bem_rr, mri_Q)
         v0s.shape = (v0s.shape[0] * 3, v0s.shape[2])
-        B[3 * bounds[bi]:3 * bounds[bi + 1]] = np.dot(v0s, sol)
+        np.dot(v0s, sol, out=B[3 * start:3 * stop])
     return B
 
 
@@ -728,7 +790,7 @@ def _prep_field_computation(rr, bem, fwd_data, n_jobs, verbose=None):
                                                        mults, n_jobs)
                 else:
                     # Compute solution for EEG sensor
-                    solution = _bem_specify_els(bem, coils, mults)
+                    solution = _bem_specify_els(bem, coils, mults, n_jobs)
             else:
                 solution = bem
                 if coil_type == 'eeg':
@@ -755,7 +817,7 @@ def _prep_field_computation(rr, bem, fwd_data, n_jobs, verbose=None):
 
 
 @verbose
-def _compute_forwards_meeg(rr, fd, n_jobs, verbose=None):
+def _compute_forwards_meeg(rr, fd, n_jobs, outs=None, verbose=None):
     """Compute MEG and EEG forward solutions for all sensor types.
 
     Parameters
@@ -766,6 +828,10 @@ def _compute_forwards_meeg(rr, fd, n_jobs, verbose=None):
         Dict containing forward data after update in _prep_field_computation
     n_jobs : int
         Number of jobs to run in parallel
+    outs : list of ndarray | None
+        Preallocated arrays (e.g., memory-mapped) to write the solution for
+        each sensor type into, each with shape (3 * n_dipoles, n_sensors).
+        If None, new arrays are allocated.
     verbose : bool, str, int, or None
         If not None, override default verbose level (see mne.verbose)
 
@@ -776,7 +842,6 @@ def _compute_forwards_meeg(rr, fd, n_jobs, verbose=None):
         n_sensors depends on which channel types are requested (MEG and/or EEG)
     """
 
-    n_jobs = max(min(n_jobs, len(rr)), 1)
     Bs = list()
     # The dipole location and orientation must be transformed to mri coords
     mri_rr = None
@@ -785,36 +850,53 @@ def _compute_forwards_meeg(rr, fd, n_jobs, verbose=None):
     mri_Q, bem_rr, fun = fd['mri_Q'], fd['bem_rr'], fd['fun']
     for ci in range(len(fd['coils_list'])):
         coils, ccoils = fd['coils_list'][ci], fd['ccoils_list'][ci]
+        if outs is not None:
+            B = outs[ci]
+            if B.shape != (3 * len(rr), len(coils)):
+                raise ValueError('Output array has shape %s, expected %s'
+                                 % (B.shape, (3 * len(rr), len(coils))))
+        else:
+            B = np.empty((3 * len(rr), len(coils)))
+        Bs.append(B)
         if len(coils) == 0:  # nothing to do
-            Bs.append(np.zeros((3 * len(rr), 0)))
             continue
 
         coil_type, compensator = fd['coil_types'][ci], fd['compensators'][ci]
         solution, csolution = fd['solutions'][ci], fd['csolutions'][ci]
         info = fd['infos'][ci]
+        if compensator is not None:
+            picks = pick_types(info, meg=True, ref_meg=False)
+            cpicks = pick_types(info, meg=False, ref_meg=True)
 
         # Do the actual forward calculation for a list MEG/EEG sensors
         logger.info('Computing %s at %d source location%s '
                     '(free orientations)...'
                     % (coil_type.upper(), len(rr),
                        '' if len(rr) == 1 else 's'))
-        # Calculate foward solution using spherical or BEM model
-        B = fun(rr, mri_rr, mri_Q, coils, solution, bem_rr, n_jobs,
-                coil_type)
-
-        # Compensate if needed (only done for MEG systems w/compensation)
-        if compensator is not None:
-            # Compute the field in the compensation sensors
-            work = fun(rr, mri_rr, mri_Q, ccoils, csolution, bem_rr,
-                       n_jobs, coil_type)
-            # Combine solutions so we can do the compensation
-            both = np.zeros((work.shape[0], B.shape[1] + work.shape[1]))
-            picks = pick_types(info, meg=True, ref_meg=False)
-            both[:, picks] = B
-            picks = pick_types(info, meg=False, ref_meg=True)
-            both[:, picks] = work
-            B = np.dot(both, compensator.T)
-        Bs.append(B)
+        # Process the dipoles in blocks written directly into the output, so
+        # that the temporary memory use does not grow with the number of
+        # dipoles
+        for start in range(0, len(rr), _fwd_block_size):
+            sl = slice(start, start + _fwd_block_size)
+            b_rr = rr[sl]
+            b_mri_rr = mri_rr[sl] if mri_rr is not None else None
+            b_n_jobs = max(min(n_jobs, len(b_rr)), 1)
+            # Calculate foward solution using spherical or BEM model
+            b_B = fun(b_rr, b_mri_rr, mri_Q, coils, solution, bem_rr,
+                      b_n_jobs, coil_type)
+
+            # Compensate if needed (only done for MEG systems w/compensation)
+            if compensator is not None:
+                # Compute the field in the compensation sensors
+                work = fun(b_rr, b_mri_rr, mri_Q, ccoils, csolution, bem_rr,
+                           b_n_jobs, coil_type)
+                # Combine solutions so we can do the compensation
+                both = np.zeros((work.shape[0],
+                                 b_B.shape[1] + work.shape[1]))
+                both[:, picks] = b_B
+                both[:, cpicks] = work
+                b_B = np.dot(both, compensator.T)
+            B[3 * sl.start:3 * sl.start + len(b_B)] = b_B
     return Bs
 
 
@@ -1,6 +1,8 @@
+import os.path as op
+from copy import deepcopy
+
 import numpy as np
 from scipy import linalg
-from copy import deepcopy
 
 from ..io.constants import FIFF
 from ..io.pick import pick_types, pick_info
@@ -13,7 +15,7 @@ from ._lead_dots import (_do_self_dots, _do_surface_dots, _get_legen_table,
                          _get_legen_lut_fast, _get_legen_lut_accurate,
                          _do_cross_dots)
 from ..parallel import check_n_jobs
-from ..utils import logger, verbose
+from ..utils import logger, verbose, object_hash, get_config, _write_atomic
 from ..fixes import partial
 
 
@@ -53,6 +55,46 @@ def _setup_dots(mode, coils, ch_type):
     return my_origin, int_rad, noise, lut_fun, n_fact
 
 
+# The dot products depend only on the sensor and surface geometry, so they
+# are cached in memory and, if MNE_CACHE_DIR is set, on disk
+_field_dots_cache = dict()
+_field_dots_cache_keys = list()
+_field_dots_cache_size = 8
+
+
+def _coil_geometry(coils):
+    """Get the parts of coil definitions the dot products depend on"""
+    return [(coil['rmag'], coil['cosmag'], coil['w']) for coil in coils]
+
+
+def _get_field_dots(key, compute):
+    """Get (self_dots, target_dots) from the cache or compute them"""
+    key = '%032x' % object_hash(key)
+    if key in _field_dots_cache:
+        logger.info('Using cached dot products')
+        return _field_dots_cache[key]
+    cache_dir = get_config('MNE_CACHE_DIR', None)
+    fname = None
+    if cache_dir is not None and op.isdir(cache_dir):
+        fname = op.join(cache_dir, 'mne-field-dots-%s.npz' % key)
+    if fname is not None and op.isfile(fname):
+        logger.info('Reading cached dot products from %s' % fname)
+        with np.load(fname) as npz:
+            dots = (npz['self_dots'], npz['target_dots'])
+    else:
+        dots = compute()
+        if fname is not None:
+            _write_atomic(fname, np.savez, self_dots=dots[0],
+                          target_dots=dots[1])
+    for d in dots:  # shared between calls
+        d.flags.writeable = False
+    _field_dots_cache[key] = dots
+    _field_dots_cache_keys.append(key)
+    if len(_field_dots_cache_keys) > _field_dots_cache_size:
+        del _field_dots_cache[_field_dots_cache_keys.pop(0)]
+    return dots
+
+
 def _compute_mapping_matrix(fmd, info):
     """Do the hairy computations"""
     logger.info('preparing the mapping matrix...')
@@ -141,13 +183,22 @@ def _map_meg_channels(inst, pick_from, pick_to, mode='fast'):
     #
     my_origin, int_rad, noise, lut_fun, n_fact = _setup_dots(mode, coils_from,
                                                              'meg')
-    logger.info('Computing dot products for %i coils...' % (len(coils_from)))
-    self_dots = _do_self_dots(int_rad, False, coils_from, my_origin, 'meg',
-                              lut_fun, n_fact, n_jobs=1)
-    logger.info('Computing cross products for coils %i x %i coils...'
-                % (len(coils_from), len(coils_to)))
-    cross_dots = _do_cross_dots(int_rad, False, coils_from, coils_to,
-                                my_origin, 'meg', lut_fun, n_fact).T
+
+    def compute():
+        logger.info('Computing dot products for %i coils...'
+                    % (len(coils_from)))
+        self_dots = _do_self_dots(int_rad, False, coils_from, my_origin,
+                                  'meg', lut_fun, n_fact, n_jobs=1)
+        logger.info('Computing cross products for coils %i x %i coils...'
+                    % (len(coils_from), len(coils_to)))
+        cross_dots = _do_cross_dots(int_rad, False, coils_from, coils_to,
+                                    my_origin, 'meg', lut_fun, n_fact).T
+        return self_dots, cross_dots
+
+    key = dict(kind='channels', mode=mode, origin=my_origin, int_rad=int_rad,
+               coils_from=_coil_geometry(coils_from),
+               coils_to=_coil_geometry(coils_to))
+    self_dots, cross_dots = _get_field_dots(key, compute)
 
     ch_names = [c['ch_name'] for c in info_from['chs']]
     fmd = dict(kind='meg', ch_names=ch_names,
@@ -301,15 +352,24 @@ def _make_surface_mapping(info, surf, ch_type='meg', trans=None, mode='fast',
     #
     my_origin, int_rad, noise, lut_fun, n_fact = _setup_dots(mode, coils,
                                                              ch_type)
-    logger.info('Computing dot products for %i %s...' % (len(coils), type_str))
-    self_dots = _do_self_dots(int_rad, False, coils, my_origin, ch_type,
-                              lut_fun, n_fact, n_jobs)
     sel = np.arange(len(surf['rr']))  # eventually we should do sub-selection
-    logger.info('Computing dot products for %i surface locations...'
-                % len(sel))
-    surface_dots = _do_surface_dots(int_rad, False, coils, surf, sel,
-                                    my_origin, ch_type, lut_fun, n_fact,
-                                    n_jobs)
+
+    def compute():
+        logger.info('Computing dot products for %i %s...'
+                    % (len(coils), type_str))
+        self_dots = _do_self_dots(int_rad, False, coils, my_origin, ch_type,
+                                  lut_fun, n_fact, n_jobs)
+        logger.info('Computing dot products for %i surface locations...'
+                    % len(sel))
+        surface_dots = _do_surface_dots(int_rad, False, coils, surf, sel,
+                                        my_origin, ch_type, lut_fun, n_fact,
+                                        n_jobs)
+        return self_dots, surface_dots
+
+    key = dict(kind='surface', ch_type=ch_type, mode=mode, origin=my_origin,
+               int_rad=int_rad, coils=_coil_geometry(coils),
+               surf_rr=surf['rr'][sel], surf_nn=surf['nn'][sel])
+    self_dots, surface_dots = _get_field_dots(key, compute)
 
     #
     # Step 4. Return the result
@@ -48,11 +48,19 @@ def _get_legen_der(xx, n_coeff=100):
     return coeffs
 
 
+# Tables already read or generated in this process, keyed by the arguments
+# of _get_legen_table
+_legen_table_cache = dict()
+
+
 def _get_legen_table(ch_type, volume_integral=False, n_coeff=100,
                      n_interp=20000, force_calc=False):
     """Return a (generated) LUT of Legendre (derivative) polynomial coeffs"""
     if n_interp % 2 != 0:
         raise RuntimeError('n_interp must be even')
+    key = (ch_type, volume_integral, n_coeff, n_interp)
+    if not force_calc and key in _legen_table_cache:
+        return _legen_table_cache[key]
     fname = op.join(_get_extra_data_path(), 'tables')
     if not op.isdir(fname):
         # Updated due to API chang (GH 1167)
@@ -102,6 +110,11 @@ def _get_legen_table(ch_type, volume_integral=False, n_coeff=100,
         n_fact = (2.0 * n_fact + 1.0) * (2.0 * n_fact + 1.0) / n_fact
         # skip the first set of coefficients because they are not used
         lut = lut[:, 1:].copy()
+    if not force_calc:
+        # the tables are shared between calls, so protect them
+        lut.flags.writeable = False
+        n_fact.flags.writeable = False
+        _legen_table_cache[key] = (lut, n_fact)
     return lut, n_fact
 
 
@@ -138,12 +151,19 @@ def _comp_sum_eeg(beta, ctheta, lut_fun, n_fact):
     # The result is
     #   sums[:]    (2n+1)^2/n beta^n P_n
     coeffs = lut_fun(ctheta)
-    betans = np.cumprod(np.tile(beta[:, np.newaxis], (1, n_fact.shape[0])),
-                        axis=1)
-    s0 = np.dot(coeffs * betans, n_fact)  # == weighted sum across cols
+    betans = _beta_powers(beta, n_fact.shape[0])
+    betans *= coeffs
+    s0 = np.dot(betans, n_fact)  # == weighted sum across cols
     return s0
 
 
+def _beta_powers(beta, n):
+    """Compute beta ** [1, ..., n] for each beta without tiling"""
+    betans = np.empty((len(beta), n))
+    betans[:] = beta[:, np.newaxis]
+    return np.cumprod(betans, axis=1, out=betans)
+
+
 def _comp_sums_meg(beta, ctheta, lut_fun, n_fact, volume_integral):
     """Lead field dot products using Legendre polynomial (P_n) series.
 
@@ -173,8 +193,9 @@ def _comp_sums_meg(beta, ctheta, lut_fun, n_fact, volume_integral):
     #  * sums[:, 2]    n/((2n+1)(n+1)) beta^(n+1) P_n'
     #  * sums[:, 3]    n/((2n+1)(n+1)) beta^(n+1) P_n''
     coeffs = lut_fun(ctheta)
-    beta = (np.cumprod(np.tile(beta[:, np.newaxis], (1, n_fact.shape[0])),
-                       axis=1) * beta[:, np.newaxis])
+    betans = _beta_powers(beta, n_fact.shape[0])
+    betans *= beta[:, np.newaxis]
+    beta = betans
     # This is equivalent, but slower:
     # sums = np.sum(beta[:, :, np.newaxis] * n_fact * coeffs, axis=1)
     # sums = np.rollaxis(sums, 2)
@@ -185,6 +206,11 @@ def _comp_sums_meg(beta, ctheta, lut_fun, n_fact, volume_integral):
 ###############################################################################
 # SPHERE DOTS
 
+# Maximum number of integration point pairs whose dot products are
+# evaluated at once, which bounds the size of the Legendre series temporaries
+_dots_block_size = 5000
+
+
 def _fast_sphere_dot_r0(r, rr1, rr2, lr1, lr2, cosmags1, cosmags2,
                         w1, w2, volume_integral, lut, n_fact, ch_type):
     """Lead field dot product computation for M/EEG in the sphere model.
@@ -224,6 +250,21 @@ def _fast_sphere_dot_r0(r, rr1, rr2, lr1, lr2, cosmags1, cosmags2,
     result : float
         The integration sum.
     """
+    result = _sphere_dots(r, rr1, rr2, lr1, lr2, cosmags1, cosmags2,
+                          volume_integral, lut, n_fact, ch_type)
+    # new we add them all up with weights
+    if w1 is None:  # operating on surface, treat independently
+        # result = np.sum(w2[np.newaxis, :] * result, axis=1)
+        result = np.dot(result, w2)
+    else:
+        # result = np.sum((w1[:, np.newaxis] * w2[np.newaxis, :]) * result)
+        result = np.einsum('i,j,ij', w1, w2, result)
+    return result
+
+
+def _sphere_dots(r, rr1, rr2, lr1, lr2, cosmags1, cosmags2, volume_integral,
+                 lut, n_fact, ch_type):
+    """Unweighted lead field dot products between two sets of points"""
     ct = np.einsum('ik,jk->ij', rr1, rr2)  # outer product, sum over coords
 
     # expand axes
@@ -270,16 +311,60 @@ def _fast_sphere_dot_r0(r, rr1, rr2, lr1, lr2, cosmags1, cosmags2,
         # Give it a finishing touch!
         eeg_const = 1.0 / (4.0 * np.pi)
         result = eeg_const * sums / lr1lr2
-    # new we add them all up with weights
-    if w1 is None:  # operating on surface, treat independently
-        # result = np.sum(w2[np.newaxis, :] * result, axis=1)
-        result = np.dot(result, w2)
+    return result
+
+
+def _fast_sphere_dot_r0_coils(r, rr1, rr2, lr1, lr2, cosmags1, cosmags2,
+                              w1, w2, bins2, n_coils2, volume_integral, lut,
+                              n_fact, ch_type):
+    """Lead field dot products between one point set and a set of coils.
+
+    This is equivalent to calling _fast_sphere_dot_r0 for each coil in the
+    second set, but the integration points of all coils are processed
+    together in blocks of at most _dots_block_size point pairs.
+
+    Parameters
+    ----------
+    rr2, lr2, cosmags2, w2 : array
+        The concatenated integration points of the coils of the second set,
+        as in _fast_sphere_dot_r0.
+    bins2 : array of int, shape (n_points,)
+        The (sorted) coil index of each integration point in the second set.
+    n_coils2 : int
+        The number of coils in the second set.
+
+    Returns
+    -------
+    result : array, shape (n_coils2,) | (n_points1, n_coils2)
+        The integration sums, for each point of the first set if w1 is None.
+    """
+    if w1 is None:
+        result = np.zeros((len(rr1), n_coils2))
     else:
-        # result = np.sum((w1[:, np.newaxis] * w2[np.newaxis, :]) * result)
-        result = np.einsum('i,j,ij', w1, w2, result)
+        result = np.zeros(n_coils2)
+    n_block = max(_dots_block_size // len(rr1), 1)
+    for start in range(0, len(rr2), n_block):
+        sl = slice(start, start + n_block)
+        res = _sphere_dots(r, rr1, rr2[sl], lr1, lr2[sl], cosmags1,
+                           None if cosmags2 is None else cosmags2[sl],
+                           volume_integral, lut, n_fact, ch_type)
+        res *= w2[sl]
+        bins = bins2[sl]
+        if w1 is None:
+            use, first = np.unique(bins, return_index=True)
+            result[:, use] += np.add.reduceat(res, first, axis=1)
+        else:
+            result += np.bincount(bins, np.dot(w1, res), minlength=n_coils2)
     return result
 
 
+def _concatenate_points(*point_lists):
+    """Concatenate per-coil point arrays and get the coil of each point"""
+    bins = np.repeat(np.arange(len(point_lists[0])),
+                     [len(p) for p in point_lists[0]])
+    return [np.concatenate(p) for p in point_lists] + [bins]
+
+
 def _do_self_dots(intrad, volume, coils, r0, ch_type, lut, n_fact, n_jobs):
     """Perform the lead field dot product integrations.
 
@@ -329,15 +414,18 @@ def _do_self_dots_subset(intrad, rmags, rlens, cosmags, ws, volume, lut,
     """Helper for parallelization"""
     # all possible combinations of two magnetometers
     products = np.zeros((len(rmags), len(rmags)))
+    rmags_all, rlens_all, cosmags_all, ws_all, bins = \
+        _concatenate_points(rmags, rlens, cosmags, ws)
+    ends = np.cumsum([len(r) for r in rmags])
     for ci1 in idx:
-        for ci2 in range(0, ci1 + 1):
-            res = _fast_sphere_dot_r0(intrad, rmags[ci1], rmags[ci2],
-                                      rlens[ci1], rlens[ci2],
-                                      cosmags[ci1], cosmags[ci2],
-                                      ws[ci1], ws[ci2], volume, lut,
-                                      n_fact, ch_type)
-            products[ci1, ci2] = res
-            products[ci2, ci1] = res
+        # the points of the coils up to and including this one
+        sl = slice(0, ends[ci1])
+        res = _fast_sphere_dot_r0_coils(
+            intrad, rmags[ci1], rmags_all[sl], rlens[ci1], rlens_all[sl],
+            cosmags[ci1], cosmags_all[sl], ws[ci1], ws_all[sl], bins[sl],
+            ci1 + 1, volume, lut, n_fact, ch_type)
+        products[ci1, :ci1 + 1] = res
+        products[:ci1 + 1, ci1] = res
     return products
 
 
@@ -389,13 +477,13 @@ def _do_cross_dots(intrad, volume, coils1, coils2, r0, ch_type,
     cosmags2 = [coil['cosmag'] for coil in coils2]
 
     products = np.zeros((len(rmags1), len(rmags2)))
+    rmags2, rlens2, cosmags2, ws2, bins2 = \
+        _concatenate_points(rmags2, rlens2, cosmags2, ws2)
     for ci1 in range(len(coils1)):
-        for ci2 in range(len(coils2)):
-            res = _fast_sphere_dot_r0(intrad, rmags1[ci1], rmags2[ci2],
-                                      rlens1[ci1], rlens2[ci2], cosmags1[ci1],
-                                      cosmags2[ci2], ws1[ci1], ws2[ci2],
-                                      volume, lut, n_fact, ch_type)
-            products[ci1, ci2] = res
+        products[ci1] = _fast_sphere_dot_r0_coils(
+            intrad, rmags1[ci1], rmags2, rlens1[ci1], rlens2, cosmags1[ci1],
+            cosmags2, ws1[ci1], ws2, bins2, len(coils2), volume, lut, n_fact,
+            ch_type)
     return products
 
 
@@ -500,18 +588,19 @@ def _do_surface_dots_subset(intrad, rsurf, rmags, rref, refl, lsurf, rlens,
         The integration products.
     """
     products = np.zeros((len(rsurf), len(rmags)))
-    for ci in idx:
-        res = _fast_sphere_dot_r0(intrad, rsurf, rmags[ci],
-                                  lsurf, rlens[ci],
-                                  this_nn, cosmags[ci],
-                                  None, ws[ci], volume, lut,
-                                  n_fact, ch_type)
-        if rref is not None:
-            vres = _fast_sphere_dot_r0(intrad, rref, rmags[ci],
-                                       refl, rlens[ci],
-                                       None, ws[ci], volume,
-                                       lut, n_fact, ch_type)
-            products[:, ci] = res - vres
-        else:
-            products[:, ci] = res
+    if len(idx) == 0:
+        return products
+    idx = np.asarray(idx)
+    rmags, rlens, cosmags, ws, bins = _concatenate_points(
+        [rmags[ci] for ci in idx], [rlens[ci] for ci in idx],
+        [cosmags[ci] for ci in idx], [ws[ci] for ci in idx])
+    res = _fast_sphere_dot_r0_coils(intrad, rsurf, rmags, lsurf, rlens,
+                                    this_nn, cosmags, None, ws, bins,
+                                    len(idx), volume, lut, n_fact, ch_type)
+    if rref is not None:
+        res -= _fast_sphere_dot_r0_coils(intrad, rref, rmags, refl, rlens,
+                                         None, cosmags, None, ws, bins,
+                                         len(idx), volume, lut, n_fact,
+                                         ch_type)
+    products[:, idx] = res
     return products
@@ -5,6 +5,7 @@
 #
 # License: BSD (3-clause)
 
+import hashlib
 import os
 from os import path as op
 import numpy as np
@@ -13,12 +14,15 @@ from .. import pick_types, pick_info
 from ..io.pick import _has_kit_refs
 from ..io import read_info
 from ..io.constants import FIFF
-from .forward import Forward, write_forward_solution, _merge_meg_eeg_fwds
-from ._compute_forward import _compute_forwards
+from ..io.compensator import get_current_comp, make_compensator
+from .forward import Forward, write_forward_solution
+from ._compute_forward import (_compute_forwards, _compute_forwards_meeg,
+                               _prep_field_computation)
 from ..transforms import (invert_transform, transform_surface_to, apply_trans,
                           _get_mri_head_t, _print_coord_trans,
                           _coord_frame_name)
-from ..utils import logger, verbose
+from ..utils import (logger, verbose, get_config, object_hash,
+                     _write_atomic)
 from ..source_space import (read_source_spaces, _filter_source_spaces,
                             SourceSpaces)
 from ..surface import read_bem_solution, _normalize_vectors, _bem_find_surface
@@ -299,6 +303,142 @@ def _prep_channels(info, meg=True, eeg=True, ignore_ref=False, exclude=(),
     return megcoils, compcoils, eegels, megnames, eegnames, meg_info
 
 
+def _read_src(src):
+    """Read or copy the source spaces for forward computation"""
+    logger.info('')
+    if isinstance(src, string_types):
+        logger.info('Reading %s...' % src)
+        src = read_source_spaces(src, verbose=False)
+    else:
+        # let's make a copy in case we modify something
+        src = src.copy()
+    nsource = sum(s['nuse'] for s in src)
+    if nsource == 0:
+        raise RuntimeError('No sources are active in these source spaces. '
+                           '"do_all" option should be used.')
+    logger.info('Read %d source spaces a total of %d active source locations'
+                % (len(src), nsource))
+    return src
+
+
+def _transform_src(src, coord_frame, mri_head_t):
+    """Transform the source spaces to the computation coordinate frame"""
+    for s in src:
+        transform_surface_to(s, coord_frame, mri_head_t)
+    logger.info('Source spaces are now in %s coordinates.'
+                % _coord_frame_name(coord_frame))
+
+
+def _filter_src(src, bem, mindist, mri_head_t, n_jobs):
+    """Exclude source points too close to the inner skull"""
+    if not bem['is_sphere']:
+        inner_skull = _bem_find_surface(bem, 'inner_skull')
+        _filter_source_spaces(inner_skull, mindist, mri_head_t, src, n_jobs)
+        logger.info('')
+
+
+def _coils_key(coils):
+    """Collect the geometry of a list of coils for hashing"""
+    if coils is None or len(coils) == 0:
+        return None
+    return dict(rmag=np.concatenate([coil['rmag'] for coil in coils]),
+                cosmag=np.concatenate([coil['cosmag'] for coil in coils]),
+                w=np.concatenate([coil['w'] for coil in coils]),
+                n_points=np.array([len(coil['w']) for coil in coils]),
+                kind=np.array([[coil['coil_class'], coil['type']]
+                               for coil in coils], float))
+
+
+def _forward_cache_key(rr, bem, coils_list, ccoils_list, infos):
+    """Hash everything the gain matrix computation depends on"""
+    if bem['is_sphere']:
+        bem_key = dict(bem)
+    else:
+        # hash the (large) solution without copying it
+        solution = hashlib.md5(np.ascontiguousarray(bem['solution']))
+        bem_key = dict(surfs=[dict(id=int(surf['id']),
+                                   sigma=float(surf['sigma']),
+                                   rr=surf['rr'], tris=surf['tris'])
+                              for surf in bem['surfs']],
+                       method=bem['bem_method'],
+                       head_mri_t=bem['head_mri_t']['trans'],
+                       solution=solution.hexdigest())
+    comps = list()
+    for info in infos:
+        comp = None
+        if info is not None:
+            comp_num = get_current_comp(info)
+            if comp_num is not None and comp_num != 0:
+                comp = make_compensator(info, 0, comp_num, True)
+        comps.append(comp)
+    key = [rr, bem_key, comps, [_coils_key(coils) for coils in coils_list],
+           [_coils_key(ccoils) for ccoils in ccoils_list]]
+    return '%032x' % object_hash(key)
+
+
+def _get_forward_gain(rr, bem, coils_list, ccoils_list, infos, coil_types,
+                      n_jobs):
+    """Get the gain matrix from the cache directory or compute it
+
+    When the MNE_CACHE_DIR config is set, gain matrices are stored there
+    under a hash of the source positions, the conductor model and the
+    sensor geometry, and memory-mapped (copy-on-write) on later calls.
+    """
+    cache_dir = get_config('MNE_CACHE_DIR', None)
+    fname = None
+    if cache_dir is not None and op.isdir(cache_dir):
+        key = _forward_cache_key(rr, bem, coils_list, ccoils_list, infos)
+        fname = op.join(cache_dir, 'mne-fwd-gain-%s.npy' % key)
+        if op.isfile(fname):
+            logger.info('Reading cached gain matrix from %s' % fname)
+            return np.load(fname, mmap_mode='c')
+    Bs = _compute_forwards(rr, bem, coils_list, ccoils_list, infos,
+                           coil_types, n_jobs)
+    gain = np.concatenate([B.T for B in Bs])
+    if fname is not None:
+        _write_atomic(fname, np.save, gain)
+    return gain
+
+
+def _finish_forward(gain, megnames, eegnames, info, meg, eeg, src,
+                    mri_head_t, coord_frame):
+    """Assemble the Forward from the MEG and EEG gain matrix"""
+    if isinstance(gain, np.memmap):
+        # a second private mapping instead of a copy
+        orig_gain = np.load(gain.filename, mmap_mode='c')
+    else:
+        orig_gain = gain.copy()
+    sol = dict(data=gain, nrow=gain.shape[0], ncol=gain.shape[1],
+               row_names=megnames + eegnames, col_names=[])
+    fwd = Forward(sol=sol, source_ori=FIFF.FIFFV_MNE_FREE_ORI,
+                  coord_frame=coord_frame, sol_grad=None,
+                  _orig_source_ori=FIFF.FIFFV_MNE_FREE_ORI,
+                  _orig_sol=orig_gain, _orig_sol_grad=None)
+    logger.info('')
+
+    # pick out final dict info
+    picks = pick_types(info, meg=meg, eeg=eeg, ref_meg=False, exclude=[])
+    info = pick_info(info, picks)
+    source_rr = np.concatenate([s['rr'][s['vertno']] for s in src])
+    # deal with free orientations:
+    nsource = fwd['sol']['data'].shape[1] // 3
+    source_nn = np.tile(np.eye(3), (nsource, 1))
+
+    # Don't transform the source spaces back into MRI coordinates (which is
+    # done in the C code) because mne-python assumes forward solution source
+    # spaces are in head coords. We will delete some keys to clean up the
+    # source space, though:
+    for key in ['working_dir', 'command_line']:
+        if key in src.info:
+            del src.info[key]
+    fwd.update(dict(nchan=fwd['sol']['data'].shape[0], nsource=nsource,
+                    info=info, src=src, source_nn=source_nn,
+                    source_rr=source_rr, surf_ori=False,
+                    mri_head_t=mri_head_t))
+    fwd['info']['mri_head_t'] = mri_head_t
+    return fwd
+
+
 @verbose
 def make_forward_solution(info, trans, src, bem, fname=None, meg=True,
                           eeg=True, mindist=0.0, ignore_ref=False,
@@ -356,6 +496,12 @@ def make_forward_solution(info, trans, src, bem, fname=None, meg=True,
     (e.g., `--grad`, `--fixed`) are not implemented here. For those,
     consider using the C command line tools or the Python wrapper
     `do_forward_solution`.
+
+    If the ``MNE_CACHE_DIR`` config variable points to an existing
+    directory, the gain matrix is stored there, keyed by the source
+    locations, the conductor model, the transformations and the sensor
+    geometry. A later call with the same geometry loads it from there,
+    memory-mapped, instead of computing it again.
     """
     # Currently not (sup)ported:
     # 1. --grad option (gradients of the field, not used much)
@@ -416,19 +562,7 @@ def make_forward_solution(info, trans, src, bem, fname=None, meg=True,
     logger.info('Destination for the solution : %s' % fname)
 
     # Read the source locations
-    logger.info('')
-    if isinstance(src, string_types):
-        logger.info('Reading %s...' % src)
-        src = read_source_spaces(src, verbose=False)
-    else:
-        # let's make a copy in case we modify something
-        src = src.copy()
-    nsource = sum(s['nuse'] for s in src)
-    if nsource == 0:
-        raise RuntimeError('No sources are active in these source spaces. '
-                           '"do_all" option should be used.')
-    logger.info('Read %d source spaces a total of %d active source locations'
-                % (len(src), nsource))
+    src = _read_src(src)
 
     # Read the MRI -> head coordinate transformation
     logger.info('')
@@ -448,19 +582,13 @@ def make_forward_solution(info, trans, src, bem, fname=None, meg=True,
 
     # Transform the source spaces into the appropriate coordinates
     # (will either be HEAD or MRI)
-    for s in src:
-        transform_surface_to(s, coord_frame, mri_head_t)
-    logger.info('Source spaces are now in %s coordinates.'
-                % _coord_frame_name(coord_frame))
+    _transform_src(src, coord_frame, mri_head_t)
 
     # Prepare the BEM model
     bem = _setup_bem(bem, bem_extra, len(eegnames), mri_head_t)
 
     # Circumvent numerical problems by excluding points too close to the skull
-    if not bem['is_sphere']:
-        inner_skull = _bem_find_surface(bem, 'inner_skull')
-        _filter_source_spaces(inner_skull, mindist, mri_head_t, src, n_jobs)
-        logger.info('')
+    _filter_src(src, bem, mindist, mri_head_t, n_jobs)
 
     # Time to do the heavy lifting: MEG first, then EEG
     coil_types = ['meg', 'eeg']
@@ -468,37 +596,11 @@ def make_forward_solution(info, trans, src, bem, fname=None, meg=True,
     ccoils = [compcoils, None]
     infos = [meg_info, None]
     rr = np.concatenate([s['rr'][s['vertno']] for s in src])
-    megfwd, eegfwd = _compute_forwards(rr, bem, coils, ccoils,
-                                       infos, coil_types, n_jobs)
-
-    # merge forwards into one (creates two Forward objects)
-    megfwd = _to_forward_dict(megfwd, None, megnames, coord_frame,
-                              FIFF.FIFFV_MNE_FREE_ORI)
-    eegfwd = _to_forward_dict(eegfwd, None, eegnames, coord_frame,
-                              FIFF.FIFFV_MNE_FREE_ORI)
-    fwd = _merge_meg_eeg_fwds(megfwd, eegfwd, verbose=False)
-    logger.info('')
+    gain = _get_forward_gain(rr, bem, coils, ccoils, infos, coil_types,
+                             n_jobs)
 
-    # pick out final dict info
-    picks = pick_types(info, meg=meg, eeg=eeg, ref_meg=False, exclude=[])
-    info = pick_info(info, picks)
-    source_rr = np.concatenate([s['rr'][s['vertno']] for s in src])
-    # deal with free orientations:
-    nsource = fwd['sol']['data'].shape[1] // 3
-    source_nn = np.tile(np.eye(3), (nsource, 1))
-
-    # Don't transform the source spaces back into MRI coordinates (which is
-    # done in the C code) because mne-python assumes forward solution source
-    # spaces are in head coords. We will delete some keys to clean up the
-    # source space, though:
-    for key in ['working_dir', 'command_line']:
-        if key in src.info:
-            del src.info[key]
-    fwd.update(dict(nchan=fwd['sol']['data'].shape[0], nsource=nsource,
-                    info=info, src=src, source_nn=source_nn,
-                    source_rr=source_rr, surf_ori=False,
-                    mri_head_t=mri_head_t))
-    fwd['info']['mri_head_t'] = mri_head_t
+    fwd = _finish_forward(gain, megnames, eegnames, info, meg, eeg, src,
+                          mri_head_t, coord_frame)
     if fname is not None:
         logger.info('writing %s...', fname)
         write_forward_solution(fname, fwd, overwrite, verbose=False)
@@ -507,20 +609,213 @@ def make_forward_solution(info, trans, src, bem, fname=None, meg=True,
     return fwd
 
 
-def _to_forward_dict(fwd, fwd_grad, names, coord_frame, source_ori):
-    """Convert forward solution matrices to dicts"""
-    if len(fwd) == 0:
-        return None
-    sol = dict(data=fwd.T, nrow=fwd.shape[1], ncol=fwd.shape[0],
-               row_names=names, col_names=[])
-    fwd = Forward(sol=sol, source_ori=source_ori, nsource=sol['ncol'],
-                  coord_frame=coord_frame, sol_grad=None,
-                  nchan=sol['nrow'], _orig_source_ori=source_ori,
-                  _orig_sol=sol['data'].copy(), _orig_sol_grad=None)
-    if fwd_grad is not None:
-        sol_grad = dict(data=fwd_grad.T, nrow=fwd_grad.shape[1],
-                        ncol=fwd_grad.shape[0], row_names=names,
-                        col_names=[])
-        fwd.update(dict(sol_grad=sol_grad),
-                   _orig_sol_grad=sol_grad['data'].copy())
-    return fwd
+class ForwardEngine(object):
+    """Compute forward solutions for many source or head positions
+
+    The BEM model, the coil definitions and the field computation matrices
+    (BEM solution times coil coefficients) are set up once and reused, so
+    that gain matrices for new dipole sets or new device-to-head transforms
+    can be computed without repeating the setup done by
+    make_forward_solution.
+
+    Parameters
+    ----------
+    info : instance of mne.io.meas_info.Info | str
+        If str, then it should be a filename to a Raw, Epochs, or Evoked
+        file with measurement information. If dict, should be an info
+        dict (such as one from Raw, Epochs, or Evoked).
+    trans : dict | str | None
+        The MRI -> head transformation, see make_forward_solution.
+    bem : dict | str
+        Filename of the BEM (e.g., "sample-5120-5120-5120-bem-sol.fif") to
+        use, or a loaded sphere model (dict).
+    meg : bool
+        If True (Default), include MEG computations.
+    eeg : bool
+        If True (Default), include EEG computations.
+    ignore_ref : bool
+        If True, do not include reference channels in compensation.
+    n_jobs : int
+        Number of jobs to run in parallel.
+    verbose : bool, str, int, or None
+        If not None, override default verbose level (see mne.verbose).
+
+    Attributes
+    ----------
+    ch_names : list of str
+        The names of the channels, in the order of the rows of the gain
+        matrices.
+
+    Notes
+    -----
+    The MEG field computation matrices depend on the device-to-head
+    transformation. The ones for the most recently used transformations
+    are kept, so alternating between a few head positions is cheap.
+
+    .. versionadded:: 0.10
+    """
+    _n_cached = 8
+
+    @verbose
+    def __init__(self, info, trans, bem, meg=True, eeg=True,
+                 ignore_ref=False, n_jobs=1, verbose=None):
+        self.mri_head_t, self.trans = _get_mri_head_t(trans)
+        if isinstance(bem, dict):
+            bem_extra = 'dict'
+        else:
+            bem_extra = bem
+            if not op.isfile(bem):
+                raise IOError('BEM file "%s" not found' % bem)
+        if isinstance(info, string_types):
+            info = read_info(info, verbose=False)
+        elif not isinstance(info, dict):
+            raise TypeError('info should be a dict or string')
+        mri_id = dict(machid=np.zeros(2, np.int32), version=0, secs=0,
+                      usecs=0)
+        self._info = dict(nchan=info['nchan'], chs=info['chs'],
+                          comps=info['comps'], ch_names=info['ch_names'],
+                          dev_head_t=info['dev_head_t'], mri_file=self.trans,
+                          mri_id=mri_id, meas_file='info dict', meas_id=None,
+                          working_dir=os.getcwd(),
+                          command_line='ForwardEngine', bads=info['bads'])
+        self.meg, self.eeg, self.n_jobs = meg, eeg, n_jobs
+        self.coord_frame = FIFF.FIFFV_COORD_HEAD
+        megcoils, compcoils, eegels, self._megnames, self._eegnames, \
+            self._meg_info = _prep_channels(self._info, meg, eeg, ignore_ref)
+        self.ch_names = self._megnames + self._eegnames
+        self._bem = _setup_bem(bem, bem_extra, len(self._eegnames),
+                               self.mri_head_t)
+        self._coilset = _read_coil_defs(verbose=False)
+        self._fwd_data = dict()
+        self._fwd_data_keys = list()
+        if len(self._megnames) > 0:
+            meg_info = self._meg_info
+            self._megchs = [meg_info['chs'][k] for k in
+                            pick_types(meg_info, meg=True, ref_meg=False,
+                                       exclude=[])]
+            self._compchs = [meg_info['chs'][k] for k in
+                             pick_types(meg_info, meg=False, ref_meg=True,
+                                        exclude=[])]
+            self._store_fwd_data(self._prep_fwd_data(
+                'meg', megcoils, compcoils, self._meg_info),
+                info['dev_head_t'])
+        if len(self._eegnames) > 0:
+            self._eeg_data = self._prep_fwd_data('eeg', eegels, None, None)
+
+    def _prep_fwd_data(self, coil_type, coils, ccoils, info):
+        """Set up the field computation for one sensor type"""
+        fwd_data = dict(coils_list=[coils], ccoils_list=[ccoils],
+                        infos=[info], coil_types=[coil_type])
+        _prep_field_computation(None, self._bem, fwd_data, self.n_jobs,
+                                verbose=False)
+        return fwd_data
+
+    def _store_fwd_data(self, fwd_data, dev_head_t):
+        """Keep the MEG field computation for a device-to-head transform"""
+        key = tuple(np.asarray(dev_head_t['trans']).ravel())
+        if key not in self._fwd_data:
+            if len(self._fwd_data_keys) >= self._n_cached:
+                del self._fwd_data[self._fwd_data_keys.pop(0)]
+            self._fwd_data_keys.append(key)
+        self._fwd_data[key] = fwd_data
+
+    def _get_meg_data(self, dev_head_t):
+        """Get the MEG field computation for a device-to-head transform"""
+        if dev_head_t['from'] != FIFF.FIFFV_COORD_DEVICE or \
+                dev_head_t['to'] != FIFF.FIFFV_COORD_HEAD:
+            raise ValueError('dev_head_t must be a MEG device -> head '
+                             'transformation')
+        key = tuple(np.asarray(dev_head_t['trans']).ravel())
+        if key in self._fwd_data:
+            return self._fwd_data[key]
+        megcoils = _create_coils(self._megchs,
+                                 FIFF.FWD_COIL_ACCURACY_ACCURATE, dev_head_t,
+                                 'meg', self._coilset)
+        compcoils = list()
+        if len(self._compchs) > 0:
+            compcoils = _create_coils(self._compchs,
+                                      FIFF.FWD_COIL_ACCURACY_NORMAL,
+                                      dev_head_t, 'meg', self._coilset)
+        fwd_data = self._prep_fwd_data('meg', megcoils, compcoils,
+                                       self._meg_info)
+        self._store_fwd_data(fwd_data, dev_head_t)
+        return fwd_data
+
+    def compute_gain(self, rr, dev_head_t=None, out=None):
+        """Compute the gain matrix for dipoles at the given positions
+
+        Parameters
+        ----------
+        rr : ndarray, shape (n_dipoles, 3)
+            The dipole positions in head coordinates (in meters).
+        dev_head_t : dict | None
+            The MEG device -> head transformation to use. If None, the one
+            from the measurement info is used.
+        out : ndarray, shape (n_channels, 3 * n_dipoles) | None
+            Array to write the gain matrix into, e.g. a numpy.memmap for
+            source spaces too large to hold in memory. If None, a new array
+            is allocated.
+
+        Returns
+        -------
+        gain : ndarray, shape (n_channels, 3 * n_dipoles)
+            The gain matrix for free orientation dipoles, with the channels
+            ordered as in ``ch_names``.
+        """
+        rr = np.atleast_2d(np.asarray(rr, dtype=np.float64))
+        if rr.ndim != 2 or rr.shape[1] != 3:
+            raise ValueError('rr must have shape (n_dipoles, 3)')
+        if dev_head_t is None:
+            dev_head_t = self._info['dev_head_t']
+        shape = (len(self.ch_names), 3 * len(rr))
+        if out is None:
+            out = np.empty(shape)
+        elif out.shape != shape:
+            raise ValueError('out must have shape %s, got %s'
+                             % (shape, out.shape))
+        n_meg = len(self._megnames)
+        # the blocks are written directly into (transposed views of) out
+        if n_meg > 0:
+            _compute_forwards_meeg(rr, self._get_meg_data(dev_head_t),
+                                   self.n_jobs, outs=[out[:n_meg].T],
+                                   verbose=False)
+        if len(self._eegnames) > 0:
+            _compute_forwards_meeg(rr, self._eeg_data, self.n_jobs,
+                                   outs=[out[n_meg:].T], verbose=False)
+        return out
+
+    @verbose
+    def make_forward(self, src, dev_head_t=None, mindist=0.0, verbose=None):
+        """Compute a forward solution
+
+        Parameters
+        ----------
+        src : str | instance of SourceSpaces
+            If string, should be a source space filename. Can also be an
+            instance of loaded or generated SourceSpaces.
+        dev_head_t : dict | None
+            The MEG device -> head transformation to use. If None, the one
+            from the measurement info is used.
+        mindist : float
+            Minimum distance of sources from inner skull surface (in mm).
+        verbose : bool, str, int, or None
+            If not None, override default verbose level (see mne.verbose).
+
+        Returns
+        -------
+        fwd : instance of Forward
+            The forward solution, identical to the one computed by
+            make_forward_solution with the same parameters.
+        """
+        src = _read_src(src)
+        _transform_src(src, self.coord_frame, self.mri_head_t)
+        _filter_src(src, self._bem, mindist, self.mri_head_t, self.n_jobs)
+        rr = np.concatenate([s['rr'][s['vertno']] for s in src])
+        gain = self.compute_gain(rr, dev_head_t)
+        info = self._info
+        if dev_head_t is not None:
+            info = info.copy()
+            info['dev_head_t'] = dev_head_t
+        return _finish_forward(gain, self._megnames, self._eegnames, info,
+                               self.meg, self.eeg, src, self.mri_head_t,
+                               self.coord_frame)
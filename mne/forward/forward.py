@@ -191,11 +191,9 @@ def _inv_block_diag(A, n):
     if na % n > 0:
         raise ValueError('Width of matrix must be a multiple of n')
 
-    # modify A in-place to invert each sub-block
-    A = A.copy()
-    for start in range(0, na, 3):
-        # this is a view
-        A[:, start:start + 3] = linalg.inv(A[:, start:start + 3])
+    # invert all sub-blocks at once
+    A = np.linalg.inv(A.T.reshape(bdn, n, ma).swapaxes(1, 2))
+    A = A.swapaxes(1, 2).reshape(na, ma).T
 
     tmp = np.arange(ma * bdn, dtype=np.int).reshape(bdn, ma)
     tmp = np.tile(tmp, (1, n))
@@ -558,6 +556,48 @@ def read_forward_solution(fname, force_fixed=False, surf_ori=False,
     return Forward(fwd)
 
 
+def _copy_fwd(fwd, replaced=()):
+    """Deep copy a forward solution, except for arrays to be replaced
+
+    Parameters
+    ----------
+    fwd : dict
+        The forward solution.
+    replaced : list of array
+        Arrays (e.g., the gain matrix) that the caller replaces in the copy
+        afterwards, which are thus not copied.
+
+    Returns
+    -------
+    fwd : dict
+        The copy, holding None in place of the replaced arrays.
+    """
+    memo = dict((id(x), None) for x in replaced if x is not None)
+    return deepcopy(fwd, memo)
+
+
+def _surf_ori_nn(nn):
+    """Get the local surface-based coordinate systems for normals
+
+    Parameters
+    ----------
+    nn : ndarray, shape (n_sources, 3)
+        The unit normals.
+
+    Returns
+    -------
+    source_nn : ndarray, shape (3 * n_sources, 3)
+        The two tangential directions and the normal for each source.
+    """
+    #  Project out the surface normal and compute SVD, all at once
+    U = np.linalg.svd(np.eye(3) - nn[:, :, np.newaxis] * nn[:, np.newaxis],
+                      full_matrices=True)[0]
+    #  Make sure that ez is in the direction of nn
+    signs = np.where(np.sum(nn * U[:, :, 2], axis=1) < 0, -1., 1.)
+    U *= signs[:, np.newaxis, np.newaxis]
+    return U.swapaxes(1, 2).reshape(3 * len(nn), 3)
+
+
 @verbose
 def convert_forward_solution(fwd, surf_ori=False, force_fixed=False,
                              copy=True, verbose=None):
@@ -583,7 +623,14 @@ def convert_forward_solution(fwd, surf_ori=False, force_fixed=False,
         The modified forward solution.
     """
     if copy is True:
-        fwd = deepcopy(fwd)
+        # The orientations and (unless the original solution is fixed) the
+        # solutions are replaced below, so they do not need to be copied
+        replaced = [fwd['source_nn']]
+        if not is_fixed_orient(fwd, orig=True):
+            replaced.append(fwd['sol']['data'])
+            if fwd['sol_grad'] is not None:
+                replaced.append(fwd['sol_grad']['data'])
+        fwd = _copy_fwd(fwd, replaced)
 
     # We need to change these entries (only):
     # 1. source_nn
@@ -593,7 +640,6 @@ def convert_forward_solution(fwd, surf_ori=False, force_fixed=False,
     # 5. sol_grad['ncol']
     # 6. source_ori
     if is_fixed_orient(fwd, orig=True) or force_fixed:  # Fixed
-        nuse = 0
         fwd['source_nn'] = np.concatenate([s['nn'][s['vertno'], :]
                                            for s in fwd['src']], axis=0)
 
@@ -618,8 +664,6 @@ def convert_forward_solution(fwd, surf_ori=False, force_fixed=False,
         fwd['surf_ori'] = True
     elif surf_ori:  # Free, surf-oriented
         #   Rotate the local source coordinate systems
-        nuse_total = sum([s['nuse'] for s in fwd['src']])
-        fwd['source_nn'] = np.empty((3 * nuse_total, 3), dtype=np.float)
         logger.info('    Converting to surface-based source orientations...')
         if fwd['src'][0]['patch_inds'] is not None:
             use_ave_nn = True
@@ -629,24 +673,17 @@ def convert_forward_solution(fwd, surf_ori=False, force_fixed=False,
             use_ave_nn = False
 
         #   Actually determine the source orientations
-        nuse = 0
-        pp = 0
+        nn = list()
         for s in fwd['src']:
-            for p in range(s['nuse']):
-                #  Project out the surface normal and compute SVD
-                if use_ave_nn is True:
-                    nn = s['nn'][s['pinfo'][s['patch_inds'][p]], :]
-                    nn = np.sum(nn, axis=0)[:, np.newaxis]
-                    nn /= linalg.norm(nn)
-                else:
-                    nn = s['nn'][s['vertno'][p], :][:, np.newaxis]
-                U, S, _ = linalg.svd(np.eye(3, 3) - nn * nn.T)
-                #  Make sure that ez is in the direction of nn
-                if np.sum(nn.ravel() * U[:, 2].ravel()) < 0:
-                    U *= -1.0
-                fwd['source_nn'][pp:pp + 3, :] = U.T
-                pp += 3
-            nuse += s['nuse']
+            if use_ave_nn is True:
+                this_nn = np.array([np.sum(s['nn'][s['pinfo'][
+                    s['patch_inds'][p]]], axis=0) for p in range(s['nuse'])])
+                this_nn /= np.sqrt(np.sum(this_nn * this_nn,
+                                          axis=1))[:, np.newaxis]
+            else:
+                this_nn = s['nn'][s['vertno']]
+            nn.append(this_nn)
+        fwd['source_nn'] = _surf_ori_nn(np.concatenate(nn))
 
         #   Rotate the solution components as well
         surf_rot = _block_diag(fwd['source_nn'].T, 3)
@@ -1561,9 +1598,11 @@ def average_forward_solutions(fwds, weights=None):
 
     Parameters
     ----------
-    fwds : list of dict
+    fwds : list of dict | list of str
         Forward solutions to average. Each entry (dict) should be a
-        forward solution.
+        forward solution. Entries can also be forward solution file names,
+        which are then read one at a time, so that only the running average
+        and one forward solution are held in memory.
     weights : array | None
         Weights to apply to each forward solution in averaging. If None,
         forward solutions will be equally weighted. Weights must be
@@ -1583,7 +1622,7 @@ def average_forward_solutions(fwds, weights=None):
     # check weights
     if weights is None:
         weights = np.ones(len(fwds))
-    weights = np.asanyarray(weights)  # in case it's a list, convert it
+    weights = np.array(weights, float)  # in case it's a list, convert it
     if not np.all(weights >= 0):
         raise ValueError('weights must be non-negative')
     if not len(weights) == len(fwds):
@@ -1595,36 +1634,57 @@ def average_forward_solutions(fwds, weights=None):
 
     # check our forward solutions
     for fwd in fwds:
-        # check to make sure it's a forward solution
-        if not isinstance(fwd, dict):
-            raise TypeError('Each entry in fwds must be a dict')
-        # check to make sure the dict is actually a fwd
-        check_keys = ['info', 'sol_grad', 'nchan', 'src', 'source_nn', 'sol',
-                      'source_rr', 'source_ori', 'surf_ori', 'coord_frame',
-                      'mri_head_t', 'nsource']
-        if not all(key in fwd for key in check_keys):
-            raise KeyError('forward solution dict does not have all standard '
-                           'entries, cannot compute average.')
+        if not isinstance(fwd, (dict, string_types)):
+            raise TypeError('Each entry in fwds must be a dict or str')
+
+    # actually average them (solutions and gradients), one at a time
+    fwd_ave = None
+    for fwd, w in zip(fwds, weights):
+        if isinstance(fwd, string_types):
+            fwd = read_forward_solution(fwd, verbose=False)
+        _check_fwd_average(fwd, fwd_ave)
+        if fwd_ave is None:
+            data = [fwd['sol']['data'], fwd['_orig_sol']]
+            if fwd['sol_grad'] is not None:
+                data += [fwd['sol_grad']['data'], fwd['_orig_sol_grad']]
+            fwd_ave = _copy_fwd(fwd, data)
+            fwd_ave['sol']['data'] = fwd['sol']['data'] * w
+            fwd_ave['_orig_sol'] = fwd['_orig_sol'] * w
+            if fwd['sol_grad'] is not None:
+                fwd_ave['sol_grad']['data'] = fwd['sol_grad']['data'] * w
+                fwd_ave['_orig_sol_grad'] = fwd['_orig_sol_grad'] * w
+        else:
+            _add_scaled(fwd_ave['sol']['data'], fwd['sol']['data'], w)
+            _add_scaled(fwd_ave['_orig_sol'], fwd['_orig_sol'], w)
+            if fwd_ave['sol_grad'] is not None:
+                _add_scaled(fwd_ave['sol_grad']['data'],
+                            fwd['sol_grad']['data'], w)
+                _add_scaled(fwd_ave['_orig_sol_grad'],
+                            fwd['_orig_sol_grad'], w)
+        del fwd
+    return fwd_ave
 
+
+def _check_fwd_average(fwd, fwd_ave):
+    """Check that a forward solution can be added to an average"""
+    # check to make sure the dict is actually a fwd
+    check_keys = ['info', 'sol_grad', 'nchan', 'src', 'source_nn', 'sol',
+                  'source_rr', 'source_ori', 'surf_ori', 'coord_frame',
+                  'mri_head_t', 'nsource']
+    if not all(key in fwd for key in check_keys):
+        raise KeyError('forward solution dict does not have all standard '
+                       'entries, cannot compute average.')
+    if fwd_ave is None:
+        return
     # check forward solution compatibility
-    if any(fwd['sol'][k] != fwds[0]['sol'][k]
-           for fwd in fwds[1:] for k in ['nrow', 'ncol']):
+    if any(fwd['sol'][k] != fwd_ave['sol'][k] for k in ['nrow', 'ncol']):
         raise ValueError('Forward solutions have incompatible dimensions')
-    if any(fwd[k] != fwds[0][k] for fwd in fwds[1:]
+    if any(fwd[k] != fwd_ave[k]
            for k in ['source_ori', 'surf_ori', 'coord_frame']):
         raise ValueError('Forward solutions have incompatible orientations')
 
-    # actually average them (solutions and gradients)
-    fwd_ave = deepcopy(fwds[0])
-    fwd_ave['sol']['data'] *= weights[0]
-    fwd_ave['_orig_sol'] *= weights[0]
-    for fwd, w in zip(fwds[1:], weights[1:]):
-        fwd_ave['sol']['data'] += w * fwd['sol']['data']
-        fwd_ave['_orig_sol'] += w * fwd['_orig_sol']
-    if fwd_ave['sol_grad'] is not None:
-        fwd_ave['sol_grad']['data'] *= weights[0]
-        fwd_ave['_orig_sol_grad'] *= weights[0]
-        for fwd, w in zip(fwds[1:], weights[1:]):
-            fwd_ave['sol_grad']['data'] += w * fwd['sol_grad']['data']
-            fwd_ave['_orig_sol_grad'] += w * fwd['_orig_sol_grad']
-    return fwd_ave
+
+def _add_scaled(out, data, weight, n_rows=100):
+    """Add weight * data to out, a few rows at a time to limit memory use"""
+    for start in range(0, len(out), n_rows):
+        out[start:start + n_rows] += weight * data[start:start + n_rows]
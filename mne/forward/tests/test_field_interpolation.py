@@ -1,3 +1,4 @@
+import os
 import numpy as np
 from os import path as op
 from numpy.polynomial import legendre
@@ -10,16 +11,19 @@ from mne.forward._lead_dots import (_comp_sum_eeg, _comp_sums_meg,
                                     _get_legen_table,
                                     _get_legen_lut_fast,
                                     _get_legen_lut_accurate,
-                                    _do_cross_dots)
+                                    _do_cross_dots, _do_self_dots,
+                                    _do_surface_dots, _fast_sphere_dot_r0)
+from mne.forward import _lead_dots
 from mne.forward._make_forward import _create_coils
-from mne.forward._field_interpolation import _setup_dots
+from mne.forward import _field_interpolation
+from mne.forward._field_interpolation import _setup_dots, _get_field_dots
 from mne.surface import get_meg_helmet_surf, get_head_surf
 from mne.datasets import testing
 from mne import read_evokeds
 from mne.io.constants import FIFF
 from mne.fixes import partial
 from mne.externals.six.moves import zip
-from mne.utils import run_tests_if_main, slow_test
+from mne.utils import run_tests_if_main, slow_test, _TempDir
 
 
 base_dir = op.join(op.dirname(__file__), '..', '..', 'io', 'tests', 'data')
@@ -95,6 +99,121 @@ def test_legendre_table():
         assert_allclose(n_fact1, n_fact2)
 
 
+def test_legendre_table_cache():
+    """Test in-memory caching of Legendre tables
+    """
+    lut, n_fact = _get_legen_table('eeg', n_coeff=10)
+    lut2, n_fact2 = _get_legen_table('eeg', n_coeff=10)
+    assert_true(lut is lut2)
+    assert_true(n_fact is n_fact2)
+    assert_true(not lut.flags.writeable)
+    lut3, n_fact3 = _get_legen_table('eeg', n_coeff=10, force_calc=True)
+    assert_true(lut3 is not lut)
+    assert_allclose(lut3, lut)
+
+
+def test_lead_dots_blocks():
+    """Test lead field dot products computed over blocks of coils
+    """
+    rng = np.random.RandomState(0)
+    r0 = np.array([0., 0., 0.04])
+    coils = list()
+    for n_pts in (1, 4, 2, 8, 3):
+        rmag = rng.randn(n_pts, 3)
+        rmag *= 0.1 / np.sqrt(np.sum(rmag ** 2, axis=1))[:, np.newaxis]
+        cosmag = rmag / 0.1
+        coils.append(dict(rmag=rmag + r0, cosmag=cosmag, w=rng.rand(n_pts)))
+    surf = dict(rr=coils[3]['rmag'] * 0.9, nn=coils[3]['cosmag'])
+    sel = np.arange(len(surf['rr']))
+
+    def _norm(coil):
+        rmag = coil['rmag'] - r0
+        rlen = np.sqrt(np.sum(rmag * rmag, axis=1))
+        return rmag / rlen[:, np.newaxis], rlen
+
+    block_size = _lead_dots._dots_block_size
+    for ch_type in ('meg', 'eeg'):
+        lut, n_fact = _get_legen_table(ch_type, False, 50)
+        lut_fun = partial(_get_legen_lut_accurate, lut=lut)
+        intrad = 0.06 * (0.7 if ch_type == 'eeg' else 1.)
+        want_self = np.empty((len(coils), len(coils)))
+        want_surf = np.empty((len(sel), len(coils)))
+        for ci1, c1 in enumerate(coils):
+            rmag1, rlen1 = _norm(c1)
+            for ci2, c2 in enumerate(coils):
+                rmag2, rlen2 = _norm(c2)
+                want_self[ci1, ci2] = _fast_sphere_dot_r0(
+                    intrad, rmag1, rmag2, rlen1, rlen2, c1['cosmag'],
+                    c2['cosmag'], c1['w'], c2['w'], False, lut_fun, n_fact,
+                    ch_type)
+            rsurf, lsurf = _norm(dict(rmag=surf['rr']))
+            want_surf[:, ci1] = _fast_sphere_dot_r0(
+                intrad, rsurf, rmag1, lsurf, rlen1, surf['nn'], c1['cosmag'],
+                None, c1['w'], False, lut_fun, n_fact, ch_type)
+        try:
+            for size in (1, 7, block_size):
+                _lead_dots._dots_block_size = size
+                self_dots = _do_self_dots(0.06, False, coils, r0, ch_type,
+                                          lut_fun, n_fact, n_jobs=1)
+                assert_allclose(self_dots, want_self, rtol=1e-10)
+                cross_dots = _do_cross_dots(intrad, False, coils[:2],
+                                            coils[1:], r0, ch_type, lut_fun,
+                                            n_fact)
+                assert_allclose(cross_dots, want_self[:2, 1:], rtol=1e-10)
+                surface_dots = _do_surface_dots(0.06, False, coils, surf, sel,
+                                                r0, ch_type, lut_fun, n_fact,
+                                                n_jobs=1)
+                assert_allclose(surface_dots, want_surf, rtol=1e-10)
+        finally:
+            _lead_dots._dots_block_size = block_size
+
+
+def test_field_dots_cache():
+    """Test caching of field interpolation dot products
+    """
+    rng = np.random.RandomState(0)
+    dots = (rng.randn(3, 3), rng.randn(5, 3))
+    calls = list()
+
+    def compute():
+        calls.append(None)
+        return tuple(d.copy() for d in dots)
+
+    key = dict(kind='test', origin=rng.randn(3), int_rad=0.06)
+    orig_dir = os.getenv('MNE_CACHE_DIR', None)
+    orig_cache = _field_interpolation._field_dots_cache.copy()
+    orig_keys = list(_field_interpolation._field_dots_cache_keys)
+    tempdir = _TempDir()
+    try:
+        os.environ['MNE_CACHE_DIR'] = tempdir
+        out = _get_field_dots(key, compute)
+        assert_true(len(calls) == 1)
+        for d, o in zip(dots, out):
+            assert_array_equal(d, o)
+            assert_true(not o.flags.writeable)
+        out2 = _get_field_dots(key, compute)
+        assert_true(len(calls) == 1)
+        assert_true(all(o is o2 for o, o2 in zip(out, out2)))
+        # cleared from memory, read back from disk
+        _field_interpolation._field_dots_cache.clear()
+        out2 = _get_field_dots(key, compute)
+        assert_true(len(calls) == 1)
+        for d, o in zip(dots, out2):
+            assert_array_equal(d, o)
+        # a different geometry is computed anew
+        key['int_rad'] = 0.07
+        _get_field_dots(key, compute)
+        assert_true(len(calls) == 2)
+    finally:
+        if orig_dir is None:
+            del os.environ['MNE_CACHE_DIR']
+        else:
+            os.environ['MNE_CACHE_DIR'] = orig_dir
+        _field_interpolation._field_dots_cache.clear()
+        _field_interpolation._field_dots_cache.update(orig_cache)
+        _field_interpolation._field_dots_cache_keys[:] = orig_keys
+
+
 @testing.requires_testing_data
 def test_make_field_map_eeg():
     """Test interpolation of EEG field onto head
@@ -19,6 +19,8 @@ from mne.utils import (requires_mne, run_subprocess, _TempDir,
                        run_tests_if_main, slow_test)
 from mne.forward import (restrict_forward_to_stc, restrict_forward_to_label,
                          Forward)
+from mne.forward.forward import _inv_block_diag
+from mne.io.constants import FIFF
 
 data_path = testing.data_path(download=False)
 fname_meeg = op.join(data_path, 'MEG', 'sample',
@@ -52,6 +54,89 @@ def compare_forwards(f1, f2):
     assert_equal(f1['surf_ori'], f2['surf_ori'])
 
 
+def _fake_fwd(rng, n_chan=4, n_uses=(5, 3)):
+    """Make a small free-orientation forward solution"""
+    src = list()
+    for n_use in n_uses:
+        nn = rng.randn(2 * n_use, 3)
+        nn /= np.sqrt(np.sum(nn * nn, axis=1))[:, np.newaxis]
+        vertno = np.sort(rng.permutation(2 * n_use)[:n_use])
+        src.append(dict(nn=nn, vertno=vertno, nuse=n_use, patch_inds=None,
+                        pinfo=None))
+    nsource = sum(n_uses)
+    gain = rng.randn(n_chan, 3 * nsource)
+    return Forward(sol=dict(data=gain.copy(), nrow=n_chan, ncol=3 * nsource),
+                   _orig_sol=gain, sol_grad=None, _orig_sol_grad=None,
+                   source_nn=np.tile(np.eye(3), (nsource, 1)),
+                   source_ori=FIFF.FIFFV_MNE_FREE_ORI,
+                   _orig_source_ori=FIFF.FIFFV_MNE_FREE_ORI, surf_ori=False,
+                   nsource=nsource, src=src, info=dict(), nchan=n_chan,
+                   source_rr=rng.randn(nsource, 3), mri_head_t=dict(),
+                   coord_frame=FIFF.FIFFV_COORD_HEAD)
+
+
+def test_convert_forward_orientations():
+    """Test source orientations of converted forward solutions
+    """
+    rng = np.random.RandomState(0)
+    fwd = _fake_fwd(rng)
+    gain = fwd['_orig_sol']
+    nn = np.concatenate([s['nn'][s['vertno']] for s in fwd['src']])
+    fwd_surf = convert_forward_solution(fwd, surf_ori=True)
+    # the input is untouched and nothing large is shared
+    assert_true(not fwd['surf_ori'])
+    assert_array_equal(fwd['sol']['data'], gain)
+    assert_true(not np.may_share_memory(fwd_surf['_orig_sol'], gain))
+    # orthonormal bases with the normal last
+    source_nn = fwd_surf['source_nn'].reshape(-1, 3, 3)
+    assert_allclose(np.einsum('nij,nkj->nik', source_nn, source_nn),
+                    np.tile(np.eye(3), (len(nn), 1, 1)), atol=1e-12)
+    assert_allclose(source_nn[:, 2], nn, atol=1e-12)
+    want = np.einsum('cni,nji->cnj', gain.reshape(len(gain), -1, 3),
+                     source_nn).reshape(len(gain), -1)
+    assert_allclose(fwd_surf['sol']['data'], want, atol=1e-12)
+    # which can be undone
+    inv_rot = _inv_block_diag(fwd_surf['source_nn'].T, 3)
+    assert_allclose(fwd_surf['sol']['data'] * inv_rot, gain, atol=1e-12)
+
+    fwd_fixed = convert_forward_solution(fwd, force_fixed=True)
+    assert_equal(fwd_fixed['sol']['data'].dtype, np.float32)
+    assert_allclose(fwd_fixed['sol']['data'],
+                    want[:, 2::3].astype(np.float32), rtol=1e-5)
+
+    # average patch normals
+    for s in fwd['src']:
+        s['pinfo'] = [np.array([v, (v + 1) % len(s['nn'])])
+                      for v in s['vertno']]
+        s['patch_inds'] = np.arange(s['nuse'])
+    nn = np.concatenate([s['nn'][s['vertno']] +
+                         s['nn'][(s['vertno'] + 1) % len(s['nn'])]
+                         for s in fwd['src']])
+    nn /= np.sqrt(np.sum(nn * nn, axis=1))[:, np.newaxis]
+    fwd_surf = convert_forward_solution(fwd, surf_ori=True)
+    assert_allclose(fwd_surf['source_nn'][2::3], nn, atol=1e-12)
+
+
+def test_average_forward_weights():
+    """Test weighted averaging of forward solutions
+    """
+    rng = np.random.RandomState(0)
+    fwds = [_fake_fwd(rng) for _ in range(3)]
+    gains = [fwd['sol']['data'].copy() for fwd in fwds]
+    weights = np.array([1., 2., 5.])
+    fwd_ave = average_forward_solutions(fwds, weights)
+    want = np.sum([w * g for w, g in zip(weights / 8., gains)], axis=0)
+    assert_allclose(fwd_ave['sol']['data'], want)
+    assert_allclose(fwd_ave['_orig_sol'], want)
+    assert_array_equal(weights, [1., 2., 5.])
+    for fwd, gain in zip(fwds, gains):
+        assert_array_equal(fwd['sol']['data'], gain)
+        assert_true(not np.may_share_memory(fwd_ave['sol']['data'],
+                                            fwd['sol']['data']))
+    fwds[1]['sol']['ncol'] += 1
+    assert_raises(ValueError, average_forward_solutions, fwds)
+
+
 @testing.requires_testing_data
 def test_convert_forward():
     """Test converting forward solution between different representations
@@ -320,6 +405,8 @@ def test_average_forward_solution():
     # now let's actually do it, with one filename and one fwd
     fwd_ave = average_forward_solutions([fwd, fwd_copy])
     assert_array_equal(0.75 * fwd['sol']['data'], fwd_ave['sol']['data'])
+    fwd_ave = average_forward_solutions([fname_meeg, fwd_copy])
+    assert_array_equal(0.75 * fwd['sol']['data'], fwd_ave['sol']['data'])
     # fwd_ave_mne = read_forward_solution(fname_copy)
     # assert_array_equal(fwd_ave_mne['sol']['data'], fwd_ave['sol']['data'])
 
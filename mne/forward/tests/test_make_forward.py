@@ -4,6 +4,7 @@ import os
 import os.path as op
 from subprocess import CalledProcessError
 import warnings
+from copy import deepcopy
 
 from nose.tools import assert_raises, assert_true
 import numpy as np
@@ -16,14 +17,19 @@ from mne import (read_forward_solution, make_forward_solution,
                  do_forward_solution, read_trans,
                  convert_forward_solution, setup_volume_source_space,
                  read_source_spaces, make_sphere_model,
-                 pick_types_forward, pick_info, pick_types)
+                 pick_types_forward, pick_info, pick_types,
+                 make_bem_solution)
 from mne.utils import (requires_mne, requires_nibabel, _TempDir,
                        run_tests_if_main, slow_test, run_subprocess)
 from mne.forward._make_forward import _create_coils
-from mne.forward._compute_forward import _magnetic_dipole_field_vec
-from mne.forward import Forward
+from mne.forward._compute_forward import (_magnetic_dipole_field_vec,
+                                          _do_lin_field_coeff, _do_inf_pots,
+                                          _bem_specify_els)
+from mne.forward import _compute_forward
+from mne.forward import Forward, ForwardEngine
 from mne.source_space import (get_volume_labels_from_aseg,
                               _compare_source_spaces, setup_source_space)
+from mne.surface import _get_ico_surface, _complete_surface_info
 
 data_path = testing.data_path(download=False)
 fname_meeg = op.join(data_path, 'MEG', 'sample',
@@ -99,6 +105,240 @@ def test_magnetic_dipole():
         assert_allclose(np.median(near_fwd / far_fwd), ratio, atol=1e-1)
 
 
+def test_lin_field_coeff():
+    """Test blocked computation of BEM linear field coefficients
+    """
+    rng = np.random.RandomState(0)
+    surf = _get_ico_surface(2)
+    surf['rr'] *= 0.09
+    surf = _complete_surface_info(surf)
+    n_int = rng.randint(0, 5, 20)
+    n_pts = n_int.sum()
+    rmags = rng.randn(n_pts, 3)
+    rmags *= 0.12 / np.sqrt(np.sum(rmags ** 2, axis=1))[:, np.newaxis]
+    cosmags = rng.randn(n_pts, 3)
+    ws = rng.rand(n_pts)
+    # straightforward loop over triangles and vertices
+    want = np.zeros((len(n_int), len(surf['rr'])))
+    bins = np.repeat(np.arange(len(n_int)), n_int)
+    for tri, tri_nn, tri_area in zip(surf['tris'], surf['tri_nn'],
+                                     surf['tri_area']):
+        for vi in tri:
+            diff = rmags - surf['rr'][vi]
+            dl = np.sum(diff * diff, axis=1)
+            x = tri_area * np.sum(np.cross(diff, tri_nn) * cosmags, axis=1)
+            x /= 3.0 * dl * np.sqrt(dl)
+            want[:, vi] += np.bincount(bins, x * ws, minlength=len(n_int))
+    args = (surf['rr'], surf['tris'], surf['tri_nn'], surf['tri_area'],
+            rmags, cosmags, ws, n_int)
+    block_size = _compute_forward._lin_field_block_size
+    try:
+        for size in (1, 100, block_size):
+            _compute_forward._lin_field_block_size = size
+            assert_allclose(_do_lin_field_coeff(*args), want, rtol=1e-10,
+                            atol=0.)
+    finally:
+        _compute_forward._lin_field_block_size = block_size
+
+
+def test_bem_inf_pots():
+    """Test blocked computation of BEM infinite-medium potentials
+    """
+    rng = np.random.RandomState(0)
+    bem_rr = rng.randn(50, 3)
+    mri_rr = rng.randn(7, 3)
+    sol = rng.randn(len(bem_rr), 4)
+    for mri_Q in (None, np.linalg.qr(rng.randn(3, 3))[0]):
+        Q = np.eye(3) if mri_Q is None else mri_Q
+        # one dipole and direction at a time, see Eq. (8) in Mosher, 1999
+        want = np.empty((3 * len(mri_rr), sol.shape[1]))
+        for ri, rd in enumerate(mri_rr):
+            diff = bem_rr - rd
+            diff2 = np.sum(diff * diff, axis=1)
+            for m in range(3):
+                v0 = np.dot(diff, Q[m]) / (diff2 * np.sqrt(diff2))
+                want[3 * ri + m] = np.dot(v0, sol)
+        block_size = _compute_forward._inf_pots_block_size
+        try:
+            for size in (1, 100, block_size):
+                _compute_forward._inf_pots_block_size = size
+                assert_allclose(_do_inf_pots(mri_rr, bem_rr, mri_Q, sol),
+                                want, rtol=1e-10)
+        finally:
+            _compute_forward._inf_pots_block_size = block_size
+
+
+def test_bem_specify_els():
+    """Test interpolation of the BEM solution at EEG electrodes
+    """
+    rng = np.random.RandomState(0)
+    scalp = _get_ico_surface(2)
+    scalp['rr'] *= 0.09
+    n_rr = len(scalp['rr'])
+    bem = dict(surfs=[scalp], solution=rng.randn(n_rr, n_rr),
+               head_mri_t=dict(trans=np.eye(4)))
+    # electrodes on the vertices and a midpoint of an edge
+    tri = scalp['tris'][0]
+    els = [dict(rmag=scalp['rr'][[vi]], w=np.ones(1)) for vi in tri]
+    els.append(dict(rmag=scalp['rr'][tri[:2]], w=np.array([0.5, 0.5])))
+    mults = rng.rand(1, n_rr)
+    want = bem['solution'][np.r_[tri, tri[0]]] * mults
+    want[3] = np.mean(bem['solution'][tri[:2]], axis=0) * mults
+    assert_allclose(_bem_specify_els(bem, els, mults), want, rtol=1e-10)
+    assert_allclose(_bem_specify_els(bem, els, mults, n_jobs=2), want,
+                    rtol=1e-10)
+
+
+def test_forward_engine():
+    """Test reusing the forward setup across source and head positions
+    """
+    info = read_info(fname_raw)
+    trans = {'to': FIFF.FIFFV_COORD_HEAD, 'from': FIFF.FIFFV_COORD_MRI,
+             'trans': np.eye(4)}
+    sphere = make_sphere_model((0., 0., 0.04), 0.1, info)
+    src = setup_volume_source_space(None, pos=15., sphere=(0., 0., 40., 70.),
+                                    mindist=0.)
+    fwd = make_forward_solution(info, trans, src, sphere)
+    engine = ForwardEngine(info, trans, sphere)
+    fwd_engine = engine.make_forward(src)
+    assert_equal(engine.ch_names, fwd['sol']['row_names'])
+    assert_equal(fwd_engine['sol']['row_names'], fwd['sol']['row_names'])
+    assert_allclose(fwd_engine['sol']['data'], fwd['sol']['data'])
+    assert_allclose(fwd_engine['source_rr'], fwd['source_rr'])
+    # a new head position
+    dev_head_t = deepcopy(info['dev_head_t'])
+    dev_head_t['trans'][:3, 3] += [0.005, -0.003, 0.01]
+    info['dev_head_t'] = dev_head_t
+    fwd_moved = make_forward_solution(info, trans, src, sphere)
+    gain = engine.compute_gain(fwd['source_rr'], dev_head_t)
+    assert_allclose(gain, fwd_moved['sol']['data'])
+    assert_true(not np.allclose(gain, fwd['sol']['data']))
+    # the frames are checked even if the transformation is cached
+    bad_t = deepcopy(dev_head_t)
+    bad_t['to'] = FIFF.FIFFV_COORD_MRI
+    assert_raises(ValueError, engine.compute_gain, fwd['source_rr'], bad_t)
+    assert_allclose(engine.compute_gain(fwd['source_rr'][:3]),
+                    fwd['sol']['data'][:, :9])
+    assert_raises(ValueError, engine.compute_gain, np.zeros((2, 2)))
+    # computation in blocks of dipoles, written into a given array
+    block_size = _compute_forward._fwd_block_size
+    try:
+        _compute_forward._fwd_block_size = 7
+        out = np.zeros_like(gain)
+        engine.compute_gain(fwd['source_rr'], dev_head_t, out=out)
+        assert_allclose(out, gain)
+        fwd_blocks = make_forward_solution(info, trans, src, sphere)
+        assert_allclose(fwd_blocks['sol']['data'], gain)
+    finally:
+        _compute_forward._fwd_block_size = block_size
+    assert_raises(ValueError, engine.compute_gain, fwd['source_rr'],
+                  out=np.zeros((1, 1)))
+
+
+def test_forward_engine_bem():
+    """Test reusing the BEM setup across head positions
+    """
+    info = read_info(fname_raw)
+    trans = {'to': FIFF.FIFFV_COORD_HEAD, 'from': FIFF.FIFFV_COORD_MRI,
+             'trans': np.eye(4)}
+    # concentric spherical shells (head, skull, brain)
+    surfs = list()
+    for rad, sigma, id_ in ((0.09, 0.3, FIFF.FIFFV_BEM_SURF_ID_HEAD),
+                            (0.085, 0.006, FIFF.FIFFV_BEM_SURF_ID_SKULL),
+                            (0.08, 0.3, FIFF.FIFFV_BEM_SURF_ID_BRAIN)):
+        surf = _get_ico_surface(2)
+        surfs.append(dict(rr=surf['rr'] * rad, tris=surf['tris'],
+                          np=len(surf['rr']), ntri=len(surf['tris']),
+                          sigma=sigma, id=id_,
+                          coord_frame=FIFF.FIFFV_COORD_MRI))
+    bem = make_bem_solution(surfs)
+    src = setup_volume_source_space(None, pos=20., sphere=(0., 0., 0., 60.),
+                                    mindist=0.)
+    fwd = make_forward_solution(info, trans, src, bem)
+    # count the setups of the BEM field computation matrices
+    calls = dict(coils=0, els=0)
+    orig_funs = (_compute_forward._bem_specify_coils,
+                 _compute_forward._bem_specify_els)
+
+    def _specify_coils(*args, **kwargs):
+        calls['coils'] += 1
+        return orig_funs[0](*args, **kwargs)
+
+    def _specify_els(*args, **kwargs):
+        calls['els'] += 1
+        return orig_funs[1](*args, **kwargs)
+
+    try:
+        _compute_forward._bem_specify_coils = _specify_coils
+        _compute_forward._bem_specify_els = _specify_els
+        engine = ForwardEngine(info, trans, bem)
+        assert_equal(calls, dict(coils=1, els=1))
+        fwd_engine = engine.make_forward(src)
+        assert_equal(fwd_engine['sol']['row_names'], fwd['sol']['row_names'])
+        assert_allclose(fwd_engine['sol']['data'], fwd['sol']['data'])
+        # a new head position only needs the MEG matrices
+        dev_head_t = deepcopy(info['dev_head_t'])
+        dev_head_t['trans'][:3, 3] += [0.005, -0.003, 0.01]
+        gain = engine.compute_gain(fwd['source_rr'], dev_head_t)
+        assert_equal(calls, dict(coils=2, els=1))
+        n_meg = len(pick_types(info, meg=True, ref_meg=False, exclude=[]))
+        assert_allclose(gain[n_meg:], fwd['sol']['data'][n_meg:])
+        assert_true(not np.allclose(gain[:n_meg], fwd['sol']['data'][:n_meg]))
+        # alternating between head positions reuses the matrices
+        assert_allclose(engine.compute_gain(fwd['source_rr']),
+                        fwd['sol']['data'])
+        assert_allclose(engine.compute_gain(fwd['source_rr'], dev_head_t),
+                        gain)
+        assert_equal(calls, dict(coils=2, els=1))
+    finally:
+        (_compute_forward._bem_specify_coils,
+         _compute_forward._bem_specify_els) = orig_funs
+    info['dev_head_t'] = dev_head_t
+    fwd_moved = make_forward_solution(info, trans, src, bem)
+    assert_allclose(gain, fwd_moved['sol']['data'])
+
+
+def test_make_forward_cache():
+    """Test caching of gain matrices in MNE_CACHE_DIR
+    """
+    info = read_info(fname_evoked)
+    trans = {'to': FIFF.FIFFV_COORD_HEAD, 'from': FIFF.FIFFV_COORD_MRI,
+             'trans': np.eye(4)}
+    sphere = make_sphere_model((0., 0., 0.04), 0.1, info)
+    src = setup_volume_source_space(None, pos=20., sphere=(0., 0., 40., 70.),
+                                    mindist=0.)
+    fwd = make_forward_solution(info, trans, src, sphere)
+    orig_dir = os.getenv('MNE_CACHE_DIR', None)
+    tempdir = _TempDir()
+    try:
+        os.environ['MNE_CACHE_DIR'] = tempdir
+        make_forward_solution(info, trans, src, sphere)
+        assert_equal(len(os.listdir(tempdir)), 1)
+        fwd_cached = make_forward_solution(info, trans, src, sphere)
+        assert_equal(len(os.listdir(tempdir)), 1)
+        assert_true(isinstance(fwd_cached['sol']['data'], np.memmap))
+        assert_equal(fwd_cached['sol']['row_names'], fwd['sol']['row_names'])
+        assert_allclose(fwd_cached['sol']['data'], fwd['sol']['data'])
+        assert_allclose(fwd_cached['_orig_sol'], fwd['_orig_sol'])
+        # modifying the result does not touch the cache
+        fwd_cached['sol']['data'][:] = 0.
+        assert_allclose(fwd_cached['_orig_sol'], fwd['_orig_sol'])
+        fwd_cached = make_forward_solution(info, trans, src, sphere)
+        assert_allclose(fwd_cached['sol']['data'], fwd['sol']['data'])
+        # a new head position or channel selection is computed anew
+        info['dev_head_t']['trans'][:3, 3] += [0.005, -0.003, 0.01]
+        make_forward_solution(info, trans, src, sphere)
+        assert_equal(len(os.listdir(tempdir)), 2)
+        fwd_eeg = make_forward_solution(info, trans, src, sphere, meg=False)
+        assert_equal(len(os.listdir(tempdir)), 3)
+        assert_allclose(fwd_eeg['sol']['data'], fwd['sol']['data'][-60:])
+    finally:
+        if orig_dir is None:
+            del os.environ['MNE_CACHE_DIR']
+        else:
+            os.environ['MNE_CACHE_DIR'] = orig_dir
+
+
 @testing.requires_testing_data
 @requires_mne
 def test_make_forward_solution_kit():
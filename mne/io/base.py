@@ -30,7 +30,7 @@ from .write import (start_file, end_file, start_block, end_block,
                     write_id, write_string)
 
 from ..filter import (low_pass_filter, high_pass_filter, band_pass_filter,
-                      notch_filter, band_stop_filter, resample)
+                      notch_filter, band_stop_filter, resample, is_power2)
 from ..fixes import in1d
 from ..parallel import parallel_func
 from ..utils import (_check_fname, _check_pandas_installed,
@@ -573,7 +573,8 @@ class _BaseRaw(ProjMixin, ContainsMixin, PickDropChannelsMixin,
         the dtype parameter, which causes the data type used for representing
         the raw data to change.
 
-        The Raw object has to be constructed using preload=True (or string).
+        The Raw object has to be constructed using preload=True (or string),
+        unless "vectorized" is used (see below).
 
         Note: If n_jobs > 1, more memory is required as "len(picks) * n_times"
               additional time points need to be temporaily stored in memory.
@@ -603,8 +604,18 @@ class _BaseRaw(ProjMixin, ContainsMixin, PickDropChannelsMixin,
             Keyword arguments to pass to fun. Note that if "verbose" is passed
             as a member of ``kwargs``, it will be consumed and will override
             the default mne-python verbose level (see mne.verbose).
+            Likewise, "vectorized" will be consumed if passed. If True, fun
+            is called once with the whole (n_picks, n_times) array (or with
+            n_jobs blocks of channels) instead of once per channel, which
+            avoids the per-channel overhead for functions that already
+            operate on arrays (e.g., ``np.abs``). In this mode the data do
+            not need to be preloaded: they are then read in chunks of 10
+            seconds, and fun is applied to each chunk (in n_jobs blocks of
+            channels) as it is loaded, so it must operate sample-wise. The
+            Raw object is preloaded afterwards.
         """
-        if not self.preload:
+        vectorized = kwargs.pop('vectorized', False)
+        if not self.preload and not vectorized:
             raise RuntimeError('Raw data needs to be preloaded. Use '
                                'preload=True (or string) in the constructor.')
         if picks is None:
@@ -613,6 +624,11 @@ class _BaseRaw(ProjMixin, ContainsMixin, PickDropChannelsMixin,
         if not callable(fun):
             raise ValueError('fun needs to be a function')
 
+        if vectorized:
+            self._apply_function_vectorized(fun, picks, dtype, n_jobs,
+                                            *args, **kwargs)
+            return
+
         data_in = self._data
         if dtype is not None and dtype != self._data.dtype:
             self._data = self._data.astype(dtype)
@@ -630,8 +646,46 @@ class _BaseRaw(ProjMixin, ContainsMixin, PickDropChannelsMixin,
             for pp, p in enumerate(picks):
                 self._data[p, :] = data_picks_new[pp]
 
+    def _apply_function_vectorized(self, fun, picks, dtype, n_jobs,
+                                   *args, **kwargs):
+        """Apply a function to blocks of channels at once"""
+        picks = np.asarray(picks, int)
+        if dtype is None:
+            dtype = self._data.dtype if self.preload else self._dtype
+        parallel, p_fun, n_jobs = parallel_func(_check_fun, n_jobs)
+        blocks = [b for b in np.array_split(picks, n_jobs) if len(b) > 0]
+
+        def _apply(data):
+            if n_jobs == 1:
+                data[picks] = _check_fun(fun, data[picks], *args, **kwargs)
+            else:
+                data_blocks_new = parallel(p_fun(fun, data[b], *args,
+                                                 **kwargs) for b in blocks)
+                for b, data_new in zip(blocks, data_blocks_new):
+                    data[b] = data_new
+
+        if self.preload:
+            if dtype != self._data.dtype:
+                self._data = self._data.astype(dtype)
+            _apply(self._data)
+            return
+
+        # read the data chunk by chunk straight into the new array, and
+        # transform each chunk in place
+        data = np.empty((self.info['nchan'], self.n_times), dtype=dtype)
+        chunk_size = int(np.ceil(10. * self.info['sfreq']))
+        for start in range(0, self.n_times, chunk_size):
+            stop = min(start + chunk_size, self.n_times)
+            this_data = data[:, start:stop]
+            self._read_segment(start, stop, data_buffer=this_data)
+            _apply(this_data)
+        self._data = data
+        self.preload = True
+        self.close()
+
     @verbose
-    def apply_hilbert(self, picks, envelope=False, n_jobs=1, verbose=None):
+    def apply_hilbert(self, picks, envelope=False, n_jobs=1, n_fft=None,
+                      verbose=None):
         """ Compute analytic signal or envelope for a subset of channels.
 
         If envelope=False, the analytic signal for the channels defined in
@@ -663,6 +717,15 @@ class _BaseRaw(ProjMixin, ContainsMixin, PickDropChannelsMixin,
             Compute the envelope signal of each channel.
         n_jobs: int
             Number of jobs to run in parallel.
+        n_fft : int | None
+            Length of the FFTs to use. If None (default), the transform of
+            each channel is computed over the whole signal at once. If int
+            (preferably a power of 2), the signal is processed in
+            overlapping blocks of n_fft samples (overlap-save), each block
+            contributing its central n_fft // 2 samples. This bounds the
+            memory used per channel, and is accurate as long as n_fft / 4
+            samples span several cycles of the lowest frequency present
+            in the (band-limited) data.
         verbose : bool, str, int, or None
             If not None, override default verbose level (see mne.verbose).
             Defaults to self.verbose.
@@ -681,11 +744,18 @@ class _BaseRaw(ProjMixin, ContainsMixin, PickDropChannelsMixin,
         by computing the analytic signal in sensor space, applying the MNE
         inverse, and computing the envelope in source space.
         """
+        if n_fft is not None:
+            n_fft = int(n_fft)
+            if n_fft < 4:
+                raise ValueError('n_fft must be at least 4, got %s' % n_fft)
+            if not is_power2(n_fft):
+                warnings.warn("FFT length is not a power of 2. Can be "
+                              "slower.")
         if envelope:
-            self.apply_function(_envelope, picks, None, n_jobs)
+            self.apply_function(_hilbert, picks, None, n_jobs, n_fft, True)
         else:
-            from scipy.signal import hilbert
-            self.apply_function(hilbert, picks, np.complex64, n_jobs)
+            self.apply_function(_hilbert, picks, np.complex64, n_jobs, n_fft,
+                                False)
 
     @verbose
     def filter(self, l_freq, h_freq, picks=None, filter_length='10s',
@@ -1397,7 +1467,8 @@ class _BaseRaw(ProjMixin, ContainsMixin, PickDropChannelsMixin,
                               use_first_samp)
 
     def estimate_rank(self, tstart=0.0, tstop=30.0, tol=1e-4,
-                      return_singular=False, picks=None, scalings='norm'):
+                      return_singular=False, picks=None, scalings='norm',
+                      method='svd'):
         """Estimate rank of the raw data
 
         This function is meant to provide a reasonable estimate of the rank.
@@ -1433,6 +1504,11 @@ class _BaseRaw(ProjMixin, ContainsMixin, PickDropChannelsMixin,
             If 'norm' data will be scaled by internally computed
             channel-wise norms.
             Defaults to 'norm'.
+        method : 'svd' | 'gram'
+            If 'svd' (default), a full SVD of the data is computed. If
+            'gram', the singular values are obtained from the eigenvalues
+            of the (n_channels, n_channels) Gram matrix, which is much
+            faster for long time spans.
 
         Returns
         -------
@@ -1472,7 +1548,7 @@ class _BaseRaw(ProjMixin, ContainsMixin, PickDropChannelsMixin,
         out = _estimate_rank_meeg_signals(
             data, pick_info(self.info, picks),
             scalings=scalings, tol=tol, return_singular=return_singular,
-            copy=False)
+            copy=False, method=method)
 
         return out
 
@@ -1549,6 +1625,12 @@ class _BaseRaw(ProjMixin, ContainsMixin, PickDropChannelsMixin,
             on the hard drive (slower, requires less memory). If preload is
             None, preload=True or False is inferred using the preload status
             of the raw files passed in.
+
+        Notes
+        -----
+        When preloading, the output buffer is allocated only once for all
+        instances in ``raws``. Appending many instances one at a time thus
+        copies much more data than passing them all at once.
         """
         from .fiff.raw import RawFIF
         from .kit.kit import RawKIT
@@ -1578,32 +1660,29 @@ class _BaseRaw(ProjMixin, ContainsMixin, PickDropChannelsMixin,
                 self._data = None
             self.preload = False
         else:
-            # do the concatenation ourselves since preload might be a string
+            # do the concatenation ourselves since preload might be a string.
+            # The total size is known, so a single buffer is allocated and
+            # each instance is copied (or read from disk) directly into it
             nchan = self.info['nchan']
-            c_ns = np.cumsum([rr.n_times for rr in ([self] + raws)])
+            c_ns = np.cumsum([0] + [rr.n_times for rr in all_raws])
             nsamp = c_ns[-1]
-
-            if not self.preload:
-                this_data = self._read_segment()[0]
-            else:
-                this_data = self._data
+            dtype = np.result_type(*[rr._data.dtype if rr.preload
+                                     else rr._dtype for rr in all_raws])
 
             # allocate the buffer
             if isinstance(preload, string_types):
-                _data = np.memmap(preload, mode='w+', dtype=this_data.dtype,
+                _data = np.memmap(preload, mode='w+', dtype=dtype,
                                   shape=(nchan, nsamp))
             else:
-                _data = np.empty((nchan, nsamp), dtype=this_data.dtype)
-
-            _data[:, 0:c_ns[0]] = this_data
+                _data = np.empty((nchan, nsamp), dtype=dtype)
 
-            for ri in range(len(raws)):
-                if not raws[ri].preload:
+            for ri, rr in enumerate(all_raws):
+                data_buffer = _data[:, c_ns[ri]:c_ns[ri + 1]]
+                if not rr.preload:
                     # read the data directly into the buffer
-                    data_buffer = _data[:, c_ns[ri]:c_ns[ri + 1]]
-                    raws[ri]._read_segment(data_buffer=data_buffer)
+                    rr._read_segment(data_buffer=data_buffer)
                 else:
-                    _data[:, c_ns[ri]:c_ns[ri + 1]] = raws[ri]._data
+                    data_buffer[:] = rr._data
             self._data = _data
             self.preload = True
 
@@ -1979,10 +2058,24 @@ def _write_raw_buffer(fid, buf, cals, fmt, inv_comp):
     write_function(fid, FIFF.FIFF_DATA_BUFFER, buf)
 
 
-def _envelope(x):
-    """ Compute envelope signal """
+def _hilbert(x, n_fft=None, envelope=False):
+    """ Compute analytic signal or envelope, optionally in blocks """
     from scipy.signal import hilbert
-    return np.abs(hilbert(x))
+    n_x = len(x)
+    if n_fft is None or n_fft >= n_x:
+        out = hilbert(x)
+        return np.abs(out) if envelope else out
+    # overlap-save: keep the central half of each block of n_fft samples
+    out = np.empty(n_x, np.float64 if envelope else np.complex128)
+    n_keep = n_fft // 2
+    n_pad = (n_fft - n_keep) // 2
+    for start in range(0, n_x, n_keep):
+        stop = min(start + n_keep, n_x)
+        block_start = max(min(start - n_pad, n_x - n_fft), 0)
+        this_out = hilbert(x[block_start:block_start + n_fft])
+        this_out = this_out[start - block_start:stop - block_start]
+        out[start:stop] = np.abs(this_out) if envelope else this_out
+    return out
 
 
 def _check_raw_compatibility(raw):
@@ -2021,10 +2114,13 @@ def concatenate_raws(raws, preload=None, events_list=None):
     ----------
     raws : list
         list of Raw instances to concatenate (in order).
-    preload : bool, or None
+    preload : bool, str, or None
         If None, preload status is inferred using the preload status of the
         raw files passed in. True or False sets the resulting raw file to
-        have or not have data preloaded.
+        have or not have data preloaded. If str, the data are concatenated
+        into a memory-mapped file of that name. When preloading, the
+        concatenated data are allocated once and each instance is copied
+        (or read from disk) directly into place.
     events_list : None | list
         The events to concatenate. Defaults to None.
 
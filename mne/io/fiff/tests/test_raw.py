@@ -837,6 +837,22 @@ def test_hilbert():
     env = np.abs(raw._data[picks, :])
     assert_allclose(env, raw2._data[picks, :], rtol=1e-2, atol=1e-13)
 
+    # blockwise computation on band-limited data
+    raw = Raw(fif_fname, preload=True)
+    raw.filter(8., 12., picks=picks)
+    raw2 = raw.copy()
+    raw3 = raw.copy()
+    raw.apply_hilbert(picks, envelope=True)
+    raw2.apply_hilbert(picks, envelope=True, n_fft=1024)
+    raw3.apply_hilbert(picks, n_fft=1024)
+    assert_true(raw2._data.dtype == np.float64)
+    assert_true(raw3._data.dtype == np.complex64)
+    env = raw._data[picks, 1024:-1024]
+    atol = 0.05 * np.abs(env).max()
+    assert_allclose(env, raw2._data[picks, 1024:-1024], atol=atol)
+    assert_allclose(env, np.abs(raw3._data[picks, 1024:-1024]), atol=atol)
+    assert_raises(ValueError, raw.apply_hilbert, picks, n_fft=2)
+
 
 @testing.requires_testing_data
 def test_raw_copy():
@@ -95,11 +95,46 @@ class Info(dict):
         st %= non_empty
         return st
 
+    def __deepcopy__(self, memodict):
+        """Make a deep copy, copying channel dicts without recursion"""
+        result = Info.__new__(Info)
+        memodict[id(self)] = result
+        for key, val in self.items():
+            if key == 'chs' and isinstance(val, list):
+                val = [_copy_ch(ch, memodict) for ch in val]
+            else:
+                val = deepcopy(val, memodict)
+            result[key] = val
+        return result
+
     def _anonymize(self):
         if self.get('subject_info') is not None:
             del self['subject_info']
 
 
+_immutable_types = (int, float, bool, complex, np.generic, type(None)) + \
+    string_types
+
+
+def _copy_ch(ch, memodict):
+    """Deep copy a channel dict
+
+    Channel dicts hold scalars and a few small arrays (loc, coil_trans,
+    eeg_loc), so copying them directly is much faster than the generic
+    recursive deepcopy.
+    """
+    if type(ch) is not dict:
+        return deepcopy(ch, memodict)
+    out = dict()
+    for key, val in ch.items():
+        if isinstance(val, np.ndarray):
+            val = val.copy()
+        elif not isinstance(val, _immutable_types):
+            val = deepcopy(val, memodict)
+        out[key] = val
+    return out
+
+
 def read_fiducials(fname):
     """Read fiducials from a fiff file
 
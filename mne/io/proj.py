@@ -64,6 +64,18 @@ class ProjMixin(object):
         return (len(self.info['projs']) > 0 and
                 all(p['active'] for p in self.info['projs']))
 
+    def _project(self, data):
+        """Apply the SSP operator self._projector to (n_channels, ...) data
+
+        The low-rank decomposition of the operator is computed once and
+        cached until the projector changes.
+        """
+        cache = getattr(self, '_projector_cache', None)
+        if cache is None or cache[0] is not self._projector:
+            cache = (self._projector, _proj_low_rank(self._projector))
+            self._projector_cache = cache
+        return _apply_proj_low_rank(self._projector, cache[1], data)
+
     def add_proj(self, projs, remove_existing=False):
         """Add SSP projection vectors
 
@@ -162,12 +174,12 @@ class ProjMixin(object):
                 if self.preload:
                     data = np.empty_like(self._data)
                     for ii, e in enumerate(self._data):
-                        data[ii] = self._preprocess(np.dot(self._projector, e),
+                        data[ii] = self._preprocess(self._project(e),
                                                     self.verbose)
                 else:  # get data knows what to do.
                     data = data()
             else:
-                data = np.dot(self._projector, data)
+                data = self._project(data)
             break
         logger.info('SSP projectors applied...')
         if hasattr(self, '_data'):
@@ -509,6 +521,33 @@ def make_projector(projs, ch_names, bads=[], include_active=True):
     return proj, nproj, U
 
 
+def _proj_low_rank(projector):
+    """Get V such that projector == I - V V^T, if that is cheaper to apply
+
+    SSP operators (and their channel subsets) have this form, with V having
+    as many columns as there are projection vectors. None is returned if the
+    operator is not of this form or if the dense product is cheaper.
+    """
+    if projector is None or not np.allclose(projector, projector.T):
+        return None
+    n_chan = len(projector)
+    eig, eigvec = linalg.eigh(np.eye(n_chan) - projector)
+    if eig.min() < -1e-6:
+        return None
+    keep = eig > max(eig.max(), 1.) * 1e-12
+    if 3 * np.sum(keep) >= n_chan:
+        return None
+    return eigvec[:, keep] * np.sqrt(eig[keep])
+
+
+def _apply_proj_low_rank(projector, proj_vecs, data):
+    """Compute np.dot(projector, data) using the low-rank form if available
+    """
+    if proj_vecs is None:
+        return np.dot(projector, data)
+    return data - np.dot(proj_vecs, np.dot(proj_vecs.T, data))
+
+
 def make_projector_info(info, include_active=True):
     """Make an SSP operator using the measurement info
 
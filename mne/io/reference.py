@@ -104,6 +104,8 @@ def _apply_reference(inst, ref_from, ref_to=None, copy=True):
     if isinstance(inst, Evoked):
         data = inst.data
     else:
+        if isinstance(inst, Epochs):
+            inst._own_data()
         data = inst._data
 
     # Compute reference
@@ -4,10 +4,11 @@
 
 import numpy as np
 import os.path as op
-from nose.tools import assert_equal, assert_raises
+from numpy.testing import assert_allclose
+from nose.tools import assert_equal, assert_raises, assert_true
 
 from mne import create_info
-from mne.io import RawArray
+from mne.io import RawArray, Raw
 from mne.utils import logger, set_log_file, slow_test, _TempDir
 
 
@@ -56,3 +57,37 @@ def test_apply_function_verbose():
             assert_equal(len(fid.readlines()), n_chan)
     finally:
         set_log_file(None)
+
+
+def test_apply_function_vectorized():
+    """Test vectorized apply function on preloaded and on-disk data
+    """
+    rng = np.random.RandomState(0)
+    n_chan = 4
+    n_times = 1000
+    ch_names = [str(ii) for ii in range(n_chan)]
+    data = rng.randn(n_chan, n_times)
+    raw = RawArray(data.copy(), create_info(ch_names, 10., 'mag'))
+    picks = [0, 2]
+    raw.apply_function(np.abs, picks, None, 1, vectorized=True)
+    assert_allclose(raw._data[picks], np.abs(data[picks]))
+    assert_allclose(raw._data[[1, 3]], data[[1, 3]])
+    raw_2 = RawArray(data.copy(), create_info(ch_names, 10., 'mag'))
+    raw_2.apply_function(np.abs, picks, None, 2, vectorized=True)
+    assert_allclose(raw._data, raw_2._data)
+    assert_raises(ValueError, raw.apply_function, bad_2, None, None, 1,
+                  vectorized=True)
+
+    # data not preloaded are read in chunks
+    tempdir = _TempDir()
+    fname = op.join(tempdir, 'test_raw.fif')
+    RawArray(data.copy(), create_info(ch_names, 10., 'mag')).save(fname)
+    raw_3 = Raw(fname, preload=False)
+    assert_raises(RuntimeError, raw_3.apply_function, np.abs, picks, None, 1)
+    raw_3.apply_function(np.abs, picks, None, 1, vectorized=True)
+    assert_true(raw_3.preload)
+    assert_allclose(raw_3._data, raw._data, rtol=1e-6, atol=1e-20)
+    for n_jobs in (2, -1):
+        raw_3 = Raw(fname, preload=False)
+        raw_3.apply_function(np.abs, picks, None, n_jobs, vectorized=True)
+        assert_allclose(raw_3._data, raw._data, rtol=1e-6, atol=1e-20)
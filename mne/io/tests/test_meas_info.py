@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import os.path as op
+from copy import deepcopy
 
 from nose.tools import assert_false, assert_equal, assert_raises, assert_true
 import numpy as np
@@ -123,6 +124,26 @@ def test_info():
         assert_true(all(k in info_str for k in obj.info.keys()))
 
 
+def test_info_deepcopy():
+    """Test deep copying of info"""
+    info = create_info(['a', 'b'], 1000., ['eeg', 'mag'])
+    info['chs'][0]['loc'] = np.arange(12.)
+    info['chs'][1]['extra'] = dict(x=[1])
+    info2 = deepcopy(info)
+    assert_true(isinstance(info2, Info))
+    assert_equal(set(info.keys()), set(info2.keys()))
+    for ch, ch2 in zip(info['chs'], info2['chs']):
+        assert_true(ch is not ch2)
+        assert_array_equal(ch['loc'], ch2['loc'])
+        assert_true(ch['loc'] is not ch2['loc'])
+    info2['chs'][0]['loc'][0] = 42.
+    info2['chs'][1]['extra']['x'].append(2)
+    info2['chs'][1]['ch_name'] = 'c'
+    assert_equal(info['chs'][0]['loc'][0], 0.)
+    assert_equal(info['chs'][1]['extra']['x'], [1])
+    assert_equal(info['chs'][1]['ch_name'], 'b')
+
+
 def test_read_write_info():
     """Test IO of info
     """
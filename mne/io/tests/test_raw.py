@@ -1,5 +1,7 @@
 # Generic tests that all raw classes should run
-from numpy.testing import assert_allclose
+import numpy as np
+from numpy.testing import assert_allclose, assert_equal
+from nose.tools import assert_true
 
 
 def _test_concat(reader, *args):
@@ -13,6 +15,15 @@ def _test_concat(reader, *args):
         if data is None:
             data = raw1[:, :][0]
         assert_allclose(data, raw1[:, :][0])
+    # preload while concatenating, reading directly into the output buffer
+    for first_preload in (True, False):
+        raw1 = reader(*args, preload=first_preload)
+        raw2 = reader(*args, preload=False)
+        raw3 = reader(*args, preload=True)
+        raw1.append([raw2, raw3], preload=True)
+        assert_true(raw1.preload)
+        assert_equal(raw1.n_times, 3 * raw2.n_times)
+        assert_allclose(np.tile(raw2[:, :][0], 3), raw1[:, :][0])
     for first_preload in (True, False):
         raw = reader(*args, preload=first_preload)
         data = raw[:, :][0]
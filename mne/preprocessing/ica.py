@@ -1141,6 +1141,7 @@ class ICA(ContainsMixin):
             epochs = epochs.copy()
 
         # restore epochs, channels, tsl order
+        epochs._own_data()
         epochs._data[:, picks] = np.array(np.split(data,
                                           len(epochs.events), 1))
         epochs.preload = True
@@ -114,6 +114,7 @@ def fix_stim_artifact(inst, events=None, event_id=None, tmin=0.,
         e_start = int(np.ceil(inst.info['sfreq'] * inst.tmin))
         first_samp = s_start - e_start
         last_samp = s_end - e_start
+        inst._own_data()
         data = inst._data
         for epoch in data:
             _fix_artifact(epoch, window, picks, first_samp, last_samp, mode)
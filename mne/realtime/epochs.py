@@ -405,7 +405,7 @@ class RtEpochs(_BaseEpochs):
 
         # apply SSP
         if self.proj and self._projector is not None:
-            epoch = np.dot(self._projector, epoch)
+            epoch = self._project(epoch)
 
         # Detrend, baseline correct, decimate
         epoch = self._preprocess(epoch, verbose='ERROR')
@@ -2066,10 +2066,111 @@ def _points_outside_surface(rr, surf, n_jobs=1, verbose=None):
     """
     rr = np.atleast_2d(rr)
     assert rr.shape[1] == 3
-    parallel, p_fun, _ = parallel_func(_get_solids, n_jobs)
-    tot_angles = parallel(p_fun(surf['rr'][tris], rr)
-                          for tris in np.array_split(surf['tris'], n_jobs))
-    return np.abs(np.sum(tot_angles, axis=0) / (2 * np.pi) - 1.0) > 1e-5
+    if len(rr) > _ray_cast_min_points:
+        outside, check = _ray_cast_outside(rr, surf['rr'][surf['tris']])
+        check = np.where(check)[0]
+    else:
+        outside = np.zeros(len(rr), bool)
+        check = np.arange(len(rr))
+    if len(check) > 0:
+        # the exact solid angle test for points near the surface
+        parallel, p_fun, _ = parallel_func(_get_solids, n_jobs)
+        tot_angles = parallel(p_fun(surf['rr'][tris], rr[check])
+                              for tris in np.array_split(surf['tris'], n_jobs))
+        outside[check] = np.abs(np.sum(tot_angles, axis=0) /
+                                (2 * np.pi) - 1.0) > 1e-5
+    return outside
+
+
+# Below this many points the grid setup costs more than the solid angles
+_ray_cast_min_points = 5
+
+
+def _ray_cast_outside(rr, tri_rrs, n_points=10000):
+    """Classify points against a closed surface by casting rays along +z
+
+    The triangles are binned on a regular grid in the xy plane, so each
+    ray is only tested against the triangles whose bounding boxes cover
+    its grid cell, and a point is outside when its ray crosses the surface
+    an even number of times.
+
+    Parameters
+    ----------
+    rr : ndarray, shape (n_points, 3)
+        The points to check.
+    tri_rrs : ndarray, shape (n_tris, 3, 3)
+        The triangle vertices of the closed surface.
+    n_points : int
+        The number of points to process at once.
+
+    Returns
+    -------
+    outside : ndarray of bool, shape (n_points,)
+        Whether each point is outside the surface.
+    ambiguous : ndarray of bool, shape (n_points,)
+        Points whose rays graze an edge or vertex, or that lie on the
+        surface. These need to be checked with the solid angles instead.
+    """
+    outside = np.ones(len(rr), bool)
+    ambiguous = np.zeros(len(rr), bool)
+    lo, hi = tri_rrs.min(axis=(0, 1)), tri_rrs.max(axis=(0, 1))
+    dist_tol = 1e-6 * np.max(hi - lo)
+    idx = np.where(np.all((rr >= lo - dist_tol) & (rr <= hi + dist_tol),
+                          axis=1))[0]
+    if len(idx) == 0:
+        return outside, ambiguous
+
+    # barycentric coordinates in the xy projection
+    v0 = tri_rrs[:, 0]
+    e1 = tri_rrs[:, 1] - v0
+    e2 = tri_rrs[:, 2] - v0
+    det = e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0]
+    bary_tol = 1e-6
+
+    # bin the triangles by the xy cells their bounding boxes overlap
+    n_tris = len(tri_rrs)
+    n_grid = max(int(np.sqrt(n_tris)), 1)
+    cell = np.maximum((hi - lo)[:2], dist_tol) / n_grid
+
+    def _cells(xy):
+        return np.clip(np.floor((xy - lo[:2]) / cell).astype(int),
+                       0, n_grid - 1)
+
+    tri_lo = _cells(tri_rrs[:, :, :2].min(axis=1))
+    n_span = _cells(tri_rrs[:, :, :2].max(axis=1)) - tri_lo + 1
+    counts = n_span[:, 0] * n_span[:, 1]
+    # triangles parallel to the rays never cross them, and rays in their
+    # plane graze the neighboring triangles
+    counts[np.abs(det) <= 1e-12 * cell[0] * cell[1]] = 0
+    tri_idx = np.repeat(np.arange(n_tris), counts)
+    offset = np.arange(len(tri_idx)) - np.repeat(np.cumsum(counts) - counts,
+                                                 counts)
+    tri_cells = ((tri_lo[tri_idx, 0] + offset // n_span[tri_idx, 1]) *
+                 n_grid + tri_lo[tri_idx, 1] + offset % n_span[tri_idx, 1])
+    order = np.argsort(tri_cells, kind='mergesort')
+    tri_idx = tri_idx[order]
+    cell_ptr = np.searchsorted(tri_cells[order], np.arange(n_grid ** 2 + 1))
+
+    for pi in np.array_split(idx, max(len(idx) // n_points, 1)):
+        p_cells = _cells(rr[pi, :2])
+        p_cells = p_cells[:, 0] * n_grid + p_cells[:, 1]
+        n_cand = cell_ptr[p_cells + 1] - cell_ptr[p_cells]
+        p_idx = np.repeat(np.arange(len(pi)), n_cand)
+        cand = tri_idx[np.repeat(cell_ptr[p_cells], n_cand) +
+                       np.arange(len(p_idx)) -
+                       np.repeat(np.cumsum(n_cand) - n_cand, n_cand)]
+        d = rr[pi[p_idx]] - v0[cand]
+        this_e1, this_e2, this_det = e1[cand], e2[cand], det[cand]
+        u = (d[:, 0] * this_e2[:, 1] - d[:, 1] * this_e2[:, 0]) / this_det
+        v = (this_e1[:, 0] * d[:, 1] - this_e1[:, 1] * d[:, 0]) / this_det
+        bary = np.minimum(np.minimum(u, v), 1. - u - v)
+        hit = bary >= -bary_tol
+        dz = u * this_e1[:, 2] + v * this_e2[:, 2] - d[:, 2]
+        graze = hit & ((bary <= bary_tol) | (np.abs(dz) <= dist_tol))
+        n_cross = np.bincount(p_idx[hit & (dz > 0)], minlength=len(pi))
+        outside[pi] = n_cross % 2 == 0
+        ambiguous[pi] = np.bincount(p_idx[graze], minlength=len(pi)) > 0
+    return outside, ambiguous
 
 
 def _get_solids(tri_rrs, fros):
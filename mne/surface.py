@@ -184,22 +184,7 @@ def read_bem_solution(fname, verbose=None):
     """
     logger.info('Loading surfaces...')
     bem_surfs = read_bem_surfaces(fname, patch_stats=True, verbose=False)
-    if len(bem_surfs) == 3:
-        logger.info('Three-layer model surfaces loaded.')
-        needed = np.array([FIFF.FIFFV_BEM_SURF_ID_HEAD,
-                           FIFF.FIFFV_BEM_SURF_ID_SKULL,
-                           FIFF.FIFFV_BEM_SURF_ID_BRAIN])
-        if not all(x['id'] in needed for x in bem_surfs):
-            raise RuntimeError('Could not find necessary BEM surfaces')
-        # reorder surfaces as necessary (shouldn't need to?)
-        reorder = [None] * 3
-        for x in bem_surfs:
-            reorder[np.where(x['id'] == needed)[0][0]] = x
-        bem_surfs = reorder
-    elif len(bem_surfs) == 1:
-        if not bem_surfs[0]['id'] == FIFF.FIFFV_BEM_SURF_ID_BRAIN:
-            raise RuntimeError('BEM Surfaces not found')
-        logger.info('Homogeneous model surface loaded.')
+    bem_surfs = _order_surfaces(bem_surfs)
 
     # convert from surfaces to solution
     bem = dict(surfs=bem_surfs)
@@ -242,6 +227,39 @@ def read_bem_solution(fname, verbose=None):
         sol = tag.data
         nsol = dims[0]
 
+    _add_gamma_multipliers(bem)
+    bem['sol_name'] = fname
+    bem['solution'] = sol
+    bem['nsol'] = nsol
+    bem['bem_method'] = method
+    bem['is_sphere'] = False
+    logger.info('Loaded %s BEM solution from %s', bem['bem_method'], fname)
+    return bem
+
+
+def _order_surfaces(bem_surfs):
+    """Check the BEM surfaces and put them in the head, skull, brain order"""
+    if len(bem_surfs) == 3:
+        logger.info('Three-layer model surfaces loaded.')
+        needed = np.array([FIFF.FIFFV_BEM_SURF_ID_HEAD,
+                           FIFF.FIFFV_BEM_SURF_ID_SKULL,
+                           FIFF.FIFFV_BEM_SURF_ID_BRAIN])
+        if not all(x['id'] in needed for x in bem_surfs):
+            raise RuntimeError('Could not find necessary BEM surfaces')
+        # reorder surfaces as necessary (shouldn't need to?)
+        reorder = [None] * 3
+        for x in bem_surfs:
+            reorder[np.where(x['id'] == needed)[0][0]] = x
+        bem_surfs = reorder
+    elif len(bem_surfs) == 1:
+        if not bem_surfs[0]['id'] == FIFF.FIFFV_BEM_SURF_ID_BRAIN:
+            raise RuntimeError('BEM Surfaces not found')
+        logger.info('Homogeneous model surface loaded.')
+    return bem_surfs
+
+
+def _add_gamma_multipliers(bem):
+    """Add the conductivity-dependent factors to a BEM"""
     # Gamma factors and multipliers
     bem['sigma'] = np.array([surf['sigma'] for surf in bem['surfs']])
     # Dirty trick for the zero conductivity outside
@@ -252,13 +270,6 @@ def read_bem_solution(fname, verbose=None):
     assert len(bem['surfs']) == len(bem['field_mult'])
     bem['gamma'] = ((sigma[1:] - sigma[:-1])[np.newaxis, :] /
                     (sigma[1:] + sigma[:-1])[:, np.newaxis])
-    bem['sol_name'] = fname
-    bem['solution'] = sol
-    bem['nsol'] = nsol
-    bem['bem_method'] = method
-    bem['is_sphere'] = False
-    logger.info('Loaded %s BEM solution from %s', bem['bem_method'], fname)
-    return bem
 
 
 _surf_dict = {'inner_skull': FIFF.FIFFV_BEM_SURF_ID_BRAIN,
@@ -2,12 +2,132 @@
 #
 # License: BSD 3 clause
 
+import os
+
 import numpy as np
-from numpy.testing import assert_almost_equal
+from numpy.polynomial import legendre
+from numpy.testing import assert_almost_equal, assert_allclose
+from nose.tools import assert_true, assert_raises
 
+from mne import make_bem_solution
+from mne.bem import _bem_solution_cache
 from mne.preprocessing.maxfilter import fit_sphere_to_headshape
 from mne.io.constants import FIFF
 from mne.transforms import rotation
+from mne.surface import _get_ico_surface
+from mne.forward._compute_forward import (_bem_specify_els, _bem_specify_coils,
+                                          _bem_pot_or_field, _sphere_field)
+from mne.utils import _TempDir, run_tests_if_main
+
+
+def _sphere_surfs(radii, sigmas, ico):
+    """Make spherical BEM surfaces"""
+    ids = [FIFF.FIFFV_BEM_SURF_ID_HEAD, FIFF.FIFFV_BEM_SURF_ID_SKULL,
+           FIFF.FIFFV_BEM_SURF_ID_BRAIN][-len(radii):]
+    surfs = list()
+    for rad, sigma, id_ in zip(radii, sigmas, ids):
+        surf = _get_ico_surface(ico)
+        surfs.append(dict(rr=surf['rr'] * rad, tris=surf['tris'],
+                          np=len(surf['rr']), ntri=len(surf['tris']),
+                          sigma=sigma, id=id_,
+                          coord_frame=FIFF.FIFFV_COORD_MRI))
+    return surfs
+
+
+def _bem_fields(bem, rr, els, coils):
+    """Compute EEG potentials and MEG fields with a BEM solution"""
+    bem['head_mri_t'] = dict(trans=np.eye(4), to=FIFF.FIFFV_COORD_MRI)
+    bem['head_mri_t']['from'] = FIFF.FIFFV_COORD_HEAD
+    mults = np.repeat(bem['source_mult'] / (4.0 * np.pi),
+                      [len(s['rr']) for s in bem['surfs']])[np.newaxis, :]
+    bem_rr = np.concatenate([s['rr'] for s in bem['surfs']])
+    sol = _bem_specify_els(bem, els, mults)
+    eeg = _bem_pot_or_field(rr, rr, np.eye(3), els, sol, bem_rr, 1, 'eeg')
+    sol = _bem_specify_coils(bem, coils, FIFF.FIFFV_COORD_HEAD, mults, 1)
+    meg = _bem_pot_or_field(rr, rr, None, coils, sol, bem_rr, 1, 'meg')
+    return eeg, meg
+
+
+def test_make_bem_solution():
+    """Test BEM solution computation with spherical surfaces
+    """
+    rng = np.random.RandomState(0)
+    radius, sigma = 0.09, 0.3
+    # radial dipoles
+    rr = rng.randn(5, 3)
+    rr /= np.sqrt(np.sum(rr * rr, axis=1))[:, np.newaxis]
+    rr *= np.array([0.01, 0.02, 0.03, 0.04, 0.05])[:, np.newaxis]
+    # EEG electrodes on the scalp and MEG magnetometers above it
+    sensors = rng.randn(20, 3)
+    sensors[:, 2] = np.abs(sensors[:, 2])
+    sensors /= np.sqrt(np.sum(sensors * sensors, axis=1))[:, np.newaxis]
+    els = [dict(rmag=r[np.newaxis] * radius, w=np.ones(1)) for r in sensors]
+    coils = [dict(rmag=r[np.newaxis] * 0.12, cosmag=r[np.newaxis],
+                  w=np.ones(1), r0=r * 0.12, ex=np.array([1., 0., 0.]),
+                  ey=np.array([0., 1., 0.]), ez=np.array([0., 0., 1.]),
+                  coil_class=FIFF.FWD_COILC_MAG,
+                  coord_frame=FIFF.FIFFV_COORD_HEAD) for r in sensors]
+
+    # homogeneous sphere, compare to the analytical solutions
+    bem = make_bem_solution(_sphere_surfs([radius], [sigma], 3))
+    assert_true(bem['solution'].shape == (642, 642))
+    assert_true(not bem['is_sphere'])
+    eeg, meg = _bem_fields(bem, rr, els, coils)
+    meg_sphere = _sphere_field(rr, coils, dict(r0=np.zeros(3)))
+    assert_allclose(meg, meg_sphere, rtol=1e-2, atol=1e-3 * np.abs(meg).max())
+    ns = np.arange(400.)
+    for ri, r in enumerate(rr):
+        t = np.sqrt(np.sum(r * r)) / radius
+        coef = np.r_[0, (2 * ns[1:] + 1) * t ** (ns[1:] - 1)]
+        eeg_sphere = legendre.legval(np.dot(sensors, r) / (t * radius), coef)
+        eeg_sphere /= 4 * np.pi * sigma * radius ** 2
+        eeg_bem = np.dot(r / (t * radius), eeg[3 * ri:3 * ri + 3])
+        assert_allclose(eeg_bem, eeg_sphere, rtol=2e-2,
+                        atol=1e-2 * np.abs(eeg_sphere).max())
+
+    # three layers of equal conductivity give the same fields as the
+    # outermost one alone
+    radii = radius * np.array([1.0, 0.95, 0.9])
+    bem_1 = make_bem_solution(_sphere_surfs(radii[:1], [sigma], 2))
+    bem_3 = make_bem_solution(_sphere_surfs(radii, [sigma] * 3, 2))
+    assert_true(bem_3['solution'].shape == (486, 486))
+    for field_1, field_3 in zip(_bem_fields(bem_1, rr, els, coils),
+                                _bem_fields(bem_3, rr, els, coils)):
+        assert_allclose(field_3, field_1, rtol=1e-2,
+                        atol=1e-3 * np.abs(field_1).max())
+    bem_ip = make_bem_solution(_sphere_surfs(radii, [sigma, 0.006, sigma], 2))
+    assert_true(np.isfinite(bem_ip['solution']).all())
+    assert_raises(RuntimeError, make_bem_solution,
+                  _sphere_surfs(radii[1:], [sigma] * 2, 2))
+
+
+def test_bem_solution_cache():
+    """Test caching of BEM solutions
+    """
+    surfs = _sphere_surfs([0.09], [0.3], 1)
+    orig_dir = os.getenv('MNE_CACHE_DIR', None)
+    tempdir = _TempDir()
+    try:
+        os.environ['MNE_CACHE_DIR'] = tempdir
+        bem = make_bem_solution(surfs)
+        assert_true(not bem['solution'].flags.writeable)
+        assert_true(make_bem_solution(surfs)['solution'] is bem['solution'])
+        assert_true(len(os.listdir(tempdir)) == 1)
+        # cleared from memory, read back from disk
+        _bem_solution_cache.clear()
+        sol = make_bem_solution(surfs)['solution']
+        assert_true(sol is not bem['solution'])
+        assert_allclose(sol, bem['solution'])
+        # a different geometry is a different solution
+        surfs[0]['rr'][0] *= 1.01
+        sol = make_bem_solution(surfs)['solution']
+        assert_true(len(os.listdir(tempdir)) == 2)
+        assert_true(np.abs(sol - bem['solution']).max() > 0)
+    finally:
+        if orig_dir is None:
+            del os.environ['MNE_CACHE_DIR']
+        else:
+            os.environ['MNE_CACHE_DIR'] = orig_dir
 
 
 def test_fit_sphere_to_headshape():
@@ -89,3 +209,6 @@ def test_fit_sphere_to_headshape():
     assert_almost_equal(r / 1000, 1.0, decimal=2)
     assert_almost_equal(oh / 1000, [0.0, 0.0, 0.0], decimal=2)
     assert_almost_equal(od / 1000, [0.0, 0.0, 0.0], decimal=2)
+
+
+run_tests_if_main()
@@ -6,7 +6,8 @@
 import os.path as op
 
 from nose.tools import assert_true, assert_equal
-from numpy.testing import assert_array_almost_equal, assert_array_equal
+from numpy.testing import (assert_array_almost_equal, assert_array_equal,
+                           assert_allclose)
 from nose.tools import assert_raises
 import numpy as np
 from scipy import linalg
@@ -15,13 +16,16 @@ import itertools as itt
 
 from mne.cov import (regularize, whiten_evoked, _estimate_rank_meeg_cov,
                      _auto_low_rank_model, _apply_scaling_cov,
-                     _undo_scaling_cov)
+                     _undo_scaling_cov, _shrinkage_cv_scores,
+                     _gaussian_loglik_cov, Whitener, compute_whitener,
+                     prepare_noise_cov, _noise_cov_cache,
+                     _noise_cov_cache_keys)
 
 from mne import (read_cov, write_cov, Epochs, merge_events,
                  find_events, compute_raw_data_covariance,
                  compute_covariance, read_evokeds, compute_proj_raw,
                  pick_channels_cov, pick_channels, pick_types, pick_info,
-                 make_ad_hoc_cov)
+                 make_ad_hoc_cov, IncrementalCovariance, create_info)
 from mne.io import Raw
 from mne.utils import _TempDir, slow_test, requires_module, run_tests_if_main
 from mne.io.proc_history import _get_sss_rank
@@ -135,6 +139,102 @@ def test_cov_estimation_on_raw_segment():
     assert_true(len(w) == 1)
 
 
+def test_cov_estimation_on_raw_segment_streaming():
+    """Test streaming estimation of covariance and regularization on raw
+    """
+    raw = Raw(raw_fname, preload=True).crop(0, 20., copy=False)
+    cov = compute_raw_data_covariance(raw)
+    # the blocks can be reduced in parallel and in single precision
+    with warnings.catch_warnings(record=True):  # joblib might be missing
+        cov_par = compute_raw_data_covariance(raw, n_jobs=2)
+        cov_all = compute_raw_data_covariance(raw, n_jobs=-1)
+    assert_equal(cov_par.nfree, cov.nfree)
+    assert_array_almost_equal(cov_par.data, cov.data)
+    assert_array_almost_equal(cov_all.data, cov.data)
+    cov_32 = compute_raw_data_covariance(raw, dtype=np.float32)
+    assert_true(linalg.norm(cov_32.data - cov.data, ord='fro') /
+                linalg.norm(cov.data, ord='fro') < 1e-4)
+
+    # model selection from the streamed statistics
+    covs = compute_raw_data_covariance(raw, method='auto',
+                                       return_estimators=True)
+    assert_equal(set(c['method'] for c in covs),
+                 set(['shrunk', 'diagonal_fixed', 'empirical']))
+    logliks = [c['loglik'] for c in covs]
+    assert_true(np.all(np.diff(logliks) <= 0))
+    for c in covs:
+        assert_equal(c.ch_names, cov.ch_names)
+        assert_equal(c.nfree, cov.nfree)
+    cov_emp = [c for c in covs if c['method'] == 'empirical'][0]
+    assert_array_almost_equal(cov_emp.data, cov.data)
+    cov_best = compute_raw_data_covariance(raw, method='auto')
+    assert_equal(cov_best['method'], covs[0]['method'])
+    assert_raises(ValueError, compute_raw_data_covariance, raw,
+                  method='factor_analysis')
+    assert_raises(ValueError, compute_raw_data_covariance, raw,
+                  method='auto', cv=1)
+
+
+def test_incremental_covariance():
+    """Test incremental covariance estimation"""
+    raw = Raw(raw_fname, preload=True).crop(0, 20., copy=False)
+    cov = compute_raw_data_covariance(raw, tstep=1.)
+    inc_cov = IncrementalCovariance(raw.info)
+    assert_raises(RuntimeError, inc_cov.get_covariance)
+    step = int(np.ceil(raw.info['sfreq']))
+    stop = raw.last_samp - raw.first_samp
+    for start in range(0, stop, step):
+        inc_cov.update(raw[:, start:min(start + step, stop)][0])
+    assert_true('IncrementalCovariance' in repr(inc_cov))
+    assert_equal(inc_cov.n_samples_, cov.nfree)
+    cov_inc = inc_cov.get_covariance()
+    assert_equal(cov_inc.ch_names, cov.ch_names)
+    assert_equal(cov_inc.nfree, cov.nfree)
+    assert_array_almost_equal(cov_inc.data / np.abs(cov.data).max(),
+                              cov.data / np.abs(cov.data).max())
+    # regularized estimates
+    cov_reg = inc_cov.get_covariance('diagonal_fixed')
+    assert_true(np.all(np.diag(cov_reg.data) >= np.diag(cov.data)))
+    cov_shrunk = inc_cov.get_covariance(
+        'shrunk', method_params=dict(shrunk=dict(shrinkage=1.)))
+    assert_array_equal(cov_shrunk.data, np.diag(np.diag(cov_shrunk.data)))
+    assert_raises(ValueError, inc_cov.get_covariance, 'factor_analysis')
+    assert_raises(ValueError, inc_cov.update, raw[:10, :100][0])
+
+    # past data are forgotten
+    half = stop // 2
+    data = raw[:, :2 * half][0]
+    inc_cov = IncrementalCovariance(raw.info, forgetting=0.99)
+    inc_cov.update(np.array([data[:, :half], 2 * data[:, half:]]))
+    assert_true(abs(inc_cov.n_samples_ - half) < 1.)
+    cov_inc = inc_cov.get_covariance()
+    assert_true(np.median(np.diag(cov_inc.data) / np.diag(cov.data)) > 3.)
+    assert_raises(ValueError, IncrementalCovariance, raw.info,
+                  forgetting=0.)
+
+
+def test_incremental_covariance_forgetting():
+    """Test normalization of incremental covariance with forgetting"""
+    info = create_info(3, 1000., 'eeg')
+    data = np.random.RandomState(0).randn(3, 2000)
+    inc_cov = IncrementalCovariance(info, forgetting=1e-3)
+    inc_cov.update(data[:, :1])
+    assert_raises(ValueError, inc_cov.get_covariance)
+    # the covariance stays positive even with little effective data
+    for block in np.array_split(data, 200, axis=1):
+        inc_cov.update(block)
+    assert_true(inc_cov.n_samples_ < 11)
+    with warnings.catch_warnings(record=True):  # too few samples
+        cov = inc_cov.get_covariance()
+    assert_true(np.all(np.diag(cov.data) > 0))
+    assert_true(np.all(np.diag(cov.data) < 10))
+    # mild forgetting on stationary data matches the empirical estimate
+    inc_cov = IncrementalCovariance(info, forgetting=1 - 1e-5)
+    for block in np.array_split(data, 20, axis=1):
+        inc_cov.update(block)
+    assert_allclose(inc_cov.get_covariance().data, np.cov(data), atol=0.05)
+
+
 @slow_test
 def test_cov_estimation_with_triggers():
     """Test estimation from raw with triggers
@@ -266,6 +366,53 @@ def test_evoked_whiten():
     assert_true(np.all(mean_baseline > 0.2))
 
 
+def test_whitener():
+    """Test cached whitening operators"""
+    evoked = read_evokeds(ave_fname, condition=0, baseline=(None, 0),
+                          proj=True)
+    cov = read_cov(cov_fname)
+    cov = regularize(cov, evoked.info, grad=0.1, mag=0.1, eeg=0.1,
+                     exclude='bads')
+    picks = pick_types(evoked.info, meg=True, eeg=True, ref_meg=False,
+                       exclude='bads')
+    _noise_cov_cache.clear()
+    del _noise_cov_cache_keys[:]
+    W, ch_names = compute_whitener(cov, evoked.info, picks)
+    assert_equal(len(_noise_cov_cache), 1)
+    whitener = Whitener(cov, evoked.info, picks)
+    assert_equal(len(_noise_cov_cache), 1)  # decomposition was reused
+    assert_equal(whitener.ch_names, ch_names)
+    assert_array_almost_equal(whitener.W, W)
+    assert_true('Whitener' in repr(whitener))
+
+    # whitening matrix from the prepared covariance
+    noise_cov = prepare_noise_cov(cov, evoked.info, ch_names)
+    eig = noise_cov['eig']
+    nzero = eig > 0
+    assert_equal(whitener.rank, nzero.sum())
+    W_ = np.zeros((len(ch_names), len(ch_names)))
+    W_[nzero, nzero] = 1.0 / np.sqrt(eig[nzero])
+    W_ = np.dot(noise_cov['eigvec'].T, np.dot(W_, noise_cov['eigvec']))
+    assert_array_almost_equal(whitener.W / np.abs(W_).max(),
+                              W_ / np.abs(W_).max())
+
+    # arrays and streams of arrays
+    data = evoked.data[picks]
+    assert_array_almost_equal(whitener.apply(data), np.dot(W, data))
+    chunks = list(whitener.apply(data[:, k:k + 10]
+                                 for k in range(0, data.shape[1], 10)))
+    assert_array_almost_equal(np.concatenate(chunks, axis=1),
+                              np.dot(W, data))
+
+    # another covariance or rank is decomposed again
+    cov['data'] = cov['data'] * 4.
+    whitener_2 = Whitener(cov, evoked.info, picks)
+    assert_equal(len(_noise_cov_cache), 2)
+    assert_array_almost_equal(2 * whitener_2.W, whitener.W)
+    Whitener(cov, evoked.info, picks, rank=dict(meg=50))
+    assert_equal(len(_noise_cov_cache), 3)
+
+
 @slow_test
 def test_rank():
     """Test cov rank estimation"""
@@ -404,6 +551,13 @@ def test_auto_low_rank():
                                      method_params=method_params,
                                      cv=cv)
     assert_equal(info['best'], rank)
+    # the candidates can be scored in parallel
+    with warnings.catch_warnings(record=True):  # joblib might be missing
+        est, info_par = _auto_low_rank_model(X, mode=mode, n_jobs=2,
+                                             method_params=method_params,
+                                             cv=cv)
+    assert_equal(info_par['best'], rank)
+    assert_array_almost_equal(info_par['scores'], info['scores'])
 
     X = get_data(n_samples=n_samples, n_features=n_features, rank=rank,
                  sigma=sigma)
@@ -422,6 +576,25 @@ def test_auto_low_rank():
                   n_jobs=n_jobs, method_params=method_params, cv=cv)
 
 
+def test_shrinkage_cv_scores():
+    """Test analytic scoring of shrinkage values"""
+    rng = np.random.RandomState(0)
+    X_train, X_test = rng.randn(10, 40), rng.randn(10, 50)
+    train_cov = np.dot(X_train, X_train.T) / 40.
+    test_cov = np.dot(X_test, X_test.T) / 50.
+    shrinkages = np.array([0., 1e-3, 0.1, 0.5, 1.])
+    scores = _shrinkage_cv_scores([train_cov] * 2, [test_cov] * 2,
+                                  shrinkages)
+    mu = np.trace(train_cov) / len(train_cov)
+    for shrinkage, score in zip(shrinkages, scores):
+        cov = (1. - shrinkage) * train_cov + shrinkage * mu * np.eye(10)
+        assert_array_almost_equal(score, _gaussian_loglik_cov(test_cov, cov))
+    # singular training covariances are never selected
+    scores = _shrinkage_cv_scores([train_cov[:1, :1] * 0.],
+                                  [test_cov[:1, :1]], [0., 0.5])
+    assert_true(np.isinf(scores).all())
+
+
 @requires_sklearn_0_15
 def test_compute_covariance_auto_reg():
     """Test automated regularization"""
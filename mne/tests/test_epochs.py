@@ -22,12 +22,14 @@ from mne import (io, Epochs, read_events, pick_events, read_epochs,
                  write_evokeds)
 from mne.epochs import (
     bootstrap, equalize_epoch_counts, combine_event_ids, add_channels_epochs,
-    EpochsArray, concatenate_epochs, _BaseEpochs)
+    EpochsArray, concatenate_epochs, _BaseEpochs, _minimize_time_diff)
 from mne.utils import (_TempDir, requires_pandas, slow_test,
                        clean_warning_registry, run_tests_if_main,
                        requires_scipy_version)
 
 from mne.io.meas_info import create_info
+from mne.io.reference import set_eeg_reference
+from mne.preprocessing.stim import fix_stim_artifact
 from mne.io.proj import _has_eeg_average_ref_proj
 from mne.event import merge_events
 from mne.io.constants import FIFF
@@ -439,6 +441,32 @@ def test_evoked_standard_error():
             assert_equal(ave.first, ave2.first)
 
 
+def test_average_by_condition():
+    """Test single-pass averaging of all conditions
+    """
+    raw, events, picks = _get_data()
+    # two conditions can share an event id
+    event_ids = dict(a=event_id, b=event_id_2, c=event_id)
+    for preload in (True, False):
+        epochs = Epochs(raw, events[:10], event_ids, tmin, tmax, picks=picks,
+                        baseline=(None, 0), preload=preload)
+        evokeds, stderrs = epochs.average_by_condition(return_stderr=True)
+        assert_equal(sorted(evokeds.keys()), ['a', 'b', 'c'])
+        assert_true(evokeds['c'].nave > 0)
+        for cond in ('a', 'b', 'c'):
+            for ave, ave2 in ((epochs[cond].average(), evokeds[cond]),
+                              (epochs[cond].standard_error(),
+                               stderrs[cond])):
+                assert_allclose(ave.data, ave2.data, rtol=1e-7, atol=1e-20)
+                assert_equal(ave.nave, ave2.nave)
+                assert_equal(ave.kind, ave2.kind)
+                assert_equal(ave.comment, ave2.comment)
+                assert_equal(ave.ch_names, ave2.ch_names)
+        evokeds2 = epochs.average_by_condition(picks=[0, 1])
+        assert_equal(len(evokeds2['a'].ch_names), 2)
+        assert_allclose(evokeds2['a'].data, evokeds['a'].data[:2])
+
+
 def test_reject_epochs():
     """Test of epochs rejection
     """
@@ -573,6 +601,56 @@ def test_indexing_slicing():
         assert_array_equal(data, data_normal[idx])
 
 
+def test_indexing_views():
+    """Test that sliced epochs share data until they are modified
+    """
+    info = create_info(['a', 'b'], 100., ['eeg', 'eeg'])
+    events = np.c_[np.arange(10) * 100, np.zeros(10, int),
+                   np.tile([1, 2], 5)]
+    data = np.random.RandomState(0).randn(10, 2, 50)
+    epochs = EpochsArray(data.copy(), info, events, event_id=dict(a=1, b=2))
+    for key, idx in ((slice(2, 8), slice(2, 8)), ([3, 4, 5], slice(3, 6)),
+                     (np.arange(10) % 2 == 1, slice(1, None, 2)),
+                     (4, slice(4, 5)), ('b', slice(1, None, 2))):
+        sub = epochs[key]
+        assert_true(np.may_share_memory(sub._data, epochs._data))
+        assert_array_equal(sub.get_data(), data[idx])
+    assert_true(not np.may_share_memory(epochs[[0, 1, 3]]._data,
+                                        epochs._data))
+    # copy on write
+    sub = epochs['a']
+    sub.subtract_evoked(sub.average())
+    assert_true(not np.may_share_memory(sub._data, epochs._data))
+    assert_array_equal(epochs._data, data)
+    sub = epochs[:5]
+    sub.savgol_filter(10.)
+    assert_true(not np.may_share_memory(sub._data, epochs._data))
+    assert_array_equal(epochs._data, data)
+    # while shared, the data of both instances are read-only
+    sub = epochs[[0, 1, 2]]
+    assert_raises(ValueError, sub.get_data().__setitem__, 0, 0.)
+    assert_raises(ValueError, epochs.get_data().__setitem__, 0, 0.)
+    sub._own_data()
+    assert_true(not np.may_share_memory(sub._data, epochs._data))
+    sub._data[:] = 0.
+    assert_array_equal(epochs.get_data(), data)
+    # the last instance holding the memory does not need a copy
+    epochs_data = epochs._data
+    epochs._own_data()
+    assert_true(epochs._data is epochs_data)
+    epochs._data[0] = 0.
+    # in-place operations on the child or the parent
+    for inst in ('child', 'parent'):
+        epochs = EpochsArray(data.copy(), info, events)
+        sub = epochs[2:5]
+        inst, other = (sub, epochs) if inst == 'child' else (epochs, sub)
+        other_data = other.get_data().copy()
+        set_eeg_reference(inst, ['a'], copy=False)
+        assert_array_equal(inst.get_data()[:, 0], 0.)
+        fix_stim_artifact(inst, tmin=0., tmax=0.1)
+        assert_array_equal(other.get_data(), other_data)
+
+
 def test_comparision_with_c():
     """Test of average obtained vs C code
     """
@@ -855,6 +933,26 @@ def test_epoch_eq():
     assert_true(epochs['ab'].events.shape[0] == epochs['cd'].events.shape[0])
 
 
+def test_minimize_time_diff():
+    """Test matching of event times for count equalization"""
+    t_shorter = np.array([10, 50, 90])
+    t_longer = np.array([0, 11, 30, 49, 70, 91, 100])
+    assert_array_equal(_minimize_time_diff(t_shorter, t_longer),
+                       [False, True, False, True, False, True, False])
+    # each event is matched once, even if another one is closer
+    assert_array_equal(_minimize_time_diff([10, 11], [9, 10, 30]),
+                       [True, True, False])
+    assert_array_equal(_minimize_time_diff([10, 11], [30, 10, 9]),
+                       [False, True, True])
+    assert_array_equal(_minimize_time_diff([], [1, 2]), [False, False])
+    assert_array_equal(_minimize_time_diff([1, 2], [1, 2]), [True, True])
+    rng = np.random.RandomState(0)
+    times = np.cumsum(rng.randint(50, 150, 1000))
+    cond = rng.rand(1000) < 0.3
+    keep = _minimize_time_diff(times[cond], times[~cond])
+    assert_equal(keep.sum(), cond.sum())
+
+
 def test_access_by_name():
     """Test accessing epochs by event name and on_missing for rare events
     """
@@ -7,7 +7,10 @@ from numpy.testing import assert_array_almost_equal, assert_array_equal
 import warnings
 
 from mne import (read_events, write_events, make_fixed_length_events,
-                 find_events, pick_events, find_stim_steps, io, pick_channels)
+                 find_events, pick_events, find_stim_steps, io, pick_channels,
+                 Events)
+from mne.io import RawArray
+from mne.io.meas_info import create_info
 from mne.utils import _TempDir
 from mne.event import define_target_events, merge_events
 
@@ -276,6 +279,39 @@ def test_find_events():
             os.environ['MNE_STIM_CHANNEL%s' % s] = o
 
 
+def test_find_events_chunks():
+    """Test finding events chunk by chunk"""
+    from mne import event
+    stim = np.zeros(1000)
+    for start, stop, value in [(0, 10, 3), (99, 101, 5), (100, 150, 7),
+                               (199, 200, 4), (400, 401, 2), (998, 1000, 1)]:
+        stim[start:stop] = value
+    info = create_info(['STI 014', 'STI 015'], 1000., ['stim', 'stim'])
+    raw = RawArray(np.array([stim, -stim]), info, verbose=False)
+    orig_chunk_size = event._stim_chunk_size
+    kwargs = [dict(), dict(consecutive=True), dict(output='offset'),
+              dict(output='step', consecutive=False), dict(min_duration=0.002),
+              dict(mask=4)]
+    try:
+        for stim_channel in ('STI 014', ['STI 014', 'STI 015']):
+            events = [find_events(raw, stim_channel, shortest_event=1, **kw)
+                      for kw in kwargs]
+            steps = find_stim_steps(raw, pad_start=0, pad_stop=0, merge=-2,
+                                    stim_channel=stim_channel)
+            for chunk_size in (1, 2, 99, 100, 101, 999):
+                event._stim_chunk_size = chunk_size
+                for kw, events_ in zip(kwargs, events):
+                    assert_array_equal(find_events(raw, stim_channel,
+                                                   shortest_event=1, **kw),
+                                       events_)
+                assert_array_equal(find_stim_steps(
+                    raw, pad_start=0, pad_stop=0, merge=-2,
+                    stim_channel=stim_channel), steps)
+    finally:
+        event._stim_chunk_size = orig_chunk_size
+    assert_array_equal(events[0][:, 0], [99, 100, 199, 400, 998])
+
+
 def test_pick_events():
     """Test pick events in a events ndarray
     """
@@ -317,3 +353,31 @@ def test_define_events():
     n_target_ = events_[events_[:, 2] == 42].shape[0]
 
     assert_true(n_target_ == (n_target - n_miss))
+
+
+def test_events_index():
+    """Test indexed event queries"""
+    events = read_events(fname)
+    event_id = {'aud/l': 1, 'aud/r': 2, 'vis/l': 3, 'vis/r': 4}
+    index = Events(events, event_id)
+    assert_true(len(index) == len(events))
+    assert_true('Events' in repr(index))
+    assert_array_equal(index.select(), np.arange(len(events)))
+    start, stop = events[5, 0], events[20, 0]
+    assert_array_equal(index.select(start=start, stop=stop),
+                       np.where((events[:, 0] >= start) &
+                                (events[:, 0] < stop))[0])
+    assert_array_equal(index.select([1, 3], stop=stop),
+                       np.where(np.in1d(events[:, 2], [1, 3]) &
+                                (events[:, 0] < stop))[0])
+    assert_array_equal(index.select(1000), np.zeros(0, int))
+    # hierarchical keys
+    assert_array_equal(index.match('l'),
+                       np.where(np.in1d(events[:, 2], [1, 3]))[0])
+    assert_array_equal(index.match(['aud', 'r']),
+                       np.where(events[:, 2] == 2)[0])
+    assert_array_equal(index.match(['aud/l', 'vis/r'], start=start),
+                       np.where(np.in1d(events[:, 2], [1, 4]) &
+                                (events[:, 0] >= start))[0])
+    assert_raises(KeyError, index.match, 'foo')
+    assert_raises(ValueError, Events, events[:, :2])
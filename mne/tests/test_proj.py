@@ -14,7 +14,8 @@ from mne import pick_types
 from mne.io import Raw
 from mne import compute_proj_epochs, compute_proj_evoked, compute_proj_raw
 from mne.io.proj import (make_projector, activate_proj,
-                         _needs_eeg_average_ref_proj)
+                         _needs_eeg_average_ref_proj, _proj_low_rank,
+                         _apply_proj_low_rank)
 from mne.proj import (read_proj, write_proj, make_eeg_average_ref_proj,
                       _has_eeg_average_ref_proj)
 from mne import read_events, Epochs, sensitivity_map, read_source_estimate
@@ -222,6 +223,31 @@ def test_compute_proj_raw():
     assert_array_almost_equal(proj, np.eye(len(raw.ch_names)))
 
 
+def test_proj_low_rank():
+    """Test applying projectors in low-rank form
+    """
+    projs = read_proj(proj_fname)
+    ch_names = projs[0]['data']['col_names']
+    proj, nproj, U = make_projector(projs, ch_names)
+    proj_vecs = _proj_low_rank(proj)
+    assert_equal(proj_vecs.shape, (len(ch_names), nproj))
+    rng = np.random.RandomState(0)
+    data = rng.randn(len(ch_names), 50)
+    assert_allclose(_apply_proj_low_rank(proj, proj_vecs, data),
+                    np.dot(proj, data), atol=1e-10)
+    # channel subsets of the operator keep the same form
+    idx = np.arange(0, len(ch_names), 2)
+    proj_sub = proj[idx][:, idx]
+    proj_vecs = _proj_low_rank(proj_sub)
+    assert_true(proj_vecs.shape[1] <= nproj)
+    assert_allclose(_apply_proj_low_rank(proj_sub, proj_vecs, data[idx]),
+                    np.dot(proj_sub, data[idx]), atol=1e-10)
+    # dense products are used when the low-rank form does not help
+    assert_true(_proj_low_rank(np.eye(3) - np.ones((3, 3)) / 3.) is None)
+    assert_true(_proj_low_rank(np.triu(np.ones((3, 3)))) is None)
+    assert_true(_proj_low_rank(None) is None)
+
+
 def test_make_eeg_average_ref_proj():
     """Test EEG average reference projection"""
     raw = Raw(raw_fname, add_eeg_ref=False, preload=True)
@@ -16,8 +16,10 @@ from mne.utils import (_TempDir, requires_fs_or_nibabel, requires_nibabel,
                        requires_freesurfer, run_subprocess,
                        requires_mne, requires_scipy_version,
                        run_tests_if_main, slow_test)
-from mne.surface import _accumulate_normals, _triangle_neighbors
-from mne.source_space import _get_mgz_header
+from mne.surface import (_accumulate_normals, _triangle_neighbors,
+                         _get_ico_surface)
+from mne.source_space import (_get_mgz_header, _points_outside_surface,
+                              _ray_cast_outside, _get_solids)
 from mne.externals.six.moves import zip
 from mne.source_space import (get_volume_labels_from_aseg, SourceSpaces,
                               _compare_source_spaces)
@@ -305,6 +307,30 @@ def test_accumulate_normals():
     assert_allclose(nn, this['nn'], rtol=1e-7, atol=1e-7)
 
 
+def test_points_outside_surface():
+    """Test ray casting against the solid angle point-in-surface test"""
+    # a closed but non-convex surface
+    surf = _get_ico_surface(3)
+    rr = surf['rr']
+    rr *= 0.08 * (1 + 0.3 * np.sin(3 * np.arctan2(rr[:, 1], rr[:, 0])) *
+                  np.cos(2 * rr[:, 2]))[:, np.newaxis]
+    rng = np.random.RandomState(0)
+    # include points on the surface and rays through vertices
+    pts = np.concatenate([rng.uniform(-0.11, 0.11, (2000, 3)), rr[:20],
+                          np.zeros((1, 3)), [[0., 0., 0.05]]])
+    tri_rrs = rr[surf['tris']]
+    tot_angle = _get_solids(tri_rrs, pts)
+    want = np.abs(tot_angle / (2 * np.pi) - 1.0) > 1e-5
+    assert_true(want[:2000].any() and not want[:2000].all())
+    outside, ambiguous = _ray_cast_outside(pts, tri_rrs, n_points=300)
+    assert_true(ambiguous[2000:].all())
+    assert_true(ambiguous[:2000].sum() < 10)
+    assert_array_equal(outside[~ambiguous], want[~ambiguous])
+    assert_array_equal(_points_outside_surface(pts, surf), want)
+    for pt, this_want in zip(pts[1995:2005], want[1995:2005]):
+        assert_equal(_points_outside_surface(pt, surf, 2)[0], this_want)
+
+
 @slow_test
 @testing.requires_testing_data
 def test_setup_source_space():
@@ -1,4 +1,4 @@
-from numpy.testing import assert_equal, assert_array_equal
+from numpy.testing import assert_equal, assert_array_equal, assert_allclose
 from nose.tools import assert_true, assert_raises, assert_not_equal
 from copy import deepcopy
 import os.path as op
@@ -9,14 +9,15 @@ import warnings
 
 from mne.utils import (set_log_level, set_log_file, _TempDir,
                        get_config, set_config, deprecated, _fetch_file,
-                       sum_squared, estimate_rank,
+                       sum_squared, estimate_rank, _clear_rank_cache,
+                       _rank_cache,
                        _url_to_local_path, sizeof_fmt, _check_subject,
                        _check_type_picks, object_hash, object_diff,
                        requires_good_network, run_tests_if_main, md5sum,
                        ArgvSetter, _memory_usage, check_random_state,
                        _check_mayavi_version, requires_mayavi,
                        set_memmap_min_size, _get_stim_channel, _check_fname,
-                       create_slices, _time_mask)
+                       create_slices, _time_mask, _write_atomic)
 from mne.io import show_fiff
 from mne import Evoked
 from mne.externals.six.moves import StringIO
@@ -92,6 +93,19 @@ def test_run_tests_if_main():
     assert_true(x[0] and x[1])
 
 
+def test_write_atomic():
+    """Test writing files under a temporary name"""
+    tempdir = _TempDir()
+    fname = op.join(tempdir, 'test.npy')
+    _write_atomic(fname, np.save, np.arange(3))
+    assert_array_equal(np.load(fname), np.arange(3))
+    assert_equal(os.listdir(tempdir), ['test.npy'])
+    # a failed write leaves nothing behind
+    fname = op.join(tempdir, 'bad.npy')
+    assert_raises(TypeError, _write_atomic, fname, np.save)
+    assert_equal(os.listdir(tempdir), ['test.npy'])
+
+
 def test_hash():
     """Test dictionary hashing and comparison functions"""
     # does hashing all of these types work:
@@ -207,6 +221,34 @@ def test_estimate_rank():
                        np.ones(10))
     data[0, 0] = 0
     assert_equal(estimate_rank(data), 9)
+    assert_raises(ValueError, estimate_rank, data, method='foo')
+
+    # the Gram matrix approach should give the same answer
+    rng = np.random.RandomState(0)
+    data = rng.randn(10, 1000)
+    data[-1] = data[0] + data[1]
+    for this_data in (data, data.T):
+        rank, s = estimate_rank(this_data, return_singular=True, cache=False)
+        rank_gram, s_gram = estimate_rank(this_data, return_singular=True,
+                                          method='gram', cache=False)
+        assert_equal(rank, 9)
+        assert_equal(rank_gram, 9)
+        assert_allclose(s[:9], s_gram[:9], rtol=1e-7)
+
+    # cached results should be reused and not be modifiable
+    _clear_rank_cache()
+    estimate_rank(data)
+    assert_equal(len(_rank_cache), 0)
+    rank, s = estimate_rank(data, return_singular=True, cache=True)
+    assert_equal(len(_rank_cache), 1)
+    s[:] = 0
+    assert_equal(estimate_rank(data, cache=True), 9)
+    assert_true(np.all(estimate_rank(data, return_singular=True,
+                                     cache=True)[1][:9] > 0))
+    assert_equal(len(_rank_cache), 1)
+    estimate_rank(data, tol=1e-2, cache=True)
+    assert_equal(len(_rank_cache), 2)
+    _clear_rank_cache()
 
 
 def test_logging():
@@ -115,6 +115,29 @@ def object_hash(x, h=None):
     return int(h.hexdigest(), 16)
 
 
+def _write_atomic(fname, write, *args, **kwargs):
+    """Write a file under a temporary name and rename it when complete
+
+    This way other processes (e.g., sharing a cache directory) never read
+    a partially written file. ``write(fid, *args, **kwargs)`` is used to
+    write to the open file object (e.g., ``numpy.save``).
+    """
+    tmp_fname = '%s-%d.tmp' % (fname, os.getpid())
+    try:
+        with open(tmp_fname, 'wb') as fid:
+            write(fid, *args, **kwargs)
+        try:
+            os.rename(tmp_fname, fname)
+        except OSError:
+            # on Windows the file may have just been written by another
+            # process, which is fine
+            if not op.isfile(fname):
+                raise
+    finally:
+        if op.isfile(tmp_fname):
+            os.remove(tmp_fname)
+
+
 def object_diff(a, b, pre=''):
     """Compute all differences between two python variables
 
@@ -287,8 +310,16 @@ class _TempDir(str):
         rmtree(self._path, ignore_errors=True)
 
 
+# Rank estimates of covariances can be cached by the content of the
+# (normalized) data, since the same covariance is typically decomposed many
+# times per subject
+_rank_cache = dict()
+_rank_cache_keys = list()
+_rank_cache_size = 32
+
+
 def estimate_rank(data, tol=1e-4, return_singular=False,
-                  norm=True, copy=True):
+                  norm=True, copy=True, method='svd', cache=False):
     """Helper to estimate the rank of data
 
     This function will normalize the rows of the data (typically
@@ -313,6 +344,19 @@ def estimate_rank(data, tol=1e-4, return_singular=False,
     copy : bool
         If False, values in data will be modified in-place during
         rank estimation (saves memory).
+    method : 'svd' | 'gram'
+        If 'svd' (default), the singular values are obtained from a full
+        SVD of the data. If 'gram', they are obtained as the square roots
+        of the eigenvalues of the smaller Gram matrix (``data @ data.T``
+        or ``data.T @ data``), which is much faster when one dimension
+        is much larger than the other (e.g., channels x time samples).
+    cache : bool
+        If True, results are cached based on the content of the data, so
+        that estimating the rank of the same matrix again (e.g., when the
+        same covariance is used to compute several whiteners) does not
+        require a new decomposition. Hashing the data is not free, so this
+        is only worthwhile for small matrices that are decomposed
+        repeatedly. Defaults to False.
 
     Returns
     -------
@@ -322,19 +366,55 @@ def estimate_rank(data, tol=1e-4, return_singular=False,
         If return_singular is True, the singular values that were
         thresholded to determine the rank are also returned.
     """
+    if method not in ('svd', 'gram'):
+        raise ValueError('method must be "svd" or "gram", got %s' % method)
     if copy is True:
         data = data.copy()
     if norm is True:
         norms = _compute_row_norms(data)
         data /= norms[:, np.newaxis]
-    s = linalg.svd(data, compute_uv=False, overwrite_a=True)
-    rank = np.sum(s >= tol)
+    key = None
+    if cache is True:
+        key = object_hash(dict(data=np.asarray(data), tol=float(tol),
+                               method=method))
+    if key in _rank_cache:
+        rank, s = _rank_cache[key]
+        s = s.copy()
+    else:
+        s = _get_singular_values(data, method)
+        rank = np.sum(s >= tol)
+        if key is not None:
+            _rank_cache[key] = (rank, s.copy())
+            _rank_cache_keys.append(key)
+            if len(_rank_cache_keys) > _rank_cache_size:
+                del _rank_cache[_rank_cache_keys.pop(0)]
     if return_singular is True:
         return rank, s
     else:
         return rank
 
 
+def _get_singular_values(data, method):
+    """Helper to get the singular values of a matrix"""
+    if method == 'svd':
+        s = linalg.svd(data, compute_uv=False, overwrite_a=True)
+    else:  # method == 'gram'
+        if data.shape[0] <= data.shape[1]:
+            gram = np.dot(data, data.T)
+        else:
+            gram = np.dot(data.T, data)
+        s = linalg.eigvalsh(gram, overwrite_a=True)[::-1]
+        np.maximum(s, 0., out=s)
+        s = np.sqrt(s)
+    return s
+
+
+def _clear_rank_cache():
+    """Helper to empty the cache of rank estimates"""
+    _rank_cache.clear()
+    del _rank_cache_keys[:]
+
+
 def _compute_row_norms(data):
     """Compute scaling based on estimated norm"""
     norms = np.sqrt(np.sum(data ** 2, axis=1))